@@ -0,0 +1,12 @@
+"""
+Performance benchmarks and tools for qChecker.
+
+Benchmarks are run as modules from the repository root, e.g.::
+
+    python -m benchmarks.general_checks
+    python -m benchmarks.substructures --sizes 100 1000
+    python -m benchmarks.scaling --families elif_ladder
+    python -m benchmarks.baseline compare
+    python -m benchmarks.memory --sizes 100 1000
+    python -m benchmarks.differential --fuzz 100
+"""
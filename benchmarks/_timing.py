@@ -0,0 +1,65 @@
+import gc
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+
+@contextmanager
+def _gc_disabled() -> Iterator[None]:
+    # As in timeit, garbage collection is disabled so its pauses don't add
+    # noise to the times of whichever calls trigger it
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def time_calls(function: Callable[[], object], repeat: int) -> list[float]:
+    """Returns the times of repeat calls of function after one warm up call"""
+    function()  # warm up
+    times = []
+    with _gc_disabled():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def time_per_call(
+        function: Callable[[], object],
+        repeat: int,
+        min_time: float = 0.005,
+) -> list[float]:
+    """
+    Returns repeat times of one call of function, each averaged over enough
+    calls to take at least min_time seconds so fast calls can be timed
+    """
+    start = time.perf_counter()
+    function()  # warm up
+    elapsed = time.perf_counter() - start
+    number = max(1, int(min_time / elapsed)) if elapsed else 1000
+    times = []
+    with _gc_disabled():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            times.append((time.perf_counter() - start) / number)
+    return times
+
+
+def summarise(times: list[float]) -> dict[str, float]:
+    median = statistics.median(times)
+    return {
+        'calls': len(times),
+        'mean_s': statistics.mean(times),
+        'median_s': median,
+        'min_s': min(times),
+        'mad_s': statistics.median(abs(t - median) for t in times),
+    }
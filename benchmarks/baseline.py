@@ -0,0 +1,363 @@
+"""
+Versioned baselines of the substructure benchmarks (see
+:mod:`benchmarks.substructures`) and a regression gate comparing the current
+tree against them::
+
+    python -m benchmarks.baseline save [--sizes N [N ...]] [--repeat N]
+        [--version VERSION] [--output PATH]
+    python -m benchmarks.baseline compare [--baseline PATH] [--current PATH]
+        [--tolerance P] [--noise-factor K] [--gate PATTERN [PATTERN ...]]
+        [--json]
+
+Baselines are stored in benchmarks/baselines as one JSON file per qChecker
+version. Baselines recorded from unreleased trees are named after the last
+release with a :code:`+dev` suffix (e.g. :code:`1.1.2+dev`), which sorts after
+the release itself. :code:`compare` reruns the benchmarks with the
+configuration of the baseline (or loads results saved with :code:`--output`)
+and reports the change in throughput of each benchmark. The noise of a
+benchmark is estimated from the median absolute deviation of its times, which
+unlike the standard deviation is not inflated by a single slow run. A benchmark
+has regressed when its throughput falls by more than the larger of the
+tolerance and noise-factor times the combined relative noise of both runs, so
+noisy benchmarks need a larger change to fail. The command exits with status 1
+if any benchmark matching a gate pattern (by default, every substructure) has
+regressed or is missing from the current results, e.g. as it was renamed.
+
+Baselines are only comparable on the machine they were recorded on.
+"""
+
+import argparse
+import configparser
+import datetime
+import json
+import math
+import os
+import platform
+import sys
+from dataclasses import asdict, dataclass
+from fnmatch import fnmatch
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from . import substructures
+
+__all__ = [
+    'BASELINE_DIRECTORY',
+    'Comparison',
+    'save_baseline',
+    'load_baseline',
+    'latest_baseline',
+    'compare',
+]
+
+BASELINE_DIRECTORY = Path(__file__).parent / 'baselines'
+BASELINE_SIZES = (100, 1000)
+BASELINE_REPEAT = 5
+DEFAULT_TOLERANCE = 0.1
+DEFAULT_NOISE_FACTOR = 3.0
+DEFAULT_GATE = ('match/*',)
+
+# The version of the baseline file format
+_SCHEMA = 1
+# The configuration that must be equal for results to be comparable
+_CONFIG_KEYS = ('sizes', 'seed', 'density')
+
+
+@dataclass(frozen=True, slots=True)
+class Comparison:
+    """
+    The change in throughput of one benchmark.
+
+    Defines the following instance variables:
+    - **name**: The name of the benchmark
+    - **baseline**: The baseline throughput in lines per second
+    - **current**: The current throughput in lines per second, or None if
+      the benchmark is missing from the current results
+    - **change**: The relative change in throughput, e.g. -0.2 if the
+      current throughput is 20% lower, or None if the benchmark is missing
+    - **threshold**: The relative fall in throughput above which the
+      benchmark has regressed
+    - **gated**: Whether a regression of the benchmark fails the comparison
+    """
+    name: str
+    baseline: float
+    current: float | None
+    change: float | None
+    threshold: float
+    gated: bool
+
+    @property
+    def missing(self) -> bool:
+        return self.current is None
+
+    @property
+    def regressed(self) -> bool:
+        return not self.missing and self.change < -self.threshold
+
+    @property
+    def improved(self) -> bool:
+        return not self.missing and self.change > self.threshold
+
+    @property
+    def failed(self) -> bool:
+        """Whether the benchmark is gated and has regressed or is missing"""
+        return self.gated and (self.regressed or self.missing)
+
+
+def save_baseline(
+        results: dict,
+        path: str | os.PathLike,
+        version: str | None = None,
+) -> dict:
+    """
+    Writes results of :func:`benchmarks.substructures.run` to a baseline
+    file, recording the qChecker version and machine they were run with.
+    Returns the baseline.
+
+    :param version: The qChecker version the results were run with, e.g.
+        :code:`1.1.2+dev` for an unreleased tree. Defaults to the installed
+        version
+    """
+    baseline = {
+        'schema': _SCHEMA,
+        'qchecker': version or _qchecker_version(),
+        'created': datetime.date.today().isoformat(),
+        'machine': _machine(),
+        'results': results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+    return baseline
+
+
+def load_baseline(path: str | os.PathLike) -> dict:
+    """
+    Reads a baseline file.
+
+    :raises ValueError: If the file is not a baseline of a supported schema.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('schema') != _SCHEMA:
+        raise ValueError(
+            f'{path} is not a version {_SCHEMA} benchmark baseline'
+        )
+    return baseline
+
+
+def latest_baseline(directory: str | os.PathLike = BASELINE_DIRECTORY) -> Path:
+    """
+    Returns the path of the baseline of the latest qChecker version in the
+    directory.
+
+    :raises FileNotFoundError: If the directory contains no baselines.
+    """
+    paths = sorted(Path(directory).glob('*.json'),
+                   key=lambda path: _version_key(path.stem))
+    if not paths:
+        raise FileNotFoundError(f'No baselines found in {directory}')
+    return paths[-1]
+
+
+def compare(
+        baseline: dict,
+        current: dict,
+        *,
+        tolerance: float = DEFAULT_TOLERANCE,
+        noise_factor: float = DEFAULT_NOISE_FACTOR,
+        gate: tuple[str, ...] = DEFAULT_GATE,
+) -> list[Comparison]:
+    """
+    Compares the throughput of the benchmarks in both results of
+    :func:`benchmarks.substructures.run`. Benchmarks of the baseline missing
+    from the current results are compared as missing.
+
+    :param baseline: The baseline results
+    :param current: The current results
+    :param tolerance: The smallest relative fall in throughput that is a
+        regression
+    :param noise_factor: The multiple of the combined relative noise of both
+        results throughput must fall by to be a regression
+    :param gate: fnmatch patterns of the benchmarks whose regressions fail
+        the comparison
+
+    :raises ValueError: If the results were run with different corpora.
+    """
+    for key in _CONFIG_KEYS:
+        if baseline['config'][key] != current['config'][key]:
+            raise ValueError(
+                f"Results have different {key}: "
+                f"{baseline['config'][key]!r} != {current['config'][key]!r}"
+            )
+    comparisons = []
+    for name, before in baseline['benchmarks'].items():
+        gated = any(fnmatch(name, pattern) for pattern in gate)
+        after = current['benchmarks'].get(name)
+        if after is None:
+            comparisons.append(Comparison(
+                name, before['lines_per_s'], None, None, tolerance, gated,
+            ))
+            continue
+        noise = math.hypot(_relative_noise(before), _relative_noise(after))
+        comparisons.append(Comparison(
+            name,
+            before['lines_per_s'],
+            after['lines_per_s'],
+            after['lines_per_s'] / before['lines_per_s'] - 1,
+            max(tolerance, noise_factor * noise),
+            gated,
+        ))
+    return comparisons
+
+
+def _relative_noise(result: dict) -> float:
+    # The median absolute deviation scaled to estimate the standard deviation
+    # of normally distributed times
+    return 1.4826 * result['mad_s'] / result['median_s']
+
+
+def _qchecker_version() -> str:
+    try:
+        return version('qchecker')
+    except PackageNotFoundError:
+        # Benchmarks are run from the repository root
+        config = configparser.ConfigParser()
+        config.read(Path(__file__).parent.parent / 'setup.cfg')
+        return config.get('metadata', 'version', fallback='unknown')
+
+
+def _version_key(name: str) -> tuple:
+    # Development versions (e.g. 1.1.2+dev) sort after their release
+    release, _, local = name.partition('+')
+    return (tuple(int(part) if part.isdigit() else -1
+                  for part in release.split('.')), bool(local))
+
+
+def _machine() -> dict:
+    return {
+        'system': platform.system(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+    }
+
+
+def _print_comparisons(comparisons: list[Comparison]) -> None:
+    for c in comparisons:
+        if c.missing:
+            status = 'MISSING' if c.gated else 'missing'
+            print(f'{c.name:<40} {c.baseline:>12,.0f} -> {"-":>12} lines/s '
+                  f'{status}')
+            continue
+        if c.regressed:
+            status = 'REGRESSED' if c.gated else 'regressed'
+        elif c.improved:
+            status = 'improved'
+        else:
+            status = ''
+        print(f'{c.name:<40} {c.baseline:>12,.0f} -> {c.current:>12,.0f} '
+              f'lines/s {c.change:>+7.1%} (±{c.threshold:.1%}) {status}')
+
+
+def _save(args: argparse.Namespace) -> int:
+    results = substructures.run(
+        tuple(args.sizes), seed=args.seed, repeat=args.repeat,
+    )
+    version = args.version or _qchecker_version()
+    path = args.output or BASELINE_DIRECTORY / f'{version}.json'
+    save_baseline(results, path, version)
+    print(f'Saved baseline to {path}')
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    path = args.baseline or latest_baseline()
+    baseline = load_baseline(path)
+    if baseline['machine'] != _machine():
+        print(f'Warning: {path} was recorded on a different machine',
+              file=sys.stderr)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        config = baseline['results']['config']
+        current = substructures.run(
+            tuple(config['sizes']),
+            seed=config['seed'],
+            density=config['density'],
+            repeat=config['repeat'],
+        )
+    comparisons = compare(
+        baseline['results'],
+        current,
+        tolerance=args.tolerance,
+        noise_factor=args.noise_factor,
+        gate=tuple(args.gate),
+    )
+    if args.json:
+        print(json.dumps([
+            {**asdict(c), 'missing': c.missing, 'regressed': c.regressed,
+             'improved': c.improved}
+            for c in comparisons
+        ], indent=2))
+    else:
+        print(f"Comparing against {path} (qChecker {baseline['qchecker']})")
+        _print_comparisons(comparisons)
+    regressions = [c.name for c in comparisons if c.failed and c.regressed]
+    missing = [c.name for c in comparisons if c.failed and c.missing]
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+    if missing:
+        print(f"{len(missing)} benchmarks missing: {', '.join(missing)}",
+              file=sys.stderr)
+    return 1 if regressions or missing else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(required=True)
+
+    save = commands.add_parser('save', help='record a baseline')
+    save.add_argument('--sizes', type=int, nargs='+', default=BASELINE_SIZES)
+    save.add_argument('--seed', type=int, default=0)
+    save.add_argument('--repeat', type=int, default=BASELINE_REPEAT)
+    save.add_argument('--version',
+                      help='the qChecker version of the tree, defaults to '
+                           'the installed version. Use e.g. 1.1.2+dev for '
+                           'unreleased trees')
+    save.add_argument('--output',
+                      help='the baseline file, defaults to '
+                           'benchmarks/baselines/<version>.json')
+    save.set_defaults(command=_save)
+
+    check = commands.add_parser('compare', help='compare with a baseline')
+    check.add_argument('--baseline',
+                       help='the baseline file, defaults to the latest')
+    check.add_argument('--current',
+                       help='results of benchmarks.substructures saved with '
+                            '--output instead of running the benchmarks')
+    check.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    check.add_argument('--noise-factor', type=float,
+                       default=DEFAULT_NOISE_FACTOR)
+    check.add_argument('--gate', nargs='+', default=DEFAULT_GATE,
+                       help='patterns of the benchmarks that fail the '
+                            'comparison when they regress')
+    check.add_argument('--json', action='store_true',
+                       help='print comparisons as JSON')
+    check.set_defaults(command=_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.command(args))
+
+
+if __name__ == '__main__':
+    main()
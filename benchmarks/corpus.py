@@ -0,0 +1,547 @@
+"""
+A seeded generator of student-style programs for benchmarks.
+
+Programs are made of top level functions, classes with methods, and a main
+block. Function bodies are built from blocks of statements that are either
+ordinary student code or an antipattern matched by a substructure. The
+density of each antipattern is the probability that a block is that
+antipattern, and the same seed always generates the same programs.
+
+Print a generated program with::
+
+    python -m benchmarks.corpus [--lines N] [--seed N] [--density P]
+"""
+
+import argparse
+import random
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+
+__all__ = [
+    'PATTERNS',
+    'TAIL_PATTERNS',
+    'Program',
+    'generate_program',
+    'generate_corpus',
+]
+
+_Block = list[str]
+
+_NAMES = (
+    'x', 'y', 'n', 'count', 'total', 'value', 'score', 'age', 'size', 'mark',
+)
+_SEQUENCES = ('items', 'values', 'marks', 'names', 'scores', 'words')
+_FUNCTIONS = (
+    'process', 'display', 'update', 'check', 'handle', 'record', 'save',
+)
+_VERBS = ('get', 'find', 'calculate', 'count', 'print', 'check', 'is', 'make')
+_NOUNS = (
+    'total', 'average', 'grade', 'even', 'valid', 'max', 'name', 'score',
+    'result', 'items', 'report', 'menu', 'option', 'list',
+)
+_CLASSES = ('Student', 'Course', 'Account', 'Game', 'Board', 'Player', 'Shop')
+
+
+def _condition(rng: random.Random) -> str:
+    name = rng.choice(_NAMES)
+    match rng.randrange(4):
+        case 0:
+            return f'{name} > {rng.randrange(100)}'
+        case 1:
+            return f'{name} % 2 == 0'
+        case 2:
+            return f'{rng.choice(_SEQUENCES)}'
+        case _:
+            return f'{name} in {rng.choice(_SEQUENCES)}'
+
+
+def _call(rng: random.Random) -> str:
+    return f'{rng.choice(_FUNCTIONS)}({rng.choice(_NAMES)})'
+
+
+def _print(rng: random.Random) -> str:
+    name = rng.choice(_NAMES)
+    return f"print('{name} is', {name})"
+
+
+# Ordinary blocks that do not match any substructure
+def _assign(rng: random.Random) -> _Block:
+    a, b = rng.sample(_NAMES, 2)
+    return [f'{a} = {b} * {rng.randrange(2, 10)} - {rng.randrange(1, 10)}']
+
+
+def _call_block(rng: random.Random) -> _Block:
+    return [_call(rng)]
+
+
+def _print_block(rng: random.Random) -> _Block:
+    return [_print(rng)]
+
+
+def _append(rng: random.Random) -> _Block:
+    return [f'{rng.choice(_SEQUENCES)}.append({rng.choice(_NAMES)})']
+
+
+def _input(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f"{name} = int(input('Enter {name}: '))"]
+
+
+def _comment(rng: random.Random) -> _Block:
+    return [f'# {rng.choice(_VERBS)} the {rng.choice(_NOUNS)}']
+
+
+def _if(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    {_call(rng)}',
+        f'    {_print(rng)}',
+    ]
+
+
+def _if_else(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    {_call(rng)}',
+        'else:',
+        f'    {rng.choice(_NAMES)} = {rng.randrange(10)}',
+        f'    {_print(rng)}',
+    ]
+
+
+def _for(rng: random.Random) -> _Block:
+    return [
+        f'for item in {rng.choice(_SEQUENCES)}:',
+        f'    {rng.choice(_FUNCTIONS)}(item)',
+    ]
+
+
+def _while(rng: random.Random) -> _Block:
+    sequence = rng.choice(_SEQUENCES)
+    return [
+        f'while {sequence}:',
+        f'    item = {sequence}.pop()',
+        f'    {rng.choice(_FUNCTIONS)}(item)',
+    ]
+
+
+_CLEAN = (
+    _assign, _assign, _call_block, _print_block, _append, _input, _comment,
+    _if, _if_else, _for, _while,
+)
+
+
+# Blocks matched by each substructure
+def _unnecessary_elif(rng: random.Random) -> _Block:
+    name, limit = rng.choice(_NAMES), rng.randrange(100)
+    return [
+        f'if {name} > {limit}:',
+        f'    {_print(rng)}',
+        f'elif {name} <= {limit}:',
+        f'    {_call(rng)}',
+    ]
+
+
+def _if_else_assign_bool(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        '    found = True',
+        'else:',
+        '    found = False',
+    ]
+
+
+def _empty_if_body(rng: random.Random) -> _Block:
+    return [f'if {_condition(rng)}:', '    pass']
+
+
+def _empty_else_body(rng: random.Random) -> _Block:
+    return [f'if {_condition(rng)}:', f'    {_call(rng)}', 'else:', '    pass']
+
+
+def _nested_if(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    if {_condition(rng)}:',
+        f'        {_call(rng)}',
+    ]
+
+
+def _unnecessary_else(rng: random.Random) -> _Block:
+    line = _print(rng)
+    return [
+        f'if {_condition(rng)}:',
+        f'    {_call(rng)}',
+        f'    {line}',
+        'else:',
+        f'    {line}',
+    ]
+
+
+def _duplicate_if_else_body(rng: random.Random) -> _Block:
+    line = _call(rng)
+    return [f'if {_condition(rng)}:', f'    {line}', 'else:', f'    {line}']
+
+
+def _augmentable_assignment(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'{name} = {name} + {rng.randrange(1, 10)}']
+
+
+def _missed_absolute_value(rng: random.Random) -> _Block:
+    name, limit = rng.choice(_NAMES), rng.randrange(1, 100)
+    return [f'if {name} < {limit} and {name} > -{limit}:', f'    {_call(rng)}']
+
+
+def _repeated_addition(rng: random.Random) -> _Block:
+    a, b = rng.sample(_NAMES, 2)
+    return [f'{a} = {b} + {b} + {b}']
+
+
+def _repeated_multiplication(rng: random.Random) -> _Block:
+    a, b = rng.sample(_NAMES, 2)
+    return [f'{a} = {b} * {b} * {b}']
+
+
+def _redundant_arithmetic(rng: random.Random) -> _Block:
+    a, b = rng.sample(_NAMES, 2)
+    return [f'{a} = {b} + 0']
+
+
+def _redundant_not(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'if not {name} == {rng.randrange(10)}:', f'    {_call(rng)}']
+
+
+def _redundant_comparison(rng: random.Random) -> _Block:
+    return [f'if ({_condition(rng)}) == True:', f'    {_call(rng)}']
+
+
+def _mergeable_equal(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'if {name} == 1 or {name} == 2:', f'    {_call(rng)}']
+
+
+def _redundant_for(rng: random.Random) -> _Block:
+    return ['for i in range(1):', f'    {_call(rng)}']
+
+
+def _no_op(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'{name} = {name}']
+
+
+def _tautology(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'if {name} or not {name}:', f'    {_call(rng)}']
+
+
+def _contradiction(rng: random.Random) -> _Block:
+    name = rng.choice(_NAMES)
+    return [f'if {name} and not {name}:', f'    {_call(rng)}']
+
+
+def _while_as_for(rng: random.Random) -> _Block:
+    return [
+        'i = 0',
+        f'while i < {rng.randrange(2, 20)}:',
+        "    print('step', i)",
+        '    i += 1',
+    ]
+
+
+def _for_with_redundant_indexing(rng: random.Random) -> _Block:
+    sequence = rng.choice(_SEQUENCES)
+    return [
+        f'for i in range(len({sequence})):',
+        f'    print({sequence}[i])',
+    ]
+
+
+def _several_duplicate_if_else_statements(rng: random.Random) -> _Block:
+    first, second = _call(rng), _print(rng)
+    return [
+        f'if {_condition(rng)}:',
+        f'    {rng.choice(_NAMES)} = {rng.randrange(10)}',
+        f'    {first}',
+        f'    {second}',
+        'else:',
+        f'    {rng.choice(_NAMES)} = -{rng.randrange(1, 10)}',
+        f'    {first}',
+        f'    {second}',
+    ]
+
+
+def _duplicate_if_else_statement(rng: random.Random) -> _Block:
+    line = _print(rng)
+    return [
+        f'if {_condition(rng)}:',
+        f'    {rng.choice(_NAMES)} = {rng.randrange(10)}',
+        f'    {line}',
+        'else:',
+        f'    {rng.choice(_NAMES)} = -{rng.randrange(1, 10)}',
+        f'    {line}',
+    ]
+
+
+def _else_if(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    {_call(rng)}',
+        'else:',
+        f'    if {_condition(rng)}:',
+        f'        {_call(rng)}',
+    ]
+
+
+def _confusing_else(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    {_call(rng)}',
+        'else:',
+        f'    if {_condition(rng)}:',
+        f'        {_call(rng)}',
+        '    else:',
+        f'        {_print(rng)}',
+    ]
+
+
+# Blocks ending a function, matched by each substructure
+def _if_else_return_bool(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        '    return True',
+        'else:',
+        '    return False',
+    ]
+
+
+def _if_return_bool(rng: random.Random) -> _Block:
+    return [f'if {_condition(rng)}:', '    return True', 'return False']
+
+
+def _if_else_assign_bool_return(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        '    result = True',
+        'else:',
+        '    result = False',
+        'return result',
+    ]
+
+
+def _if_else_assign_return(rng: random.Random) -> _Block:
+    return [
+        f'if {_condition(rng)}:',
+        f'    result = {rng.choice(_NAMES)}',
+        'else:',
+        f'    result = {rng.choice(_NAMES)}',
+        'return result',
+    ]
+
+
+def _return(rng: random.Random) -> _Block:
+    return [f'return {rng.choice(_NAMES)}']
+
+
+PATTERNS: dict[str, Callable[[random.Random], _Block]] = {
+    'UnnecessaryElif': _unnecessary_elif,
+    'IfElseAssignBool': _if_else_assign_bool,
+    'EmptyIfBody': _empty_if_body,
+    'EmptyElseBody': _empty_else_body,
+    'NestedIf': _nested_if,
+    'UnnecessaryElse': _unnecessary_else,
+    'DuplicateIfElseBody': _duplicate_if_else_body,
+    'AugmentableAssignment': _augmentable_assignment,
+    'MissedAbsoluteValue': _missed_absolute_value,
+    'RepeatedAddition': _repeated_addition,
+    'RepeatedMultiplication': _repeated_multiplication,
+    'RedundantArithmetic': _redundant_arithmetic,
+    'RedundantNot': _redundant_not,
+    'RedundantComparison': _redundant_comparison,
+    'MergeableEqual': _mergeable_equal,
+    'RedundantFor': _redundant_for,
+    'NoOp': _no_op,
+    'Tautology': _tautology,
+    'Contradiction': _contradiction,
+    'WhileAsFor': _while_as_for,
+    'ForWithRedundantIndexing': _for_with_redundant_indexing,
+    'SeveralDuplicateIfElseStatements': _several_duplicate_if_else_statements,
+    'DuplicateIfElseStatement': _duplicate_if_else_statement,
+    'ElseIf': _else_if,
+    'ConfusingElse': _confusing_else,
+}
+"""Generators of blocks matched by each substructure, keyed by class name"""
+
+TAIL_PATTERNS: dict[str, Callable[[random.Random], _Block]] = {
+    'IfElseReturnBool': _if_else_return_bool,
+    'IfReturnBool': _if_return_bool,
+    'IfElseAssignBoolReturn': _if_else_assign_bool_return,
+    'IfElseAssignReturn': _if_else_assign_return,
+}
+"""Generators of blocks that end a function, keyed by class name"""
+
+
+@dataclass(frozen=True, slots=True)
+class Program:
+    """
+    A generated program.
+
+    Defines the following instance variables:
+    - **name**: A unique name for the program
+    - **code**: The source code
+    - **lines**: The number of lines of code
+    """
+    name: str
+    code: str
+    lines: int
+
+
+def generate_program(
+        lines: int,
+        *,
+        seed: int = 0,
+        density: float = 0.1,
+        densities: Mapping[str, float] = None,
+) -> str:
+    """
+    Returns a program of about the given number of lines. Programs are at
+    least as long as requested and may be a few lines longer.
+
+    :param lines: The number of lines to generate
+    :param seed: The seed of the random number generator
+    :param density: The probability that a block is one of the
+        antipatterns, which are equally likely
+    :param densities: The probability that a block is each antipattern,
+        keyed by substructure class name. Overrides density
+
+    :raises ValueError: If the densities are not known antipatterns or sum
+        to more than 1
+    """
+    rng = random.Random(seed)
+    if densities is None:
+        each = density / (len(PATTERNS) + len(TAIL_PATTERNS))
+        densities = dict.fromkeys([*PATTERNS, *TAIL_PATTERNS], each)
+    unknown = set(densities) - set(PATTERNS) - set(TAIL_PATTERNS)
+    if unknown:
+        raise ValueError(f'Unknown antipatterns: {sorted(unknown)}')
+    if sum(densities.values()) > 1:
+        raise ValueError('Densities must sum to at most 1')
+    patterns = [(name, p) for name, p in densities.items() if p > 0]
+
+    output = []
+    functions = 0
+    while len(output) < lines:
+        if rng.random() < 0.2:
+            output += _class(rng, patterns, functions)
+        else:
+            name = f'{_function_name(rng)}_{functions}'
+            output += _function(rng, patterns, name)
+        output.append('')
+        functions += 1
+    output += ['', "if __name__ == '__main__':", f'    {_call(rng)}']
+    return '\n'.join(output) + '\n'
+
+
+def generate_corpus(
+        sizes: Iterable[int] = (10, 100, 1000, 10000),
+        *,
+        per_size: int = 1,
+        seed: int = 0,
+        density: float = 0.1,
+        densities: Mapping[str, float] = None,
+) -> list[Program]:
+    """
+    Returns programs of each of the given sizes. Each program is generated
+    from its own seed, drawn from the given seed.
+
+    :param sizes: The number of lines of each program
+    :param per_size: The number of programs of each size
+    :param seed: The seed programs are generated from
+    :param density: See :func:`generate_program`
+    :param densities: See :func:`generate_program`
+    """
+    rng = random.Random(seed)
+    programs = []
+    for size in sizes:
+        for i in range(per_size):
+            code = generate_program(
+                size,
+                seed=rng.getrandbits(64),
+                density=density,
+                densities=densities,
+            )
+            programs.append(Program(
+                f'program_{size}_{i}', code, code.count('\n'),
+            ))
+    return programs
+
+
+def _function_name(rng: random.Random) -> str:
+    return f'{rng.choice(_VERBS)}_{rng.choice(_NOUNS)}'
+
+
+def _function(
+        rng: random.Random,
+        patterns: list[tuple[str, float]],
+        name: str,
+        indent: str = '',
+) -> list[str]:
+    params = ', '.join(rng.sample(_NAMES, rng.randrange(1, 4)))
+    if indent:
+        params = f'self, {params}'
+    output = [f'{indent}def {name}({params}):']
+    for _ in range(rng.randrange(2, 12)):
+        block, ends = _block(rng, patterns)
+        output += (f'{indent}    {line}' for line in block)
+        if ends:
+            return output
+    output.append(f'{indent}    {_return(rng)[0]}')
+    return output
+
+
+def _class(
+        rng: random.Random,
+        patterns: list[tuple[str, float]],
+        number: int,
+) -> list[str]:
+    output = [f'class {rng.choice(_CLASSES)}{number}:']
+    for i in range(rng.randrange(1, 4)):
+        name = f'{_function_name(rng)}_{i}'
+        output += _function(rng, patterns, name, indent='    ')
+        output.append('')
+    return output[:-1]
+
+
+def _block(
+        rng: random.Random,
+        patterns: list[tuple[str, float]],
+) -> tuple[_Block, bool]:
+    """
+    Returns a block of statements and whether it must end the function
+    """
+    r = rng.random()
+    for name, p in patterns:
+        if r < p:
+            if name in TAIL_PATTERNS:
+                return TAIL_PATTERNS[name](rng), True
+            return PATTERNS[name](rng), False
+        r -= p
+    return rng.choice(_CLEAN)(rng), False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--density', type=float, default=0.1)
+    args = parser.parse_args()
+    print(generate_program(args.lines, seed=args.seed, density=args.density),
+          end='')
+
+
+if __name__ == '__main__':
+    main()
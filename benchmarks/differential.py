@@ -0,0 +1,573 @@
+"""
+A differential testing harness checking that accelerated ways of matching
+substructures find exactly the matches of the reference path, i.e. calling
+:meth:`Substructure.iter_matches` of each substructure in turn::
+
+    python -m benchmarks.differential [--engines NAME [NAME ...]]
+        [--corpus N] [--lines N] [--fuzz N] [--mutations N] [--seed N]
+        [--paths PATH [PATH ...]] [--archives PATH [PATH ...]]
+        [--exclude PATTERN [PATTERN ...]] [--json]
+
+Each engine is run over programs generated by :mod:`benchmarks.corpus`, the
+pathological inputs of :mod:`benchmarks.scaling`, real submissions read from
+directories or archives (see :mod:`qchecker.batch`) and, in fuzzing mode,
+programs made by randomly mutating the ASTs of generated programs (e.g.
+swapping the bodies of an :code:`if`, duplicating statements into an
+:code:`else` or replacing constants with booleans) to reach shapes the
+generator does not. The ids and text ranges of the matches found by each
+engine are compared with the reference. Engines that return matches in the
+reference order must also match its order. Each divergence is shrunk by
+deleting statements for as long as the engine still diverges, so it can be
+reproduced from a small program. The command exits with status 1 if any
+engine diverges.
+
+New engines can be compared by adding an :class:`Engine` to
+:data:`ENGINES`.
+"""
+
+import argparse
+import ast
+import copy
+import json
+import os
+import random
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from importlib.util import decode_source
+
+from qchecker.batch import (
+    iter_archive_members,
+    iter_source_paths,
+    read_source,
+)
+from qchecker.cache import MatchCache
+from qchecker.incremental import IncrementalChecker
+from qchecker.match import Match
+from qchecker.parser import CodeModule
+from qchecker.profiling import ProfileStats
+from qchecker.substructures import (
+    ALL_SUBSTRUCTURES,
+    CheckerPlan,
+    Substructure,
+    iter_all_matches,
+)
+
+from . import scaling
+from .corpus import PATTERNS, TAIL_PATTERNS, generate_program
+
+__all__ = [
+    'Engine',
+    'ENGINES',
+    'Divergence',
+    'reference_matches',
+    'compare_engine',
+    'corpus_inputs',
+    'family_inputs',
+    'path_inputs',
+    'archive_inputs',
+    'fuzz_inputs',
+    'mutate',
+    'shrink',
+    'run',
+]
+
+# An id and text range (from_line, from_offset, to_line, to_offset)
+_MatchKey = tuple[str, int, int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class Engine:
+    """
+    An accelerated way of matching substructures.
+
+    Defines the following instance variables:
+    - **name**: The name of the engine
+    - **make**: Returns a function matching the given substructures against
+      a CodeModule
+    - **ordered**: Whether the engine returns matches in the reference
+      order, i.e. by substructure and then in the order each substructure
+      finds them
+    """
+    name: str
+    make: Callable[
+        [tuple[type[Substructure], ...]],
+        Callable[[CodeModule], list[Match]],
+    ]
+    ordered: bool
+
+
+def _plan(substructures):
+    return CheckerPlan(substructures).check
+
+
+def _all_matches(substructures):
+    return lambda code: list(iter_all_matches(code, substructures))
+
+
+def _limited_all_matches(substructures):
+    # Limits large enough to never be reached still match one top level
+    # statement at a time
+    return lambda code: list(iter_all_matches(
+        code, substructures, limit=10 ** 9, limit_per_substructure=10 ** 9,
+    ))
+
+
+def _incremental(substructures):
+    checker = IncrementalChecker(substructures, MatchCache())
+
+    def check(code):
+        # Checked twice so matches served from the cache are compared
+        checker.check(code)
+        return checker.check(code)
+
+    return check
+
+
+def _profiled(substructures):
+    return lambda code: ProfileStats().profile(code, substructures)
+
+
+ENGINES = (
+    Engine('CheckerPlan', _plan, ordered=True),
+    Engine('iter_all_matches', _all_matches, ordered=False),
+    Engine('iter_all_matches_limited', _limited_all_matches, ordered=False),
+    Engine('IncrementalChecker', _incremental, ordered=False),
+    Engine('ProfileStats', _profiled, ordered=True),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Divergence:
+    """
+    A program for which an engine's matches differ from the reference.
+
+    Defines the following instance variables:
+    - **engine**: The name of the engine
+    - **source**: Where the program came from, e.g. the seed it was
+      generated or mutated with
+    - **code**: The program, shrunk to as few statements as still diverge
+    - **missing**: The matches found by the reference but not the engine
+    - **unexpected**: The matches found by the engine but not the reference
+    - **reordered**: Whether an ordered engine found the same matches in a
+      different order
+    - **error**: The exception raised by the engine, or None
+    """
+    engine: str
+    source: str
+    code: str
+    missing: tuple[_MatchKey, ...] = ()
+    unexpected: tuple[_MatchKey, ...] = ()
+    reordered: bool = False
+    error: str | None = None
+
+
+def reference_matches(
+        code: CodeModule,
+        substructures: Iterable[type[Substructure]],
+) -> list[Match]:
+    """Returns the matches of each substructure's iter_matches in turn"""
+    return [m for s in substructures for m in s.iter_matches(code)]
+
+
+def compare_engine(
+        engine: Engine,
+        check: Callable[[CodeModule], list[Match]],
+        code: str,
+        substructures: tuple[type[Substructure], ...],
+        source: str = '',
+) -> Divergence | None:
+    """
+    Returns how the matches found in code by check, a function made by the
+    engine, differ from the reference, or None if they are the same or the
+    reference cannot match the code (e.g. as it cannot be parsed).
+    """
+    try:
+        module = CodeModule(code)
+        expected = list(map(_key, reference_matches(module, substructures)))
+    except (SyntaxError, RecursionError):
+        return None
+    try:
+        found = list(map(_key, check(CodeModule(code))))
+    except Exception as e:
+        return Divergence(engine.name, source, code,
+                          error=f'{type(e).__name__}: {e}')
+    if found == expected:
+        return None
+    missing = Counter(expected) - Counter(found)
+    unexpected = Counter(found) - Counter(expected)
+    if not missing and not unexpected and not engine.ordered:
+        return None
+    return Divergence(
+        engine.name,
+        source,
+        code,
+        tuple(sorted(missing.elements())),
+        tuple(sorted(unexpected.elements())),
+        reordered=not missing and not unexpected,
+    )
+
+
+def corpus_inputs(
+        count: int,
+        lines: int = 100,
+        *,
+        seed: int = 0,
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (source, code) pairs of generated programs. Every other program
+    is dense in a single, randomly chosen antipattern.
+    """
+    rng = random.Random(seed)
+    names = [*PATTERNS, *TAIL_PATTERNS]
+    for i in range(count):
+        program_seed = rng.getrandbits(32)
+        if i % 2:
+            name = rng.choice(names)
+            code = generate_program(lines, seed=program_seed,
+                                    densities={name: 0.5})
+            yield f'corpus seed={program_seed} {name}', code
+        else:
+            code = generate_program(lines, seed=program_seed, density=0.3)
+            yield f'corpus seed={program_seed}', code
+
+
+def family_inputs(size: int = 10) -> Iterator[tuple[str, str]]:
+    """Yields (source, code) pairs of each pathological family"""
+    for family in scaling.FAMILIES:
+        yield f'family {family.name} size={size}', family.generate(size)
+
+
+def path_inputs(
+        *roots: str | os.PathLike,
+        exclude: Iterable[str] = (),
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (source, code) pairs of the Python files in the given files and
+    directories, skipping files that cannot be decoded
+    """
+    for path in iter_source_paths(*roots, exclude=exclude):
+        try:
+            yield str(path), read_source(path)
+        except (OSError, UnicodeDecodeError, SyntaxError):
+            continue
+
+
+def archive_inputs(
+        archive: str | os.PathLike,
+        exclude: Iterable[str] = (),
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (source, code) pairs of the Python files in a zip or tar archive,
+    skipping files that cannot be decoded
+    """
+    for name, data in iter_archive_members(archive, exclude=exclude):
+        try:
+            yield f'{archive}:{name}', decode_source(data)
+        except (UnicodeDecodeError, SyntaxError):
+            continue
+
+
+def fuzz_inputs(
+        count: int,
+        mutations: int = 5,
+        lines: int = 60,
+        *,
+        seed: int = 0,
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (source, code) pairs of generated programs with the given number
+    of random mutations applied to their ASTs
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        program_seed = rng.getrandbits(32)
+        tree = ast.parse(generate_program(lines, seed=program_seed,
+                                          density=0.3))
+        for _ in range(mutations):
+            mutate(tree, rng)
+        code = ast.unparse(tree) + '\n'
+        # ast.unparse writes an if nested in an else as an elif, so some are
+        # unfolded back into the shapes matched by CST substructures
+        for _ in range(mutations):
+            code = _unfold_elif(code, rng)
+        yield f'fuzz seed={program_seed} mutations={mutations}', code
+
+
+def mutate(tree: ast.AST, rng: random.Random) -> bool:
+    """
+    Applies a random mutation to the tree in place. Returns False if no
+    mutation could be applied.
+    """
+    mutations = list(_MUTATIONS)
+    rng.shuffle(mutations)
+    for mutation in mutations:
+        candidates = [node for node in ast.walk(tree)
+                      if isinstance(node, mutation.node_type)
+                      and mutation.applies(node)]
+        if candidates:
+            mutation.apply(rng.choice(candidates), rng)
+            return True
+    return False
+
+
+def _unfold_elif(code: str, rng: random.Random) -> str:
+    """
+    Rewrites a random elif as an if nested in an else, indenting the rest of
+    its chain. Returns the code unchanged if it has no elif.
+    """
+    lines = code.splitlines()
+    elifs = [i for i, line in enumerate(lines)
+             if line.lstrip().startswith('elif ')]
+    if not elifs:
+        return code
+    start = rng.choice(elifs)
+    line = lines[start]
+    indent = line[:len(line) - len(line.lstrip())]
+    unfolded = [f'{indent}else:', f'{indent}    {line.lstrip()[2:]}']
+    end = start + 1
+    while end < len(lines):
+        line = lines[end]
+        depth = len(line) - len(line.lstrip())
+        if line.strip() and (depth < len(indent) or depth == len(indent)
+                             and not line.lstrip().startswith(('elif ',
+                                                               'else:'))):
+            break
+        unfolded.append(f'    {line}' if line.strip() else line)
+        end += 1
+    return '\n'.join([*lines[:start], *unfolded, *lines[end:]]) + '\n'
+
+
+@dataclass(frozen=True, slots=True)
+class _Mutation:
+    node_type: type[ast.AST]
+    applies: Callable[[ast.AST], bool]
+    apply: Callable[[ast.AST, random.Random], None]
+
+
+def _swap_branches(node: ast.If, rng: random.Random) -> None:
+    node.body, node.orelse = node.orelse, node.body
+
+
+def _drop_else(node: ast.If, rng: random.Random) -> None:
+    node.orelse = []
+
+
+def _copy_tail_to_else(node: ast.If, rng: random.Random) -> None:
+    node.orelse = [*node.orelse, copy.deepcopy(node.body[-1])]
+
+
+def _nest_else(node: ast.If, rng: random.Random) -> None:
+    inner = ast.If(ast.Name('x', ast.Load()), node.orelse or [ast.Pass()], [])
+    node.orelse = [inner]
+
+
+def _empty_body(node: ast.If, rng: random.Random) -> None:
+    node.body = [ast.Pass()]
+
+
+def _duplicate_statement(body: list[ast.stmt], rng: random.Random) -> None:
+    i = rng.randrange(len(body))
+    body.insert(i, copy.deepcopy(body[i]))
+
+
+def _delete_statement(body: list[ast.stmt], rng: random.Random) -> None:
+    del body[rng.randrange(len(body))]
+
+
+def _wrap_in_if(body: list[ast.stmt], rng: random.Random) -> None:
+    i = rng.randrange(len(body))
+    body[i] = ast.If(ast.Name('flag', ast.Load()), [body[i]], [])
+
+
+def _statement_lists(node: ast.AST) -> Iterator[list[ast.stmt]]:
+    for field in ('body', 'orelse'):
+        value = getattr(node, field, None)
+        if isinstance(value, list) and value \
+                and isinstance(value[0], ast.stmt):
+            yield value
+
+
+def _on_statements(
+        mutation: Callable[[list[ast.stmt], random.Random], None],
+        minimum: int = 1,
+) -> _Mutation:
+    def applies(node):
+        return any(len(body) >= minimum for body in _statement_lists(node))
+
+    def apply(node, rng):
+        mutation(rng.choice([body for body in _statement_lists(node)
+                             if len(body) >= minimum]), rng)
+
+    return _Mutation(ast.AST, applies, apply)
+
+
+def _to_boolean(node: ast.Constant, rng: random.Random) -> None:
+    node.value = rng.choice([True, False, 0, 1])
+
+
+def _negate_compare(node: ast.Compare, rng: random.Random) -> None:
+    node.ops = [_NEGATED.get(type(op), ast.Eq)() for op in node.ops]
+
+
+def _duplicate_operand(node: ast.BinOp, rng: random.Random) -> None:
+    node.op = rng.choice([ast.Add(), ast.Mult(), ast.Sub()])
+    node.right = copy.deepcopy(node.left)
+
+
+def _compare_to_self(node: ast.Compare, rng: random.Random) -> None:
+    node.comparators = [copy.deepcopy(node.left)]
+    node.ops = [rng.choice([ast.Eq(), ast.NotEq(), ast.Is()])]
+
+
+_NEGATED = {ast.Eq: ast.NotEq, ast.NotEq: ast.Eq, ast.Lt: ast.GtE,
+            ast.GtE: ast.Lt, ast.Gt: ast.LtE, ast.LtE: ast.Gt}
+
+_MUTATIONS = (
+    _Mutation(ast.If, lambda node: bool(node.orelse), _swap_branches),
+    _Mutation(ast.If, lambda node: bool(node.orelse), _drop_else),
+    _Mutation(ast.If, lambda node: True, _copy_tail_to_else),
+    _Mutation(ast.If, lambda node: True, _nest_else),
+    _Mutation(ast.If, lambda node: True, _empty_body),
+    _on_statements(_duplicate_statement),
+    _on_statements(_delete_statement, minimum=2),
+    _on_statements(_wrap_in_if),
+    _Mutation(ast.Constant, lambda node: True, _to_boolean),
+    _Mutation(ast.Compare, lambda node: True, _negate_compare),
+    _Mutation(ast.Compare, lambda node: len(node.ops) == 1,
+              _compare_to_self),
+    _Mutation(ast.BinOp, lambda node: True, _duplicate_operand),
+)
+
+
+def shrink(code: str, diverges: Callable[[str], bool]) -> str:
+    """
+    Returns the smallest program found by repeatedly deleting single
+    statements from code for which diverges still returns True
+    """
+    tree = ast.parse(code)
+    changed = True
+    while changed:
+        changed = False
+        for body in [b for node in ast.walk(tree)
+                     for b in _statement_lists(node)]:
+            i = 0
+            while i < len(body):
+                if len(body) == 1 and isinstance(body[0], ast.Pass):
+                    break
+                statement = body.pop(i)
+                # Bodies cannot be empty
+                placeholder = not body
+                if placeholder:
+                    body.append(ast.Pass())
+                if diverges(ast.unparse(tree) + '\n'):
+                    changed = True
+                    if placeholder:
+                        break
+                    continue
+                if placeholder:
+                    body.pop()
+                body.insert(i, statement)
+                i += 1
+    return ast.unparse(tree) + '\n'
+
+
+def run(
+        inputs: Iterable[tuple[str, str]],
+        *,
+        engines: Iterable[Engine] = ENGINES,
+        substructures: Iterable[type[Substructure]] = ALL_SUBSTRUCTURES,
+        shrink_divergences: bool = True,
+) -> list[Divergence]:
+    """
+    Compares each engine with the reference on each (source, code) input.
+    Returns the divergences found, shrunk unless shrink_divergences is
+    False.
+    """
+    substructures = tuple(substructures)
+    checks = [(engine, engine.make(substructures)) for engine in engines]
+    divergences = []
+    for source, code in inputs:
+        for engine, check in checks:
+            divergence = compare_engine(engine, check, code, substructures,
+                                        source)
+            if divergence is None:
+                continue
+            if shrink_divergences:
+                shrunk = shrink(code, lambda c: compare_engine(
+                    engine, check, c, substructures,
+                ) is not None)
+                divergence = compare_engine(engine, check, shrunk,
+                                            substructures, source)
+            divergences.append(divergence)
+    return divergences
+
+
+def _key(match: Match) -> _MatchKey:
+    r = match.text_range
+    return match.id, r.from_line, r.from_offset, r.to_line, r.to_offset
+
+
+def _print_divergence(divergence: Divergence) -> None:
+    print(f'{divergence.engine} diverges on {divergence.source}:')
+    print('    ' + divergence.code.rstrip().replace('\n', '\n    '))
+    if divergence.error:
+        print(f'  raised {divergence.error}')
+    for key in divergence.missing:
+        print(f'  missing {key}')
+    for key in divergence.unexpected:
+        print(f'  unexpected {key}')
+    if divergence.reordered:
+        print('  matches are out of order')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--engines', nargs='+',
+                        choices=[engine.name for engine in ENGINES],
+                        help='the engines to compare, defaults to all')
+    parser.add_argument('--corpus', type=int, default=50,
+                        help='the number of generated programs')
+    parser.add_argument('--lines', type=int, default=100,
+                        help='the number of lines of generated programs')
+    parser.add_argument('--fuzz', type=int, default=0,
+                        help='the number of mutated programs')
+    parser.add_argument('--mutations', type=int, default=5,
+                        help='the number of mutations of each program')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--paths', nargs='+', default=[],
+                        help='files and directories of submissions to check')
+    parser.add_argument('--archives', nargs='+', default=[],
+                        help='zip or tar archives of submissions to check')
+    parser.add_argument('--exclude', nargs='+', default=[],
+                        help='patterns of submission files to skip')
+    parser.add_argument('--json', action='store_true',
+                        help='print divergences as JSON')
+    args = parser.parse_args()
+    engines = [engine for engine in ENGINES
+               if args.engines is None or engine.name in args.engines]
+    inputs = [
+        *corpus_inputs(args.corpus, args.lines, seed=args.seed),
+        *family_inputs(),
+        *fuzz_inputs(args.fuzz, args.mutations, seed=args.seed),
+        *path_inputs(*args.paths, exclude=args.exclude),
+        *(program for archive in args.archives
+          for program in archive_inputs(archive, args.exclude)),
+    ]
+    divergences = run(inputs, engines=engines)
+    if args.json:
+        print(json.dumps([asdict(d) for d in divergences], indent=2))
+    else:
+        for divergence in divergences:
+            _print_divergence(divergence)
+        print(f'{len(inputs)} programs, {len(engines)} engines, '
+              f'{len(divergences)} divergences')
+    sys.exit(1 if divergences else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the per-call latency of the general checks.
+
+Requires qChecker to be installed with the general_checks extra::
+
+    python -m benchmarks.general_checks [--repeat N] [--json]
+"""
+
+import argparse
+import json
+from textwrap import dedent
+
+from qchecker.general import get_flake8_matches
+
+from ._timing import summarise, time_calls
+
+CODE = dedent('''
+import os
+
+def is_even(x):
+    if x % 2 == 0:
+        return True
+    else:
+        return False
+
+def main():
+    total=0
+    for i in range(10):
+        if is_even(i) == True:
+            total = total + i
+    print(total)
+''').lstrip()
+
+
+def run(repeat: int) -> dict[str, dict[str, float]]:
+    return {
+        'flake8_subprocess': summarise(time_calls(
+            lambda: get_flake8_matches(CODE), repeat,
+        )),
+        'flake8_in_process': summarise(time_calls(
+            lambda: get_flake8_matches(CODE, in_process=True), repeat,
+        )),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    args = parser.parse_args()
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"{name:<24} median {result['median_s'] * 1000:8.2f} ms "
+              f"(min {result['min_s'] * 1000:.2f} ms, "
+              f"{result['calls']} calls)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Measures the memory used to parse a program into a CodeModule, to match
+substructures against it and to retain the matches found, for each program
+size of a generated corpus (see :mod:`benchmarks.corpus`)::
+
+    python -m benchmarks.memory [--sizes N [N ...]] [--seed N]
+        [--density P] [--matches N [N ...]] [--json] [--output PATH]
+
+Memory is traced with :mod:`tracemalloc`. For each step the peak bytes
+allocated while it ran and the bytes still allocated once it finished (i.e.
+retained by its result) are reported. A CodeModule is broken down into the
+source, the AST, the CST and the defensive copy of the CST made by its
+MetadataWrapper. The bytes retained by matching include the metadata cached
+in the CodeModule's MetadataWrapper, and the bytes retained by a CodeModule
+that has been matched and then released are reported. Match lists are
+measured by retaining a number of matches, reporting the bytes retained per
+match.
+
+The default sizes take a few minutes to measure, as tracing allocations
+slows matching the largest program.
+"""
+
+import argparse
+import ast
+import gc
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable
+from itertools import cycle, islice
+
+import libcst
+
+from qchecker.parser import CodeModule
+from qchecker.substructures import SUBSTRUCTURES, CheckerPlan
+
+from .corpus import Program, generate_corpus
+
+__all__ = [
+    'traced',
+    'run',
+]
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_MATCHES = (1000, 10000, 100000)
+
+
+def traced(function: Callable[[], object]) -> tuple[object, int, int]:
+    """
+    Calls function while tracing memory allocations. Returns the result of
+    the call, the peak bytes allocated during the call and the bytes still
+    allocated after it, which are retained by the result. Unreachable cycles
+    are collected before retained bytes are measured.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, retained
+
+
+def run(
+        sizes: tuple[int, ...] = DEFAULT_SIZES,
+        *,
+        seed: int = 0,
+        density: float = 0.1,
+        matches: tuple[int, ...] = DEFAULT_MATCHES,
+) -> dict:
+    corpus = generate_corpus(sizes, seed=seed, density=density)
+    return {
+        'config': {
+            'sizes': list(sizes),
+            'seed': seed,
+            'density': density,
+            'python': sys.version.split()[0],
+        },
+        'programs': {
+            f'size={program.lines}': _program_memory(program)
+            for program in corpus
+        },
+        'matches': _matches_memory(corpus, matches),
+    }
+
+
+def _program_memory(program: Program) -> dict:
+    code = program.code
+    results = {'lines': program.lines, 'source_bytes': sys.getsizeof(code)}
+    _, results['parse/ast'] = _step(lambda: ast.parse(code))
+    cst, results['parse/cst'] = _step(lambda: libcst.parse_module(code))
+    _, results['parse/metadata_wrapper'] = _step(
+        lambda: libcst.MetadataWrapper(cst)
+    )
+    _, results['parse/code_module'] = _step(lambda: CodeModule(code))
+    # Each step matches a new CodeModule as metadata resolved by CST
+    # substructures is cached in, and retained by, the module's wrapper
+    module = CodeModule(code)
+    matches, results['match/SUBSTRUCTURES'] = _step(
+        lambda: [m for s in SUBSTRUCTURES for m in s.iter_matches(module)]
+    )
+    module = CodeModule(code)
+    plan = CheckerPlan(SUBSTRUCTURES)
+    _, results['match/CheckerPlan'] = _step(lambda: plan.check(module))
+    _, results['retain/matches'] = _step(lambda: [
+        type(m)(m.id, m.description, _copy_range(m.text_range))
+        for m in matches
+    ])
+    _, results['retain/released_code_module'] = _step(
+        lambda: _matched_and_released(code)
+    )
+    results['match_count'] = len(matches)
+    return results
+
+
+def _matched_and_released(code: str) -> CodeModule:
+    module = CodeModule(code)
+    for substructure in SUBSTRUCTURES:
+        substructure.list_matches(module)
+    module.release()
+    return module
+
+
+def _matches_memory(corpus: list[Program], counts: tuple[int, ...]) -> dict:
+    """
+    Returns the bytes retained by lists of each number of matches, made by
+    repeating the matches found in the corpus
+    """
+    found = []
+    for program in corpus:
+        module = CodeModule(program.code)
+        for substructure in SUBSTRUCTURES:
+            found += substructure.iter_matches(module)
+    if not found:
+        return {}
+    results = {}
+    for count in counts:
+        # Ranges are copied as matches from different submissions don't
+        # share them, while ids and descriptions are shared class attributes
+        _, result = _step(lambda: [
+            type(m)(m.id, m.description, _copy_range(m.text_range))
+            for m in islice(cycle(found), count)
+        ])
+        result['bytes_per_match'] = result['retained_bytes'] / count
+        results[f'matches={count}'] = result
+    return results
+
+
+def _copy_range(text_range):
+    return type(text_range)(
+        text_range.from_line,
+        text_range.from_offset,
+        text_range.to_line,
+        text_range.to_offset,
+    )
+
+
+def _step(function: Callable[[], object]) -> tuple[object, dict[str, int]]:
+    result, peak, retained = traced(function)
+    return result, {'peak_bytes': peak, 'retained_bytes': retained}
+
+
+def _print_results(results: dict) -> None:
+    for size, program in results['programs'].items():
+        print(f"{size} ({program['source_bytes'] / 2 ** 10:,.1f} KiB of "
+              f"source, {program['match_count']} matches)")
+        for name, step in program.items():
+            if isinstance(step, dict):
+                print(f"  {name:<28} "
+                      f"peak {step['peak_bytes'] / 2 ** 10:>11,.1f} KiB  "
+                      f"retained {step['retained_bytes'] / 2 ** 10:>11,.1f}"
+                      f" KiB")
+    for name, result in results['matches'].items():
+        print(f"{name:<30} retained "
+              f"{result['retained_bytes'] / 2 ** 10:>11,.1f} KiB "
+              f"({result['bytes_per_match']:.0f} bytes per match)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=DEFAULT_SIZES,
+                        help='the number of lines of each program')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--density', type=float, default=0.1,
+                        help='the probability that a block is an antipattern')
+    parser.add_argument('--matches', type=int, nargs='+',
+                        default=DEFAULT_MATCHES,
+                        help='the lengths of the match lists to measure')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    parser.add_argument('--output', help='write results as JSON to a file')
+    args = parser.parse_args()
+    results = run(
+        tuple(args.sizes),
+        seed=args.seed,
+        density=args.density,
+        matches=tuple(args.matches),
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+Measures how the time taken to parse and match substructures grows with the
+size of pathological inputs, e.g. long chains of :code:`+` for
+RepeatedAddition, deep :code:`if/elif` ladders for UnnecessaryElse and long
+boolean chains for Tautology::
+
+    python -m benchmarks.scaling [--families NAME [NAME ...]]
+        [--sizes N [N ...]] [--repeat N] [--threshold K] [--json]
+        [--output PATH]
+
+Each family of inputs is generated at increasing sizes and a power law
+:code:`time = c * size ** k` is fitted to the times of each substructure.
+Substructures whose exponent k exceeds the threshold are flagged as
+super-linear. Parsing or matching that fails (e.g. with a RecursionError)
+is reported for the size it failed at and larger sizes are skipped.
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from qchecker import substructures
+from qchecker.parser import CodeModule
+
+from ._timing import summarise, time_per_call
+
+__all__ = [
+    'Family',
+    'FAMILIES',
+    'fit_exponent',
+    'run',
+]
+
+DEFAULT_THRESHOLD = 1.25
+
+# The name results of parsing are reported under
+_PARSE = 'CodeModule'
+
+
+@dataclass(frozen=True, slots=True)
+class Family:
+    """
+    A family of pathological inputs.
+
+    Defines the following instance variables:
+    - **name**: The name of the family
+    - **description**: What the size of an input is
+    - **generate**: Returns the code of an input of the given size
+    - **substructures**: The names of the substructures to time
+    - **sizes**: The sizes timed by default
+    """
+    name: str
+    description: str
+    generate: Callable[[int], str]
+    substructures: tuple[str, ...]
+    sizes: tuple[int, ...] = (25, 50, 100, 200, 400, 800)
+
+
+def _addition_chain(size: int) -> str:
+    terms = ' + '.join('a' if i % 2 else f'b[{i}]' for i in range(size))
+    return f'def total(a, b):\n    return {terms}\n'
+
+
+def _elif_ladder(size: int) -> str:
+    lines = ['def grade(mark):', '    if mark == 0:', '        return 0']
+    for i in range(1, size):
+        lines += [f'    elif mark == {i}:', f'        return {i}']
+    lines += ['    else:', '        return -1']
+    return '\n'.join(lines) + '\n'
+
+
+def _else_ladder(size: int) -> str:
+    lines = ['def grade(mark):']
+    for i in range(size):
+        indent = '    ' * (2 * i + 1)
+        lines += [f'{indent}if mark == {i}:',
+                  f'{indent}    return {i}',
+                  f'{indent}else:']
+    lines.append('    ' * (2 * size + 1) + 'return -1')
+    return '\n'.join(lines) + '\n'
+
+
+def _bool_chain(size: int) -> str:
+    terms = ' or '.join(f'x == {i}' for i in range(size))
+    return f'def check(x):\n    return {terms}\n'
+
+
+def _nested_bool(size: int) -> str:
+    expression = 'x'
+    for i in range(size):
+        op = 'or' if i % 2 else 'and'
+        expression = f'(not y{i} {op} {expression})'
+    return f'def check(x):\n    return {expression}\n'
+
+
+def _no_op_statements(size: int) -> str:
+    lines = ['def update(x):']
+    lines += [f'    x{i} = x{i}' for i in range(size)]
+    return '\n'.join(lines) + '\n'
+
+
+def _if_else_assign(size: int) -> str:
+    lines = ['def check(x):']
+    for i in range(size):
+        lines += [f'    if x > {i}:',
+                  f'        flag{i} = True',
+                  '    else:',
+                  f'        flag{i} = False']
+    return '\n'.join(lines) + '\n'
+
+
+FAMILIES = (
+    Family(
+        'addition_chain',
+        'terms in one chain of +',
+        _addition_chain,
+        ('RepeatedAddition', 'RepeatedMultiplication', 'RedundantArithmetic'),
+    ),
+    Family(
+        'elif_ladder',
+        'branches of one if/elif/else',
+        _elif_ladder,
+        ('UnnecessaryElse', 'ConfusingElse', 'UnnecessaryElif',
+         'DuplicateIfElseBody', 'IfElseReturnBool'),
+    ),
+    Family(
+        'else_ladder',
+        'if/else nested in the else of the last',
+        _else_ladder,
+        ('UnnecessaryElse', 'ConfusingElse', 'NestedIf'),
+        # Python allows at most 100 levels of indentation
+        (3, 6, 12, 24, 48),
+    ),
+    Family(
+        'bool_chain',
+        'comparisons in one chain of or',
+        _bool_chain,
+        ('Tautology', 'Contradiction', 'MergeableEqual',
+         'MissedAbsoluteValue'),
+    ),
+    Family(
+        'nested_bool',
+        'levels of nested, parenthesised and/or',
+        _nested_bool,
+        ('Tautology', 'Contradiction', 'RedundantNot'),
+        # Python allows at most 200 levels of nested parentheses
+        (6, 12, 25, 50, 100, 190),
+    ),
+    Family(
+        'no_op_statements',
+        'x = x statements in one function',
+        _no_op_statements,
+        ('NoOp',),
+    ),
+    Family(
+        'if_else_assign',
+        'if/else blocks assigning a bool in one function',
+        _if_else_assign,
+        ('IfElseAssignBool', 'IfElseAssignReturn', 'IfElseAssignBoolReturn'),
+    ),
+)
+
+
+def fit_exponent(sizes: Iterable[int], times: Iterable[float]) -> float:
+    """
+    Returns the exponent k of the power law :code:`time = c * size ** k`
+    fitted to the given times by least squares on a log-log scale.
+
+    :raises ValueError: If fewer than two sizes are given.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(time, 1e-12)) for time in times]
+    if len(xs) != len(ys) or len(xs) < 2:
+        raise ValueError('At least two sizes and times are required')
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return covariance / variance
+
+
+def run(
+        families: Iterable[str] | None = None,
+        *,
+        sizes: tuple[int, ...] | None = None,
+        repeat: int = 3,
+        threshold: float = DEFAULT_THRESHOLD,
+) -> dict:
+    """
+    Times each family at each of its sizes, or the given sizes, and fits the
+    growth of the time taken to parse and match each substructure.
+    """
+    selected = _select_families(families)
+    results = {
+        'config': {
+            'repeat': repeat,
+            'threshold': threshold,
+            'python': sys.version.split()[0],
+            'recursion_limit': sys.getrecursionlimit(),
+        },
+        'families': {},
+        'flagged': [],
+    }
+    for family in selected:
+        family_results = _run_family(family, sizes or family.sizes, repeat)
+        for name, result in family_results['substructures'].items():
+            _fit(result, threshold)
+            if result['super_linear'] or result['errors']:
+                results['flagged'].append(f'{family.name}/{name}')
+        results['families'][family.name] = family_results
+    return results
+
+
+def _select_families(names: Iterable[str] | None) -> list[Family]:
+    if names is None:
+        return list(FAMILIES)
+    by_name = {family.name: family for family in FAMILIES}
+    try:
+        return [by_name[name] for name in names]
+    except KeyError as e:
+        raise ValueError(f'Unknown family {e.args[0]!r}') from None
+
+
+def _run_family(
+        family: Family,
+        sizes: tuple[int, ...],
+        repeat: int,
+) -> dict:
+    names = (_PARSE, *family.substructures)
+    results = {name: {'sizes': [], 'median_s': [], 'errors': {}}
+               for name in names}
+    failed = set()
+    for size in sizes:
+        code = family.generate(size)
+        timed = {_PARSE: lambda: CodeModule(code)}
+        try:
+            module = CodeModule(code)
+        except (RecursionError, SyntaxError) as e:
+            results[_PARSE]['errors'][size] = type(e).__name__
+            break
+        for name in family.substructures:
+            substructure = getattr(substructures, name)
+            timed[name] = (
+                lambda substructure=substructure:
+                substructure.list_matches(module)
+            )
+        for name, function in timed.items():
+            if name in failed:
+                continue
+            try:
+                summary = summarise(time_per_call(function, repeat))
+            except RecursionError as e:
+                results[name]['errors'][size] = type(e).__name__
+                failed.add(name)
+                continue
+            results[name]['sizes'].append(size)
+            results[name]['median_s'].append(summary['median_s'])
+    return {
+        'description': family.description,
+        'substructures': results,
+    }
+
+
+def _fit(result: dict, threshold: float) -> None:
+    if len(result['sizes']) >= 2:
+        exponent = fit_exponent(result['sizes'], result['median_s'])
+    else:
+        exponent = None
+    result['exponent'] = exponent
+    result['super_linear'] = exponent is not None and exponent > threshold
+
+
+def _print_results(results: dict) -> None:
+    for family_name, family in results['families'].items():
+        print(f"{family_name} (size = {family['description']})")
+        for name, result in family['substructures'].items():
+            exponent = result['exponent']
+            fitted = f'n^{exponent:.2f}' if exponent is not None else '-'
+            flag = ' SUPER-LINEAR' if result['super_linear'] else ''
+            errors = ''.join(f' {error} at n={size}'
+                             for size, error in result['errors'].items())
+            largest = (f"{result['median_s'][-1] * 1000:.2f} ms at "
+                       f"n={result['sizes'][-1]}" if result['sizes'] else '')
+            print(f'  {name:<24} {fitted:>8}  {largest:<24}{flag}{errors}')
+    if results['flagged']:
+        print('flagged: ' + ', '.join(results['flagged']))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--families', nargs='+',
+                        choices=[family.name for family in FAMILIES],
+                        help='the families to time, defaults to all')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        help="the sizes to time instead of each family's")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='the exponent above which growth is flagged')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    parser.add_argument('--output', help='write results as JSON to a file')
+    args = parser.parse_args()
+    results = run(
+        args.families,
+        sizes=tuple(args.sizes) if args.sizes else None,
+        repeat=args.repeat,
+        threshold=args.threshold,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Measures the throughput of matching substructures against a generated corpus
+of student-style programs (see :mod:`benchmarks.corpus`), the time taken to
+parse the corpus into ASTs and CSTs, and the memory used to parse and match
+each program size::
+
+    python -m benchmarks.substructures [--sizes N [N ...]] [--seed N]
+        [--density P] [--repeat N] [--json] [--output PATH]
+
+Throughput is reported in lines of code per second. Times are taken over the
+whole corpus, and the median of repeated runs is used. The default corpus
+takes several minutes to benchmark, most of which is spent on the largest
+program.
+"""
+
+import argparse
+import ast
+import json
+import platform
+import sys
+import tracemalloc
+from collections.abc import Callable
+from importlib.metadata import version
+
+import libcst
+
+from qchecker.parser import CodeModule
+from qchecker.substructures import SUBSTRUCTURES, CheckerPlan
+
+from ._timing import summarise, time_calls
+from .corpus import Program, generate_corpus
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+def run(
+        sizes: tuple[int, ...] = DEFAULT_SIZES,
+        *,
+        seed: int = 0,
+        density: float = 0.1,
+        repeat: int = 3,
+) -> dict:
+    corpus = generate_corpus(sizes, seed=seed, density=density)
+    lines = sum(program.lines for program in corpus)
+    modules = [CodeModule(program.code) for program in corpus]
+    benchmarks = {}
+    for program in corpus:
+        size = f'size={program.lines}'
+        benchmarks[f'parse/ast/{size}'] = _throughput(
+            lambda: ast.parse(program.code), program.lines, repeat,
+        )
+        benchmarks[f'parse/cst/{size}'] = _throughput(
+            lambda: libcst.MetadataWrapper(libcst.parse_module(program.code)),
+            program.lines,
+            repeat,
+        )
+        benchmarks[f'parse/code_module/{size}'] = _throughput(
+            lambda: CodeModule(program.code), program.lines, repeat,
+        )
+    for substructure in SUBSTRUCTURES:
+        benchmarks[f'match/{substructure.__name__}'] = _throughput(
+            lambda: [substructure.list_matches(m) for m in modules],
+            lines,
+            repeat,
+        )
+    benchmarks['match/SUBSTRUCTURES'] = _throughput(
+        lambda: [s.list_matches(m) for m in modules for s in SUBSTRUCTURES],
+        lines,
+        repeat,
+    )
+    plan = CheckerPlan(SUBSTRUCTURES)
+    benchmarks['match/CheckerPlan'] = _throughput(
+        lambda: [plan.check(m) for m in modules], lines, repeat,
+    )
+    return {
+        'config': {
+            'sizes': list(sizes),
+            'seed': seed,
+            'density': density,
+            'repeat': repeat,
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'libcst': version('libcst'),
+        },
+        'corpus': {
+            'programs': len(corpus),
+            'lines': lines,
+            'matches': sum(len(plan.check(m)) for m in modules),
+        },
+        'benchmarks': benchmarks,
+        'memory': {
+            f'size={program.lines}': _memory(program) for program in corpus
+        },
+    }
+
+
+def _throughput(
+        function: Callable[[], object],
+        lines: int,
+        repeat: int,
+) -> dict[str, float]:
+    summary = summarise(time_calls(function, repeat))
+    summary['lines_per_s'] = lines / summary['median_s']
+    return summary
+
+
+def _memory(program: Program) -> dict[str, int]:
+    """
+    Returns the peak bytes allocated while parsing and while matching the
+    program, and the bytes retained by the parsed CodeModule
+    """
+    tracemalloc.start()
+    try:
+        module = CodeModule(program.code)
+        retained, parse_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for substructure in SUBSTRUCTURES:
+            substructure.list_matches(module)
+        _, match_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'parse_peak_bytes': parse_peak,
+        'code_module_retained_bytes': retained,
+        'match_peak_bytes': match_peak - retained,
+    }
+
+
+def _print_results(results: dict) -> None:
+    corpus = results['corpus']
+    print(f"{corpus['programs']} programs, {corpus['lines']} lines, "
+          f"{corpus['matches']} matches")
+    for name, result in results['benchmarks'].items():
+        print(f"{name:<48} {result['lines_per_s']:>12,.0f} lines/s "
+              f"(median {result['median_s'] * 1000:.2f} ms)")
+    for size, memory in results['memory'].items():
+        print(f"memory/{size:<41} "
+              f"parse peak {memory['parse_peak_bytes'] / 2 ** 20:.1f} MiB, "
+              f"retained {memory['code_module_retained_bytes'] / 2 ** 20:.1f}"
+              f" MiB, match peak {memory['match_peak_bytes'] / 2 ** 20:.1f}"
+              f" MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=DEFAULT_SIZES,
+                        help='the number of lines of each program')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--density', type=float, default=0.1,
+                        help='the probability that a block is an antipattern')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    parser.add_argument('--output', help='write results as JSON to a file')
+    args = parser.parse_args()
+    results = run(
+        tuple(args.sizes),
+        seed=args.seed,
+        density=args.density,
+        repeat=args.repeat,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+Checks many submissions at once.
+
+Allows directory trees of source files, or zip and tar archives of
+submissions, to be checked for substructures in a pool of worker processes.
+Long running batches can be checkpointed and resumed with :func:`run_batch`.
+"""
+
+__all__ = [
+    'FileMatches',
+    'iter_source_paths',
+    'read_source',
+    'check_project',
+    'aggregate_file_matches',
+    'aggregate_file_stats',
+    'iter_archive_members',
+    'check_archive',
+    'run_batch',
+]
+
+from ._project import *
+from ._archive import *
+from ._checkpoint import *
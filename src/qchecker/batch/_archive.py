@@ -0,0 +1,137 @@
+import os
+import tarfile
+import zipfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import BinaryIO
+
+from qchecker.substructures import Substructure
+
+from ._project import FileMatches, _check_source, _matches_patterns
+
+__all__ = ['iter_archive_members', 'check_archive']
+
+
+def iter_archive_members(
+        archive: str | os.PathLike | BinaryIO,
+        include: Iterable[str] = ('*.py',),
+        exclude: Iterable[str] = (),
+) -> Iterator[tuple[str, bytes]]:
+    """
+    Iterates over the names and contents of files in a zip or tar archive
+    (optionally compressed) without extracting them to disk. Tar archives
+    are read as a stream. Patterns are matched with :func:`fnmatch.fnmatch`
+    against member names.
+
+    :param archive: The archive path or binary file object
+    :param include: Patterns of members to include
+    :param exclude: Patterns of members to exclude
+
+    :raises ValueError: If the archive is not a zip or tar archive
+    """
+    include = tuple(include)
+    exclude = tuple(exclude)
+    if _is_zipfile(archive):
+        yield from _iter_zip_members(archive, include, exclude)
+    else:
+        yield from _iter_tar_members(archive, include, exclude)
+
+
+def check_archive(
+        archive: str | os.PathLike | BinaryIO,
+        substructures: Iterable[type[Substructure]],
+        *,
+        include: Iterable[str] = ('*.py',),
+        exclude: Iterable[str] = (),
+        workers: int = None,
+        max_pending: int = None,
+        profile: bool = False,
+) -> Iterator[FileMatches]:
+    """
+    Checks each matching archive member for the given substructures in a pool
+    of worker processes. Members are read from the archive as they are
+    dispatched and results are yielded as they complete. The path of each
+    result is the archive member name.
+
+    :param archive: The archive path or binary file object
+    :param substructures: The substructures to match
+    :param include: Patterns of members to include
+    :param exclude: Patterns of members to exclude
+    :param workers: The number of worker processes. Defaults to the number
+        of CPUs. If 1, members are checked in the current process
+    :param max_pending: The maximum number of members read from the archive
+        but not yet checked. Defaults to four per worker
+    :param profile: Whether to record the profiling statistics of each
+        member. Statistics can be combined with :func:`aggregate_file_stats`
+
+    :raises ValueError: If the archive is not a zip or tar archive
+    """
+    substructures = tuple(substructures)
+    members = iter_archive_members(archive, include, exclude)
+    if workers == 1:
+        yield from (_check_source(name, data, substructures, profile)
+                    for name, data in members)
+        return
+    if max_pending is None:
+        max_pending = 4 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        for name, data in members:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+            pending.add(executor.submit(
+                _check_source, name, data, substructures, profile,
+            ))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (future.result() for future in done)
+
+
+def _is_zipfile(archive: str | os.PathLike | BinaryIO) -> bool:
+    if isinstance(archive, (str, os.PathLike)):
+        return zipfile.is_zipfile(archive)
+    # Zip files are read from their end, streams can only be tar archives
+    if not archive.seekable():
+        return False
+    position = archive.tell()
+    try:
+        return zipfile.is_zipfile(archive)
+    finally:
+        archive.seek(position)
+
+
+def _iter_zip_members(
+        archive: str | os.PathLike | BinaryIO,
+        include: tuple[str, ...],
+        exclude: tuple[str, ...],
+) -> Iterator[tuple[str, bytes]]:
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if (
+                    not info.is_dir()
+                    and _matches_patterns(info.filename, include, exclude)
+            ):
+                yield info.filename, zf.read(info)
+
+
+def _iter_tar_members(
+        archive: str | os.PathLike | BinaryIO,
+        include: tuple[str, ...],
+        exclude: tuple[str, ...],
+) -> Iterator[tuple[str, bytes]]:
+    if isinstance(archive, (str, os.PathLike)):
+        with open(archive, 'rb') as f:
+            yield from _iter_tar_members(f, include, exclude)
+        return
+    try:
+        tf = tarfile.open(fileobj=archive, mode='r|*')
+    except tarfile.TarError as e:
+        raise ValueError('Archive is not a zip or tar archive') from e
+    with tf:
+        for info in tf:
+            if (
+                    info.isfile()
+                    and _matches_patterns(info.name, include, exclude)
+            ):
+                yield info.name, tf.extractfile(info).read()
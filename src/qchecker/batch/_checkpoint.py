@@ -0,0 +1,158 @@
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import TextIO
+
+from qchecker.substructures import Substructure
+
+from ._project import FileMatches, _check_source
+
+__all__ = ['run_batch']
+
+
+def run_batch(
+        sources: Iterable[tuple[str, bytes]],
+        substructures: Iterable[type[Substructure]],
+        output_path: str | os.PathLike,
+        checkpoint_path: str | os.PathLike,
+        *,
+        workers: int = None,
+        checkpoint_every: int = 100,
+) -> None:
+    """
+    Checks each source for the given substructures, writing one JSON line
+    per source to the output file in the order sources are given.
+
+    After every checkpoint_every sources, the output is flushed to disk and
+    the IDs of the sources checked since the last checkpoint and the size of
+    the output are appended to the checkpoint file, so each checkpoint only
+    writes its own sources. If a run is stopped, rerunning it with the same
+    arguments truncates the output to the last checkpoint, compacts the
+    checkpoint file and skips sources that were already checked. The final
+    output is identical to that of an uninterrupted run provided sources are
+    given in the same order.
+
+    For example, to check a directory of submissions::
+
+        paths = iter_source_paths('submissions')
+        sources = ((str(p), p.read_bytes()) for p in paths)
+        run_batch(sources, SUBSTRUCTURES, 'out.jsonl', 'out.checkpoint')
+
+    Or the members of an archive::
+
+        sources = iter_archive_members('submissions.zip')
+        run_batch(sources, SUBSTRUCTURES, 'out.jsonl', 'out.checkpoint')
+
+    :param sources: Pairs of unique source IDs and source code
+    :param substructures: The substructures to match
+    :param output_path: The JSON lines file results are written to
+    :param checkpoint_path: The file checkpoints are written to
+    :param workers: The number of worker processes. Defaults to the number
+        of CPUs. If 1, sources are checked in the current process
+    :param checkpoint_every: The number of sources checked between
+        checkpoints
+    """
+    substructures = tuple(substructures)
+    processed, offset = _load_checkpoint(checkpoint_path)
+    _compact_checkpoint(checkpoint_path, processed, offset)
+    sources = ((name, data) for name, data in sources
+               if name not in processed)
+
+    executor = ProcessPoolExecutor(workers) if workers != 1 else None
+    map_ = executor.map if executor is not None else map
+    mode = 'r+b' if os.path.exists(output_path) else 'wb'
+    try:
+        with (open(output_path, mode) as output,
+              open(checkpoint_path, 'a') as checkpoint):
+            output.truncate(offset)
+            output.seek(offset)
+            while chunk := list(islice(sources, checkpoint_every)):
+                names, data = zip(*chunk)
+                for result in map_(
+                        _check_source, names, data, repeat(substructures)
+                ):
+                    output.write(_serialise(result))
+                output.flush()
+                os.fsync(output.fileno())
+                _append_checkpoint(checkpoint, names, output.tell())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _serialise(result: FileMatches) -> bytes:
+    line = json.dumps(
+        {
+            'path': result.path,
+            'error': result.error,
+            'matches': [
+                {
+                    'id': match.id,
+                    'text_range': [
+                        match.text_range.from_line,
+                        match.text_range.from_offset,
+                        match.text_range.to_line,
+                        match.text_range.to_offset,
+                    ],
+                }
+                for match in result.matches
+            ],
+        },
+        separators=(',', ':'),
+    )
+    return f'{line}\n'.encode()
+
+
+def _load_checkpoint(
+        checkpoint_path: str | os.PathLike,
+) -> tuple[set[str], int]:
+    """
+    Returns the IDs of the sources checked by all complete checkpoints in
+    the log and the size of the output at the last of them
+    """
+    processed = set()
+    offset = 0
+    try:
+        with open(checkpoint_path) as f:
+            for line in f:
+                try:
+                    checkpoint = json.loads(line)
+                except json.JSONDecodeError:
+                    # A checkpoint only partially appended before a crash
+                    break
+                processed.update(checkpoint['processed'])
+                offset = checkpoint['offset']
+    except FileNotFoundError:
+        pass
+    return processed, offset
+
+
+def _compact_checkpoint(
+        checkpoint_path: str | os.PathLike,
+        processed: set[str],
+        offset: int,
+) -> None:
+    """
+    Replaces the checkpoint log with a single checkpoint, dropping any
+    partially appended checkpoint
+    """
+    # Written to a temporary file first so a crash never leaves a partially
+    # written checkpoint behind
+    temp_path = f'{checkpoint_path}.tmp'
+    with open(temp_path, 'w') as f:
+        if processed:
+            _append_checkpoint(f, processed, offset)
+    os.replace(temp_path, checkpoint_path)
+
+
+def _append_checkpoint(
+        checkpoint: TextIO,
+        names: Iterable[str],
+        offset: int,
+) -> None:
+    line = json.dumps({'processed': sorted(names), 'offset': offset})
+    checkpoint.write(f'{line}\n')
+    checkpoint.flush()
+    os.fsync(checkpoint.fileno())
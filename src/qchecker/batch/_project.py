@@ -0,0 +1,224 @@
+import mmap
+import os
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from importlib.util import decode_source
+from itertools import chain
+from pathlib import Path
+
+from qchecker.match import Match, aggregate_match_types
+from qchecker.parser import CodeModule
+from qchecker.profiling import ProfileStats
+from qchecker.substructures import Substructure
+
+__all__ = [
+    'FileMatches',
+    'iter_source_paths',
+    'read_source',
+    'check_project',
+    'aggregate_file_matches',
+    'aggregate_file_stats',
+]
+
+
+@dataclass(frozen=True, slots=True)
+class FileMatches:
+    """
+    The matches found in a single source file.
+
+    Defines the following instance variables:
+    - **path**: The path of the file
+    - **matches**: The matches found in the file
+    - **error**: A message describing why the file could not be checked,
+      or None if it was checked
+    - **stats**: The profiling statistics of matching the file, or None if
+      it was not profiled
+    """
+    path: str
+    matches: list[Match] = field(default_factory=list)
+    error: str | None = None
+    stats: ProfileStats | None = None
+
+
+def iter_source_paths(
+        *roots: str | os.PathLike,
+        include: Iterable[str] = ('*.py',),
+        exclude: Iterable[str] = (),
+) -> Iterator[Path]:
+    """
+    Walks the given files and directories yielding source files in a
+    deterministic order. Patterns are matched with :func:`fnmatch.fnmatch`
+    against the POSIX path of each file relative to the root it was found
+    in. Note that :code:`*` also matches :code:`/` (e.g. :code:`*.py`
+    matches Python files in any subdirectory).
+
+    :param roots: Files or directories to walk
+    :param include: Patterns of files to include
+    :param exclude: Patterns of files to exclude
+    """
+    include = tuple(include)
+    exclude = tuple(exclude)
+    for root in map(Path, roots):
+        if root.is_file():
+            yield root
+            continue
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = Path(directory, filename)
+                relative = path.relative_to(root).as_posix()
+                if _matches_patterns(relative, include, exclude):
+                    yield path
+
+
+def read_source(path: str | os.PathLike, use_mmap: bool = False) -> str:
+    """
+    Reads and decodes a Python source file. Encoding declarations are
+    respected and newlines are normalised.
+
+    :param path: The file to read
+    :param use_mmap: Whether to memory map the file instead of reading it
+        through a buffered file object. This can be faster for large files.
+    """
+    return decode_source(_read_bytes(path, use_mmap))
+
+
+def check_project(
+        paths: Iterable[str | os.PathLike],
+        substructures: Iterable[type[Substructure]],
+        *,
+        workers: int = None,
+        use_mmap: bool = False,
+        profile: bool = False,
+) -> Iterator[FileMatches]:
+    """
+    Checks each file for the given substructures in a pool of worker
+    processes. Files are dispatched largest first to reduce the time spent
+    waiting on the last few files. Results are yielded as they complete.
+
+    For example, to check all Python files in a directory excluding tests::
+
+        paths = iter_source_paths('submissions', exclude=['*test_*.py'])
+        for result in check_project(paths, SUBSTRUCTURES):
+            print(result.path, aggregate_match_types(result.matches))
+
+    :param paths: The source files to check
+    :param substructures: The substructures to match
+    :param workers: The number of worker processes. Defaults to the number
+        of CPUs. If 1, files are checked in the current process
+    :param use_mmap: Whether to memory map files when reading them
+    :param profile: Whether to record the profiling statistics of each file.
+        Statistics can be combined with :func:`aggregate_file_stats`
+    """
+    substructures = tuple(substructures)
+    paths = sorted(map(str, paths), key=_file_size, reverse=True)
+    if workers == 1:
+        yield from (_check_file(p, substructures, use_mmap, profile)
+                    for p in paths)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(
+                _check_file, path, substructures, use_mmap, profile,
+            )
+            for path in paths
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def aggregate_file_matches(results: Iterable[FileMatches]) -> Counter[str]:
+    """Returns a Counter of the match IDs found in all the given files"""
+    return aggregate_match_types(
+        chain.from_iterable(result.matches for result in results)
+    )
+
+
+def aggregate_file_stats(results: Iterable[FileMatches]) -> ProfileStats:
+    """
+    Returns the profiling statistics of all the given files combined. Files
+    that were not profiled are ignored.
+    """
+    stats = ProfileStats()
+    for result in results:
+        if result.stats is not None:
+            stats.merge(result.stats)
+    return stats
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _matches_patterns(
+        name: str,
+        include: tuple[str, ...],
+        exclude: tuple[str, ...],
+) -> bool:
+    return (any(fnmatch(name, p) for p in include)
+            and not any(fnmatch(name, p) for p in exclude))
+
+
+def _read_bytes(path: str | os.PathLike, use_mmap: bool) -> bytes:
+    with open(path, 'rb') as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:]
+        return f.read()
+
+
+def _check_file(
+        path: str,
+        substructures: tuple[type[Substructure], ...],
+        use_mmap: bool,
+        profile: bool = False,
+) -> FileMatches:
+    try:
+        data = _read_bytes(path, use_mmap)
+    except OSError as e:
+        return FileMatches(path, error=str(e))
+    return _check_source(path, data, substructures, profile)
+
+
+def _check_source(
+        name: str,
+        data: bytes,
+        substructures: tuple[type[Substructure], ...],
+        profile: bool = False,
+) -> FileMatches:
+    try:
+        code = decode_source(data)
+    except (UnicodeDecodeError, SyntaxError) as e:
+        return FileMatches(name, error=str(e))
+    return _check_code(name, code, substructures, profile)
+
+
+def _check_code(
+        name: str,
+        code: str,
+        substructures: tuple[type[Substructure], ...],
+        profile: bool = False,
+) -> FileMatches:
+    # Errors other than syntax errors (e.g. a RecursionError for a deeply
+    # nested expression) are also reported for the file instead of ending
+    # the whole run
+    try:
+        module = CodeModule(code)
+        if profile:
+            stats = ProfileStats()
+            return FileMatches(name, stats.profile(module, substructures),
+                               stats=stats)
+        matches = []
+        for substructure in substructures:
+            matches += substructure.iter_matches(module)
+    except SyntaxError as e:
+        return FileMatches(name, error=f'SyntaxError: {e.__cause__ or e}')
+    except Exception as e:
+        return FileMatches(name, error=f'{type(e).__name__}: {e}')
+    return FileMatches(name, matches)
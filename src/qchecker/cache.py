@@ -0,0 +1,202 @@
+"""
+Bounded caches shared between checks of separate submissions.
+
+Many students write the same helper functions (e.g. :code:`is_even`) with
+identical source. The :data:`MATCH_CACHE` stores the matches found in top
+level definitions relative to their first line so identical definitions in
+different submissions only need their matches shifted into place. It is
+used by default by :class:`qchecker.incremental.IncrementalChecker`.
+
+A :class:`ResultCache` can also be given to the general checks in
+:mod:`qchecker.general` which are deterministic for a given source, tool
+version and set of enabled checks.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+__all__ = [
+    'CacheInfo',
+    'LRUCache',
+    'MatchCache',
+    'MATCH_CACHE',
+    'ResultCache',
+]
+
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class CacheInfo:
+    """
+    Statistics of a cache.
+
+    Defines the following instance variables:
+    - **hits**: The number of lookups that found a value
+    - **misses**: The number of lookups that did not find a value
+    - **maxsize**: The maximum number of entries held
+    - **currsize**: The number of entries currently held
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    """
+    A thread safe mapping holding at most maxsize entries. The least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        :param maxsize: The maximum number of entries held
+
+        :raises ValueError: If maxsize is less than one
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value for key if cached, otherwise default"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Caches the value for key, evicting old entries if needed"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries and resets statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the statistics of this cache"""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self.maxsize, len(self._entries),
+            )
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MatchCache(LRUCache):
+    """
+    Caches the matches of a set of substructures in a definition, keyed by
+    the structural hash of the definition and the set of substructures.
+
+    Matches are stored as tuples of (from_line, from_offset, to_line,
+    to_offset) with lines relative to the line before the definition.
+    """
+
+    @staticmethod
+    def key(structural_hash: bytes, substructures: frozenset) -> Hashable:
+        """Returns the cache key for a definition and substructure set"""
+        return structural_hash, substructures
+
+
+MATCH_CACHE = MatchCache()
+"""The default global match cache"""
+
+
+class ResultCache(LRUCache):
+    """
+    Caches the results of general checks in memory and optionally on disk.
+    Values are pickled to one file per key in the given directory so they
+    can be shared between processes and runs.
+
+    Cache statistics count lookups of the in memory cache. Values found on
+    disk are counted as misses and are then held in memory. Clearing the
+    cache does not remove values stored on disk.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 4096,
+            directory: str | os.PathLike = None,
+    ):
+        """
+        :param maxsize: The maximum number of entries held in memory
+        :param directory: The directory values are stored in. If not given,
+            values are only held in memory
+
+        :raises ValueError: If maxsize is less than one
+        """
+        super().__init__(maxsize)
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """
+        Returns the cache key for the given parts, e.g. a tool name, its
+        version, its enabled checks and the source code checked.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            encoded = part.encode('utf-8', 'surrogatepass')
+            digest.update(len(encoded).to_bytes(8, 'little'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns the value for key if cached in memory or on disk, otherwise
+        default
+        """
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.directory is None:
+            return default
+        try:
+            with open(os.path.join(self.directory, key), 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return default
+        super().put(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Caches the value for key in memory and on disk"""
+        super().put(key, value)
+        if self.directory is None:
+            return
+        # Written to a temporary file first so concurrent readers never see
+        # a partially written value
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, os.path.join(self.directory, key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
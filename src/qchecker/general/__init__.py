@@ -7,8 +7,17 @@ e.g. :code:`pip install qchecker[general_checks]`
 """
 
 try:
-    from ._flake8_checks import get_flake8_matches
-    from ._pylint_checks import get_pylint_matches
+    from ._flake8_checks import (
+        AsyncFlake8Pool,
+        Flake8Runner,
+        GeneralCheckResult,
+        get_flake8_matches,
+        get_flake8_matches_async,
+        get_flake8_matches_batch,
+    )
+    from ._pylint_checks import PylintRunner, get_pylint_matches
+    from ._pool import PylintPool, WorkerStats
+    from ._combined import OVERLAPS, CombinedChecker, Overlap
 except ImportError as e:
     raise ImportError(
         "It seems like qchecker was installed without the optional general "
@@ -0,0 +1,50 @@
+import copy
+import functools
+import threading
+
+from astroid import MANAGER
+from astroid._ast import get_parser_module
+from astroid.builder import AstroidBuilder
+from astroid.rebuilder import TreeRebuilder
+
+from qchecker.parser import CodeModule
+
+# astroid's manager and caches are shared by the whole process. Only one
+# astroid module can be built or linted at a time in each process.
+_ASTROID_LOCK = threading.Lock()
+
+# The name astroid modules are built with. Must be a valid module name as
+# pylint checks module names
+_MODULE_NAME = '_code_module'
+
+
+class _TreeRebuilder(TreeRebuilder):
+    # astroid removes docstrings from the bodies of the nodes it rebuilds.
+    # Copies are given so the CodeModule's AST is unchanged
+    def _get_doc(self, node):
+        return super()._get_doc(copy.copy(node))
+
+
+@functools.cache
+def _get_parser_module():
+    return get_parser_module(type_comments=False)
+
+
+def _build_astroid_module(code: CodeModule):
+    """
+    Builds an astroid module from the already parsed AST of the code,
+    instead of parsing the code again. The module is not added to astroid's
+    cache of importable modules.
+    """
+    with _ASTROID_LOCK:
+        rebuilder = _TreeRebuilder(MANAGER, _get_parser_module(), code.code)
+        module = rebuilder.visit_module(code.ast, _MODULE_NAME, '<?>', False)
+        module.file_bytes = code.code.encode('utf-8')
+        try:
+            return AstroidBuilder(MANAGER)._post_build(
+                module, rebuilder, 'utf-8',
+            )
+        finally:
+            # The module must not be importable by or inferred from in
+            # other modules
+            MANAGER.astroid_cache.pop(_MODULE_NAME, None)
@@ -0,0 +1,169 @@
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from qchecker.match import Match
+from qchecker.parser import CodeModule
+from qchecker.substructures import (
+    SUBSTRUCTURES,
+    IfElseAssignBoolReturn,
+    IfElseReturnBool,
+    MergeableEqual,
+    Substructure,
+)
+
+from ._flake8_checks import Flake8Runner
+from ._pylint_checks import PylintRunner
+
+__all__ = ['Overlap', 'OVERLAPS', 'CombinedChecker']
+
+
+@dataclass(frozen=True, slots=True)
+class Overlap:
+    """
+    A pylint message that reports matches of some substructures.
+
+    Defines the following instance variables:
+    - **message_id**: The pylint message ID, e.g. :code:`R1703`
+    - **substructures**: The substructures whose matches are also reported
+      by the pylint message
+    - **partial**: Whether the pylint message misses some matches of the
+      substructures, in which case the substructures are never skipped
+    """
+    message_id: str
+    substructures: tuple[type[Substructure], ...]
+    partial: bool = False
+
+
+OVERLAPS = (
+    # simplifiable-if-statement, also reports assignments that are not
+    # returned but misses elif branches and ifs returning or assigning False
+    # before True
+    Overlap('R1703', (IfElseReturnBool, IfElseAssignBoolReturn),
+            partial=True),
+    # consider-using-in, also reports longer chains and swapped operands but
+    # misses comparisons with calls
+    Overlap('R1714', (MergeableEqual,), partial=True),
+)
+"""Known overlaps between pylint messages and substructures"""
+
+
+class CombinedChecker:
+    """
+    Checks code for substructures, pylint messages and flake8 errors in one
+    pass. pylint and flake8 are run in the current process and in separate
+    threads while substructures are matched.
+
+    Patterns detected by both pylint and qChecker (see :data:`OVERLAPS`) are
+    only detected once. By default, the substructures of a full overlap,
+    where the pylint message reports every substructure match, are not
+    matched when the pylint message is checked: pylint inspects the same
+    nodes regardless so the message costs nothing extra. With
+    prefer_substructures, the pylint message is disabled instead when all
+    of its overlapping substructures are matched, keeping qChecker's
+    descriptions. Partial overlaps, where the pylint message misses some
+    substructure matches, are always resolved by disabling the pylint
+    message. Every known overlap is partial.
+
+    For example::
+
+        with CombinedChecker() as checker:
+            for match in checker.check(code):
+                print(match.id, match.text_range)
+    """
+
+    def __init__(
+            self,
+            substructures: Iterable[type[Substructure]] = SUBSTRUCTURES,
+            *,
+            pylint: bool = True,
+            flake8: bool = True,
+            pylint_errors: list[str] = None,
+            flake8_options: dict = None,
+            prefer_substructures: bool = False,
+            overlaps: Iterable[Overlap] = OVERLAPS,
+    ):
+        """
+        :param substructures: The substructures to match
+        :param pylint: Whether to check code with pylint
+        :param flake8: Whether to check code with flake8
+        :param pylint_errors: A list of pylint errors to check. If not given,
+            all pylint errors will be detected
+        :param flake8_options: flake8 options to override, as accepted by
+            :class:`Flake8Runner`
+        :param prefer_substructures: If True, overlapping pylint messages are
+            disabled instead of overlapping substructures
+        :param overlaps: The overlaps between pylint messages and
+            substructures
+        """
+        substructures = tuple(substructures)
+        skipped = set()
+        disabled = []
+        for overlap in overlaps:
+            if not pylint or (pylint_errors is not None
+                              and overlap.message_id not in pylint_errors):
+                continue
+            if not prefer_substructures and not overlap.partial:
+                skipped.update(overlap.substructures)
+            elif all(s in substructures for s in overlap.substructures):
+                disabled.append(overlap.message_id)
+        self.disabled_messages = tuple(disabled)
+        if pylint_errors is not None:
+            pylint_errors = [e for e in pylint_errors if e not in disabled]
+            pylint = pylint and bool(pylint_errors)
+            disabled = None
+
+        self.substructures = tuple(
+            s for s in substructures if s not in skipped
+        )
+        self.skipped_substructures = tuple(
+            s for s in substructures if s in skipped
+        )
+        self._pylint = (PylintRunner(pylint_errors, disabled)
+                        if pylint else None)
+        self._flake8 = (Flake8Runner(**(flake8_options or {}))
+                        if flake8 else None)
+        self._executor = ThreadPoolExecutor(2) if pylint or flake8 else None
+
+    def check(self, code: CodeModule | str) -> list[Match]:
+        """
+        Returns the matches of all substructures, pylint messages and flake8
+        errors in the given code, sorted by position.
+
+        :param code: The code to check
+
+        :raises SyntaxError: If the given code cannot be parsed.
+        """
+        if not isinstance(code, CodeModule):
+            code = CodeModule(code)
+        futures = []
+        if self._pylint is not None:
+            # Lints the astroid module built from the already parsed AST
+            futures.append(self._executor.submit(
+                self._pylint.get_matches, code,
+            ))
+        if self._flake8 is not None:
+            futures.append(self._executor.submit(
+                self._flake8.get_matches, code.code,
+            ))
+        matches = [
+            match
+            for substructure in self.substructures
+            for match in substructure.iter_matches(code)
+        ]
+        for future in futures:
+            matches += future.result()
+        matches.sort(key=lambda match: (match.text_range.from_line,
+                                        match.text_range.from_offset))
+        return matches
+
+    def close(self) -> None:
+        """Stops the threads pylint and flake8 are run in"""
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,44 +1,337 @@
+import asyncio
+import io
 import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
 
+import flake8
+from flake8.api import legacy
+from flake8.checker import FileChecker
+from flake8.formatting.base import BaseFormatter
+from flake8.processor import FileProcessor
+from flake8.style_guide import Violation
+
+from qchecker.cache import ResultCache
 from qchecker.descriptions import Description, Markup
 from qchecker.match import Match, TextRange
 
-from ._process import _run_subprocess
+from ._process import _run_subprocess, _run_subprocess_async
+
+__all__ = [
+    'Flake8Runner',
+    'get_flake8_matches',
+    'get_flake8_matches_batch',
+    'GeneralCheckResult',
+    'get_flake8_matches_async',
+    'AsyncFlake8Pool',
+]
+
+_DISPLAY_NAME = '_flake8_code'
+
+_STDIN_ARGS = [
+    'flake8',
+    '--format', 'json',
+    '--stdin-display-name', _DISPLAY_NAME,
+    '-',
+]
+
+
+@dataclass(frozen=True, slots=True)
+class GeneralCheckResult:
+    """
+    The result of a general check that may time out.
+
+    Defines the following instance variables:
+    - **matches**: The detected matches. Empty if the check timed out
+    - **timed_out**: True if the check did not finish in time
+    """
+    matches: list[Match]
+    timed_out: bool = False
+
+
+class _StringFileChecker(FileChecker):
+    """A flake8 FileChecker that checks a code string instead of a file"""
+
+    def __init__(self, code: str, checks: dict, options):
+        # Split as flake8 splits stdin, translating \r\n and \r to \n
+        # but not breaking lines at other characters str.splitlines does
+        self._lines = io.StringIO(code, newline=None).readlines()
+        super().__init__(_DISPLAY_NAME, checks, options)
+
+    def _make_processor(self) -> FileProcessor:
+        return FileProcessor(self.filename, self.options, lines=self._lines)
+
+
+class _ViolationCollector(BaseFormatter):
+    """A flake8 formatter that collects reported violations"""
+
+    def after_init(self):
+        self.violations: list[Violation] = []
+
+    def handle(self, error: Violation):
+        self.violations.append(error)
 
-__all__ = ['get_flake8_matches']
+    def start(self):
+        pass
 
-def _run_flake8(code: str) -> list[dict]:
+    def stop(self):
+        pass
+
+
+class Flake8Runner:
+    """
+    Runs flake8 in the current process. Plugins and configuration are loaded
+    once when the runner is created and are reused for each check, avoiding
+    the cost of starting a flake8 process for every piece of code.
+
+    A runner can be shared between threads but checks are run one at a time.
+    """
+
+    def __init__(self, **options):
+        """
+        :param options: flake8 options to override, as accepted by
+            :func:`flake8.api.legacy.get_style_guide` (e.g.
+            :code:`select=['E', 'F']`)
+        """
+        application = legacy.get_style_guide(**options)._application
+        self._options = application.options
+        self._checks = application.check_plugins.to_dictionary()
+        self._guide = application.guide
+        self._collector = _ViolationCollector(self._options)
+        self._guide.formatter = self._collector
+        for guide in self._guide.style_guides:
+            guide.formatter = self._collector
+        self._lock = threading.Lock()
+
+    def get_matches(self, code: str) -> list[Match]:
+        """
+        Returns a list of matches detected by flake8
+
+        :param code: The code to check
+        """
+        with self._lock:
+            return [
+                _make_match(v.code, v.text, v.line_number, v.column_number)
+                for v in self._run(code)
+            ]
+
+    def _run(self, code: str) -> list[Violation]:
+        checker = _StringFileChecker(code, self._checks, self._options)
+        results = []
+        if checker.should_process:
+            _, results, _ = checker.run_checks()
+        self._collector.violations = []
+        with self._guide.processing_file(_DISPLAY_NAME):
+            for error_code, line, column, text, physical_line in sorted(
+                    results, key=lambda result: (result[1], result[2])
+            ):
+                self._guide.handle_error(
+                    error_code, _DISPLAY_NAME, line, column, text,
+                    physical_line,
+                )
+        return self._collector.violations
+
+
+_default_runner: Flake8Runner | None = None
+_default_runner_lock = threading.Lock()
+
+
+def _get_default_runner() -> Flake8Runner:
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = Flake8Runner()
+        return _default_runner
+
+
+def _run_flake8(code: str, timeout: float | None) -> list[dict]:
     """
     Runs flake8 on the given code and returns a list of dictionaries
     containing the resulting errors or warnings.
     """
-    stdout = _run_subprocess(
-        [
-            'flake8',
-            '--format', 'json',
-            '--stdin-display-name', '_flake8_code',
-            '-',
-        ],
-        code,
-    )
-    return json.loads(stdout)['_flake8_code']
+    stdout = _run_subprocess(_STDIN_ARGS, code, timeout)
+    return json.loads(stdout)[_DISPLAY_NAME]
 
 
-def get_flake8_matches(code: str) -> list[Match]:
+def get_flake8_matches(
+        code: str,
+        *,
+        in_process: bool = False,
+        cache: ResultCache = None,
+        timeout: float | None = 3,
+) -> list[Match]:
     """
     Returns a list of matches detected by flake8
 
     :param code: The code to check
+    :param in_process: If True, flake8 is run in the current process with a
+        shared :class:`Flake8Runner` instead of in a subprocess. This is
+        considerably faster when checking many pieces of code.
+    :param cache: A cache of previous results. Results are cached by the
+        code and the flake8 version, changes to flake8 configuration files
+        or plugins require the cache to be cleared
+    :param timeout: The number of seconds to wait for the flake8 subprocess
+        to finish. If None, waits indefinitely. Not used when in_process
+
+    :raises subprocess.TimeoutExpired: If flake8 does not finish in time
     """
+    if cache is None:
+        return _get_flake8_matches(code, in_process, timeout)
+    key = ResultCache.key('flake8', flake8.__version__, code)
+    matches = cache.get(key)
+    if matches is None:
+        matches = _get_flake8_matches(code, in_process, timeout)
+        cache.put(key, matches)
+    return list(matches)
+
+
+def _get_flake8_matches(
+        code: str,
+        in_process: bool,
+        timeout: float | None,
+) -> list[Match]:
+    if in_process:
+        return _get_default_runner().get_matches(code)
     return [
-        Match(
-            f"flake8-{f8_match['code']}",
-            Description(Markup.plaintext, f8_match['text']),
-            TextRange(
-                f8_match['line_number'],
-                f8_match['column_number'],
+        _make_match(
+            f8_match['code'],
+            f8_match['text'],
+            f8_match['line_number'],
+            f8_match['column_number'],
+        ) for f8_match in _run_flake8(code, timeout)
+    ]
+
+
+async def get_flake8_matches_async(
+        code: str,
+        *,
+        timeout: float | None = 3,
+) -> GeneralCheckResult:
+    """
+    Returns the matches detected by a flake8 subprocess without blocking the
+    event loop. If flake8 does not finish in time, it is killed and a timed
+    out result is returned rather than raising. Timed out results have no
+    matches, as flake8 only reports errors once every check has finished.
+
+    :param code: The code to check
+    :param timeout: The number of seconds to wait for flake8 to finish. If
+        None, waits indefinitely
+    """
+    result = await _run_subprocess_async(_STDIN_ARGS, code, timeout)
+    if result.timed_out:
+        return GeneralCheckResult([], timed_out=True)
+    return GeneralCheckResult([
+        _make_match(
+            f8_match['code'],
+            f8_match['text'],
+            f8_match['line_number'],
+            f8_match['column_number'],
+        ) for f8_match in json.loads(result.stdout)[_DISPLAY_NAME]
+    ])
+
+
+class AsyncFlake8Pool:
+    """
+    Limits the number of flake8 subprocesses run at the same time so that
+    many checks can be awaited concurrently, e.g. by a web service, without
+    overloading the machine.
+
+    For example::
+
+        pool = AsyncFlake8Pool(4, timeout=5)
+        results = await pool.map(codes)
+        timed_out = [result for result in results if result.timed_out]
+    """
+
+    def __init__(
+            self,
+            max_processes: int = None,
+            *,
+            timeout: float | None = 3,
+    ):
+        """
+        :param max_processes: The maximum number of flake8 subprocesses run
+            at the same time. Defaults to the number of CPUs
+        :param timeout: The number of seconds each flake8 subprocess may run
+            for, not including time spent waiting for other subprocesses.
+            If None, waits indefinitely
+        """
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(self.max_processes)
+
+    async def get_matches(self, code: str) -> GeneralCheckResult:
+        """
+        Returns the matches detected by flake8 once a subprocess is
+        available
+
+        :param code: The code to check
+        """
+        async with self._semaphore:
+            return await get_flake8_matches_async(code, timeout=self.timeout)
+
+    async def map(self, codes: Iterable[str]) -> list[GeneralCheckResult]:
+        """
+        Returns the results of checking each of the given pieces of code, in
+        the order they are given
+
+        :param codes: The code to check
+        """
+        return list(await asyncio.gather(
+            *(self.get_matches(code) for code in codes)
+        ))
+
+
+def get_flake8_matches_batch(
+        codes: Iterable[str],
+        *,
+        jobs: int = None,
+        timeout: float = None,
+) -> list[list[Match]]:
+    """
+    Returns a list of the matches detected by flake8 for each of the given
+    pieces of code, in the order they are given. All code is checked by a
+    single flake8 process which uses its own parallelism to check code.
+
+    :param codes: The code to check
+    :param jobs: The number of processes flake8 uses. Defaults to flake8's
+        own default (the number of CPUs)
+    :param timeout: The number of seconds to wait for flake8 to finish. If
+        not given, waits indefinitely
+
+    :raises subprocess.TimeoutExpired: If flake8 does not finish in time
+    """
+    codes = list(codes)
+    if not codes:
+        return []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f'{i}.py')
+                 for i in range(len(codes))]
+        for path, code in zip(paths, codes):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(code)
+        args = ['flake8', '--format', 'json', directory]
+        if jobs is not None:
+            args[1:1] = ['--jobs', str(jobs)]
+        results = json.loads(_run_subprocess(args, '', timeout=timeout))
+    return [
+        [
+            _make_match(
+                f8_match['code'],
+                f8_match['text'],
                 f8_match['line_number'],
                 f8_match['column_number'],
-            ),
-        ) for f8_match in _run_flake8(code)
+            ) for f8_match in results.get(path, [])
+        ] for path in paths
     ]
+
+
+def _make_match(code: str, text: str, line: int, column: int) -> Match:
+    return Match(
+        f"flake8-{code}",
+        Description(Markup.plaintext, text),
+        TextRange(line, column, line, column),
+    )
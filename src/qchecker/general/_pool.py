@@ -0,0 +1,293 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from qchecker.match import Match
+
+from ._pylint_checks import get_pylint_matches
+
+__all__ = ['WorkerStats', 'PylintPool']
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerStats:
+    """
+    A snapshot of the statistics of a pylint pool worker.
+
+    Defines the following instance variables:
+    - **worker_id**: The index of the worker in the pool
+    - **pid**: The process ID of the current worker process
+    - **tasks**: The number of tasks run by the current worker process
+    - **total_tasks**: The number of tasks run by all of this worker's
+      processes
+    - **recycles**: The number of times the worker process was replaced
+    - **rss_bytes**: The resident memory of the worker process after its
+      last task
+    - **busy_seconds**: The total time spent running tasks
+    """
+    worker_id: int
+    pid: int | None
+    tasks: int
+    total_tasks: int
+    recycles: int
+    rss_bytes: int
+    busy_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """The number of tasks run per busy second"""
+        if not self.busy_seconds:
+            return 0.0
+        return self.total_tasks / self.busy_seconds
+
+
+class PylintPool:
+    """
+    A pool of worker processes that each reuse a pylint linter between
+    checks. As pylint and astroid caches grow over time, a worker process is
+    replaced after it has run a given number of tasks or its memory use
+    exceeds a threshold.
+
+    For example::
+
+        with PylintPool(4, max_tasks_per_worker=500) as pool:
+            for matches in pool.map(codes):
+                ...
+            print(*pool.stats(), sep='\\n')
+    """
+
+    def __init__(
+            self,
+            workers: int = None,
+            *,
+            max_tasks_per_worker: int = None,
+            max_rss_bytes: int = None,
+            mp_context=None,
+    ):
+        """
+        :param workers: The number of worker processes. Defaults to the
+            number of CPUs
+        :param max_tasks_per_worker: The number of tasks a worker process
+            runs before it is replaced. If not given, processes are not
+            replaced based on the number of tasks
+        :param max_rss_bytes: The resident memory, in bytes, after which a
+            worker process is replaced. If not given, processes are not
+            replaced based on memory
+        :param mp_context: The multiprocessing context used to start worker
+            processes. Defaults to the default multiprocessing context
+        """
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_bytes
+        self._context = mp_context or multiprocessing.get_context()
+        self._tasks = queue.SimpleQueue()
+        self._closed = False
+        self._workers = [
+            _Worker(i, self) for i in range(workers or os.cpu_count() or 1)
+        ]
+
+    def submit(self, code: str, errors: list[str] = None) -> Future:
+        """
+        Schedules code to be checked by pylint and returns a Future of the
+        list of matches.
+
+        :param code: The code to check
+        :param errors: A list of pylint errors to check. If not given, all
+            pylint errors will be detected
+
+        :raises RuntimeError: If the pool has been closed
+        """
+        if self._closed:
+            raise RuntimeError('Cannot submit tasks to a closed pool')
+        future = Future()
+        self._tasks.put((future, code, errors))
+        return future
+
+    def get_matches(self, code: str, errors: list[str] = None) -> list[Match]:
+        """
+        Returns a list of matches detected by pylint
+
+        :param code: The code to check
+        :param errors: A list of pylint errors to check. If not given, all
+            pylint errors will be detected
+        """
+        return self.submit(code, errors).result()
+
+    def map(
+            self,
+            codes: Iterable[str],
+            errors: list[str] = None,
+    ) -> Iterator[list[Match]]:
+        """
+        Yields the list of matches detected by pylint for each of the given
+        pieces of code in order.
+
+        :param codes: The code to check
+        :param errors: A list of pylint errors to check. If not given, all
+            pylint errors will be detected
+        """
+        futures = [self.submit(code, errors) for code in codes]
+        yield from (future.result() for future in futures)
+
+    def stats(self) -> list[WorkerStats]:
+        """Returns the current statistics of each worker"""
+        return [worker.stats() for worker in self._workers]
+
+    def close(self) -> None:
+        """
+        Waits for submitted tasks to finish and stops all worker processes
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _Worker:
+    """Runs tasks from a pool in a worker process from a dispatch thread"""
+
+    def __init__(self, worker_id: int, pool: PylintPool):
+        self._id = worker_id
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._process = None
+        self._connection = None
+        self._tasks = 0
+        self._total_tasks = 0
+        self._recycles = 0
+        self._rss_bytes = 0
+        self._busy_seconds = 0.0
+        self._start_process()
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def stats(self) -> WorkerStats:
+        with self._lock:
+            return WorkerStats(
+                self._id,
+                self._process.pid if self._process is not None else None,
+                self._tasks,
+                self._total_tasks,
+                self._recycles,
+                self._rss_bytes,
+                self._busy_seconds,
+            )
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _dispatch(self) -> None:
+        try:
+            while (task := self._pool._tasks.get()) is not None:
+                future, code, errors = task
+                if future.set_running_or_notify_cancel():
+                    self._run(future, code, errors)
+        finally:
+            self._stop_process()
+
+    def _run(self, future: Future, code: str, errors: list[str]) -> None:
+        start = time.perf_counter()
+        try:
+            self._connection.send((code, errors))
+            succeeded, result, rss_bytes = self._connection.recv()
+        except (EOFError, OSError):
+            future.set_exception(
+                RuntimeError('pylint worker process stopped unexpectedly')
+            )
+            with self._lock:
+                self._restart_process()
+            return
+        with self._lock:
+            self._tasks += 1
+            self._total_tasks += 1
+            self._rss_bytes = rss_bytes
+            self._busy_seconds += time.perf_counter() - start
+            if self._should_recycle():
+                self._restart_process()
+        if succeeded:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+
+    def _should_recycle(self) -> bool:
+        max_tasks = self._pool.max_tasks_per_worker
+        max_rss = self._pool.max_rss_bytes
+        return ((max_tasks is not None and self._tasks >= max_tasks)
+                or (max_rss is not None and self._rss_bytes >= max_rss))
+
+    def _start_process(self) -> None:
+        connection, child_connection = self._pool._context.Pipe()
+        self._process = self._pool._context.Process(
+            target=_worker_main,
+            args=(child_connection,),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+        self._connection = connection
+        self._tasks = 0
+
+    def _stop_process(self) -> None:
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._connection.close()
+
+    def _restart_process(self) -> None:
+        self._stop_process()
+        self._start_process()
+        self._recycles += 1
+
+
+def _worker_main(connection) -> None:
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        code, errors = task
+        try:
+            result = True, get_pylint_matches(code, errors)
+        except Exception as e:
+            result = False, e
+        connection.send((*result, _rss_bytes()))
+
+
+def _rss_bytes() -> int:
+    """
+    Returns the resident memory of the current process. Falls back to the
+    peak resident memory where the current value is not available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -1,10 +1,32 @@
+import asyncio
 import subprocess
+from dataclasses import dataclass
 
 
-def _run_subprocess(args: list[str], stdin: str) -> bytes:
+@dataclass(frozen=True, slots=True)
+class _ProcessResult:
+    """
+    The output of a subprocess.
+
+    Defines the following instance variables:
+    - **stdout**: The output of the process. Empty if it timed out
+    - **timed_out**: True if the process was killed after timing out
+    """
+    stdout: bytes
+    timed_out: bool
+
+
+def _run_subprocess(
+        args: list[str],
+        stdin: str,
+        timeout: float | None = 3,
+) -> bytes:
     """
     Runs a subprocess with the given args. stdin is then communicated to
     the subprocess and the resulting stdout is returned. stderr is ignored.
+
+    :raises subprocess.TimeoutExpired: If the subprocess does not finish
+        within timeout seconds. The subprocess is killed.
     """
     with subprocess.Popen(
             args,
@@ -12,8 +34,61 @@ def _run_subprocess(args: list[str], stdin: str) -> bytes:
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
     ) as process:
-        stdout, _ = process.communicate(stdin.encode(), timeout=3)
+        try:
+            stdout, _ = process.communicate(stdin.encode(), timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+    return _strip_colour_reset(stdout)
+
+
+async def _run_subprocess_async(
+        args: list[str],
+        stdin: str,
+        timeout: float | None = 3,
+) -> _ProcessResult:
+    """
+    Runs a subprocess with the given args without blocking the event loop.
+    stdin is then communicated to the subprocess and the resulting stdout is
+    returned. stderr is ignored.
+
+    If the subprocess does not finish within timeout seconds, or the calling
+    task is cancelled, the subprocess is killed and waited for. On timeout,
+    no output is returned: flake8 only reports errors once every check has
+    finished, so a killed run never has complete output to parse.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def communicate():
+        try:
+            process.stdin.write(stdin.encode())
+            await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # The process exited without reading all of stdin
+            pass
+        stdout = await process.stdout.read()
+        await process.wait()
+        return stdout
+
+    try:
+        stdout = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        return _ProcessResult(b'', timed_out=True)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    return _ProcessResult(_strip_colour_reset(stdout), timed_out=False)
+
+
+def _strip_colour_reset(stdout: bytes) -> bytes:
     # Resolves issue with Colorama in PyCharm running subprocesses
     # https://github.com/tartley/colorama/issues/263
-    stdout = stdout.removesuffix(b"\x1b[0m")
-    return stdout
+    return stdout.removesuffix(b"\x1b[0m")
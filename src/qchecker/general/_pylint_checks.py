@@ -1,59 +1,165 @@
-import json
-import sys
-from io import StringIO, TextIOWrapper, BytesIO
+import functools
+import threading
+from collections.abc import Callable
 
-from pylint.lint import Run
-from pylint.reporters import JSONReporter
+import astroid
+import astroid.context
+import pylint
+from astroid import MANAGER
+from pylint.lint import PyLinter, Run
+from pylint.message import Message
+from pylint.reporters import CollectingReporter
+from pylint.typing import FileItem
+
+from qchecker.cache import ResultCache
 from qchecker.descriptions import Markup, Description
 from qchecker.match import Match, TextRange
+from qchecker.parser import CodeModule
 
+from ._astroid import _ASTROID_LOCK, _MODULE_NAME
 
-__all__ = ['get_pylint_matches']
+__all__ = ['PylintRunner', 'get_pylint_matches']
 
 
-def _run_pylint(code: str, errors: list[str] | None) -> list[dict]:
+class _ConfiguredLinter(PyLinter):
     """
-    Runs pylint on the given code and returns a list of dictionaries
-    containing the resulting errors or warnings.
+    A PyLinter that does not lint the files it is configured with so that
+    pylint's own Run can be used to load plugins and configuration.
     """
-    # Stdin swapping is faster than running a subprocess. Although this
-    # likely can't be used with multiprocessing.
-    pylint_output = StringIO()
-    # This is why you don't diddle with other people's IO without asking.
-    sys.stdin = TextIOWrapper(BytesIO(code.encode()))
-
-    commands = []
-    if errors is not None:
-        commands += ('--disable', 'all', '--enable', *errors)
-    commands += ('--from-stdin', '_pylint_runner')
-
-    Run(
-        commands,
-        reporter=JSONReporter(pylint_output),
-        do_exit=False,
-    )
-    sys.stdin = sys.__stdin__
-    result = pylint_output.getvalue()
-    return json.loads(result)
 
+    def check(self, files_or_modules):
+        pass
+
+    def generate_reports(self):
+        return None
+
+
+class _ConfiguringRun(Run):
+    LinterClass = _ConfiguredLinter
+
+
+class PylintRunner:
+    """
+    A pre-configured pylint linter that checks code strings in the current
+    process. Checkers and configuration are loaded once when the runner is
+    created and are reused for each check. Standard input is not used.
+
+    astroid's cache of imported modules (e.g. the standard library) is kept
+    between checks while inference state of the checked code is cleared
+    after each check. Checks in a process are run one at a time, so runners
+    can be used from threads but are best used with one runner per process
+    (e.g. in a process pool).
+
+    Given a :class:`qchecker.parser.CodeModule`, the runner lints its
+    astroid module which is built from the already parsed AST and shared with
+    other runners.
+    """
+
+    def __init__(self, errors: list[str] = None, disabled: list[str] = None):
+        """
+        :param errors: A list of pylint errors to check. If not given, all
+            pylint errors will be detected
+        :param disabled: A list of pylint errors not to check
+        """
+        args = []
+        if errors is not None:
+            args += ('--disable', 'all', '--enable', ','.join(errors))
+        if disabled:
+            args += ('--disable', ','.join(disabled))
+        self._reporter = CollectingReporter()
+        self._linter = _ConfiguringRun(
+            [*args, _MODULE_NAME],
+            reporter=self._reporter,
+            exit=False,
+        ).linter
+        self._linter.initialize()
+
+    def get_matches(self, code: CodeModule | str) -> list[Match]:
+        """
+        Returns a list of matches detected by pylint
 
-def get_pylint_matches(code: str, errors: list[str] = None) -> list[Match]:
+        :param code: The code to check
+        """
+        if isinstance(code, CodeModule):
+            get_ast = functools.partial(_get_built_ast, module=code.astroid)
+        else:
+            get_ast = functools.partial(self._linter.get_ast, data=code)
+        return [_make_match(message) for message in self._run(get_ast)]
+
+    def _run(self, get_ast: Callable) -> list[Message]:
+        with _ASTROID_LOCK:
+            self._reporter.reset()
+            self._linter.open()
+            try:
+                self._linter._check_files(
+                    get_ast,
+                    [FileItem(_MODULE_NAME, _MODULE_NAME, _MODULE_NAME)],
+                )
+            finally:
+                # The checked module must not be importable by or inferred
+                # from in later checks
+                MANAGER.astroid_cache.pop(_MODULE_NAME, None)
+                astroid.context._invalidate_cache()
+            return self._reporter.messages
+
+
+_thread_local = threading.local()
+
+
+def _get_runner(errors: list[str] | None) -> PylintRunner:
+    """Returns this thread's runner for the given errors"""
+    if not hasattr(_thread_local, 'runners'):
+        _thread_local.runners = {}
+    key = tuple(errors) if errors is not None else None
+    if key not in _thread_local.runners:
+        _thread_local.runners[key] = PylintRunner(errors)
+    return _thread_local.runners[key]
+
+
+def get_pylint_matches(
+        code: CodeModule | str,
+        errors: list[str] = None,
+        *,
+        cache: ResultCache = None,
+) -> list[Match]:
     """
     Returns a list of matches detected by pylint
 
-    :param code: The code to check
+    :param code: The code to check. The astroid module of a CodeModule is
+        linted without parsing the code again
     :param errors: A list of pylint errors to check. If not given, all
         pylint errors will be detected
+    :param cache: A cache of previous results. Results are cached by the
+        code, the pylint and astroid versions and the errors checked
     """
-    return [
-        Match(
-            f"pylint-{pl_match['message-id']}",
-            Description(Markup.plaintext, pl_match['message']),
-            TextRange(
-                pl_match['line'],
-                pl_match['column'],
-                pl_match['endLine'],
-                pl_match['endColumn']
-            ),
-        ) for pl_match in _run_pylint(code, errors)
-    ]
+    if cache is None:
+        return _get_runner(errors).get_matches(code)
+    key = ResultCache.key(
+        'pylint',
+        pylint.__version__,
+        astroid.__version__,
+        ','.join(sorted(errors)) if errors is not None else '*',
+        code.code if isinstance(code, CodeModule) else code,
+    )
+    matches = cache.get(key)
+    if matches is None:
+        matches = _get_runner(errors).get_matches(code)
+        cache.put(key, matches)
+    return list(matches)
+
+
+def _get_built_ast(filepath: str, modname: str, module):
+    return module
+
+
+def _make_match(message: Message) -> Match:
+    return Match(
+        f"pylint-{message.msg_id}",
+        Description(Markup.plaintext, message.msg or ''),
+        TextRange(
+            message.line,
+            message.column,
+            message.end_line,
+            message.end_column,
+        ),
+    )
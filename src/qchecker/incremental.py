@@ -0,0 +1,242 @@
+"""
+Incremental checking of resubmitted code.
+
+Students typically resubmit code with a change to only one or two functions.
+An :class:`IncrementalChecker` caches the matches found in each top level
+function and class definition, keyed by a structural hash of that
+definition. When code is rechecked, only definitions that have changed are
+matched again and the cached matches of unchanged definitions are shifted to
+their new lines.
+
+Cached matches are stored in a :class:`qchecker.cache.MatchCache`. By
+default, the global :data:`qchecker.cache.MATCH_CACHE` is used so identical
+definitions in different submissions also reuse cached matches.
+
+Statements outside of top level definitions, and substructures that compare
+separate parts of a module (e.g. :class:`DuplicateExpression`), are always
+rechecked.
+"""
+
+import ast
+import hashlib
+from collections.abc import Iterable
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+from libcst import ClassDef, FunctionDef
+from libcst.metadata import PositionProvider
+
+from qchecker.cache import MATCH_CACHE, MatchCache
+from qchecker.match import Match, TextRange
+from qchecker.parser import CodeModule, LineIndex
+from qchecker.profiling import ProfileStats
+from qchecker.substructures import Substructure
+
+__all__ = ['IncrementalChecker', 'structural_hash']
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# (from_line, from_offset, to_line, to_offset) with lines relative to the
+# line before the start of a definition
+_RelativeRange = tuple[int, int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class _Definition:
+    """A top level function or class definition in a parsed module"""
+    key: bytes
+    start_line: int
+    ast_node: ast.AST
+    cst_node: FunctionDef | ClassDef
+
+
+def structural_hash(code: CodeModule, node: ast.stmt) -> bytes:
+    """
+    Returns a hash of the given top level definition (including decorators)
+    from the parsed module.
+
+    Definitions with equal hashes produce the same matches relative to their
+    first line. The hash is taken over the source of the definition, rather
+    than only its AST, as CST positions (e.g. of :code:`else` keywords) are
+    not recorded in the AST.
+    """
+    return _hash_source(code.line_index, node)
+
+
+class IncrementalChecker:
+    """
+    Matches substructures against successive versions of the same code,
+    rechecking only the top level definitions that have changed.
+    """
+
+    def __init__(
+            self,
+            substructures: Iterable[type[Substructure]],
+            cache: MatchCache = None,
+            *,
+            stats: ProfileStats = None,
+    ):
+        """
+        :param substructures: The substructures to match
+        :param cache: The cache of definition matches. If not given, the
+            global match cache is used
+        :param stats: If given, each check is recorded as a submission in
+            these statistics. Each definition whose matches are served from
+            the cache counts as a cache hit of every substructure
+        """
+        self.substructures = tuple(substructures)
+        self.cache = cache if cache is not None else MATCH_CACHE
+        self.stats = stats
+        self._substructure_set = frozenset(self.substructures)
+
+    def check(self, code: CodeModule | str) -> list[Match]:
+        """
+        Returns the matches of all substructures in the given code. Matches
+        are ordered by substructure and then by position.
+
+        :param code:
+            The code to be parsed.
+
+            .. deprecated:: 1.1.0
+                String parameters will not be supported in future versions.
+                Wrap the code into a CodeModule instead.
+
+        :raises SyntaxError: If the given code cannot be parsed.
+        """
+        if not isinstance(code, CodeModule):
+            code = CodeModule(code)
+        definitions, ast_rest, cst_rest = _split_module(code)
+        if self.stats is not None:
+            self.stats.submissions += 1
+
+        matches = {substructure: [] for substructure in self.substructures}
+        for definition in definitions:
+            key = self.cache.key(definition.key, self._substructure_set)
+            relative_matches = self.cache.get(key)
+            if relative_matches is None:
+                relative_matches = self._match_definition(code, definition)
+                self.cache.put(key, relative_matches)
+            elif self.stats is not None:
+                for substructure in relative_matches:
+                    self.stats[substructure].cache_hits += 1
+            line_delta = definition.start_line - 1
+            for substructure, ranges in relative_matches.items():
+                matches[substructure] += (
+                    _shifted_match(substructure, text_range, line_delta)
+                    for text_range in ranges
+                )
+
+        for substructure in self.substructures:
+            with self._record(substructure):
+                if substructure._module_scoped:
+                    matches[substructure] = list(
+                        substructure.iter_matches(code)
+                    )
+                else:
+                    matches[substructure] += (
+                        substructure._iter_partial_matches(
+                            code, ast_rest, cst_rest,
+                        )
+                    )
+            if self.stats is not None:
+                self.stats[substructure].matches += len(matches[substructure])
+        return [
+            match
+            for substructure in self.substructures
+            for match in sorted(matches[substructure], key=_position)
+        ]
+
+    def _match_definition(
+            self,
+            code: CodeModule,
+            definition: _Definition,
+    ) -> dict[type, tuple[_RelativeRange, ...]]:
+        line_delta = definition.start_line - 1
+        relative_matches = {}
+        for substructure in self.substructures:
+            if substructure._module_scoped:
+                continue
+            with self._record(substructure):
+                relative_matches[substructure] = tuple(
+                    _relative_range(match.text_range, line_delta)
+                    for match in substructure._iter_partial_matches(
+                        code, [definition.ast_node], [definition.cst_node],
+                    )
+                )
+        return relative_matches
+
+    def _record(self, substructure: type[Substructure]):
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.record(substructure)
+
+
+def _split_module(
+        code: CodeModule,
+) -> tuple[list[_Definition], list[ast.stmt], list]:
+    """
+    Splits the module into its top level definitions and the remaining
+    AST and CST statements.
+    """
+    positions = code.cst.resolve(PositionProvider)
+    cst_definitions = {
+        positions[node].start.line: node
+        for node in code.cst.module.body
+        if isinstance(node, (FunctionDef, ClassDef))
+    }
+    definitions = [
+        _Definition(
+            _hash_source(code.line_index, node),
+            _start_line(node),
+            node,
+            cst_definitions[node.lineno],
+        )
+        for node in code.ast.body
+        if isinstance(node, _DEFINITIONS)
+    ]
+    matched = {id(definition.cst_node) for definition in definitions}
+    ast_rest = [node for node in code.ast.body
+                if not isinstance(node, _DEFINITIONS)]
+    cst_rest = [node for node in code.cst.module.body
+                if id(node) not in matched]
+    return definitions, ast_rest, cst_rest
+
+
+def _hash_source(lines: LineIndex, node: ast.stmt) -> bytes:
+    source = '\n'.join(lines.lines(_start_line(node), node.end_lineno))
+    return hashlib.blake2b(source.encode(), digest_size=16).digest()
+
+
+def _start_line(node: ast.stmt) -> int:
+    return min([node.lineno, *(d.lineno for d in node.decorator_list)])
+
+
+def _relative_range(text_range: TextRange, line_delta: int) -> _RelativeRange:
+    return (
+        text_range.from_line - line_delta,
+        text_range.from_offset,
+        text_range.to_line - line_delta,
+        text_range.to_offset,
+    )
+
+
+def _shifted_match(
+        substructure: type[Substructure],
+        text_range: _RelativeRange,
+        line_delta: int,
+) -> Match:
+    from_line, from_offset, to_line, to_offset = text_range
+    return Match(
+        substructure.name,
+        substructure.description,
+        TextRange(
+            from_line + line_delta,
+            from_offset,
+            to_line + line_delta,
+            to_offset,
+        ),
+    )
+
+
+def _position(match: Match) -> tuple[int, int]:
+    return match.text_range.from_line, match.text_range.from_offset
@@ -4,6 +4,7 @@ from collections.abc import Iterable
 from dataclasses import dataclass
 
 from qchecker.descriptions import Description
+from qchecker.parser import CodeModule
 
 __all__ = ['TextRange', 'Match', 'aggregate_match_types']
 
@@ -43,10 +44,17 @@ class TextRange:
         other_to = (other.to_line, other.to_offset)
         return this_from <= other_from and this_to >= other_to
 
-    def grab_range(self, code: str):
-        """Copies the dedented range of text from the given code string."""
-        lines = code.splitlines()
-        code_range = lines[self.from_line - 1:self.to_line]
+    def grab_range(self, code: str | CodeModule):
+        """
+        Copies the dedented range of text from the given code string or
+        CodeModule. Only the lines in the range are read from a CodeModule,
+        which can have been released.
+        """
+        if isinstance(code, CodeModule):
+            code_range = code.line_index.lines(self.from_line, self.to_line)
+        else:
+            lines = code.splitlines()
+            code_range = lines[self.from_line - 1:self.to_line]
         code_range[-1] = code_range[-1][:self.to_offset]
         if not code_range[0][:self.from_offset].isspace():
             code_range[0] = code_range[0][self.from_offset:]
@@ -1,10 +1,58 @@
 import ast
+import re
+from array import array
 
 import libcst
 
+_LINE_ENDING = re.compile(r'\r\n?|\n')
+
+
+class LineIndex:
+    """
+    The offsets of the start of each line of a source string, so single
+    lines and ranges of lines can be extracted without splitting the whole
+    source. Lines are split at :code:`\\r\\n`, :code:`\\r` and
+    :code:`\\n` as in Python source, and line endings are removed from each
+    line.
+    """
+
+    __slots__ = ['source', '_starts']
+
+    def __init__(self, source: str):
+        self.source = source
+        starts = array('L', [0])
+        starts.extend(m.end() for m in _LINE_ENDING.finditer(source))
+        if starts[-1] == len(source) and len(starts) > 1:
+            # The source ends with a newline, which does not start a line
+            starts.pop()
+        self._starts = starts
+
+    def __len__(self):
+        return len(self._starts) if self.source else 0
+
+    def line(self, line_number: int) -> str:
+        """Returns the one-indexed line without its line ending"""
+        if not 1 <= line_number <= len(self):
+            raise IndexError(f'line {line_number} is out of range')
+        start = self._starts[line_number - 1]
+        if line_number < len(self._starts):
+            line = self.source[start:self._starts[line_number]]
+        else:
+            line = self.source[start:]
+        return line.rstrip('\r\n')
+
+    def lines(self, from_line: int, to_line: int) -> list[str]:
+        """
+        Returns the one-indexed lines from from_line to to_line (inclusive),
+        clipped to the lines of the source as with slicing.
+        """
+        from_line = max(from_line, 1)
+        to_line = min(to_line, len(self))
+        return [self.line(n) for n in range(from_line, to_line + 1)]
+
 
 class CodeModule:
-    __slots__ = ['ast', 'cst', 'code']
+    __slots__ = ['code', '_ast', '_cst', '_astroid', '_line_index']
 
     def __init__(self, code: str):
         """
@@ -13,12 +61,78 @@ class CodeModule:
         :raises SyntaxError: If the given code cannot be parsed.
         """
         self.code = code
+        self._astroid = None
+        self._line_index = None
         try:
-            self.ast = ast.parse(code)
+            self._ast = ast.parse(code)
         except IndentationError as e:
             raise SyntaxError from e
 
         try:
-            self.cst = libcst.MetadataWrapper(libcst.parse_module(code))
+            # The CST is only reachable through the wrapper, so the wrapper's
+            # defensive deep copy of it is not needed
+            self._cst = libcst.MetadataWrapper(
+                libcst.parse_module(code), unsafe_skip_copy=True,
+            )
         except libcst.ParserSyntaxError as e:
             raise SyntaxError from e
+
+    @property
+    def ast(self) -> ast.Module:
+        """
+        The AST of the code
+
+        :raises ValueError: If the module has been released.
+        """
+        if self._ast is None:
+            raise ValueError('The CodeModule has been released')
+        return self._ast
+
+    @property
+    def cst(self) -> libcst.MetadataWrapper:
+        """
+        The CST of the code, wrapped to resolve metadata
+
+        :raises ValueError: If the module has been released.
+        """
+        if self._cst is None:
+            raise ValueError('The CodeModule has been released')
+        return self._cst
+
+    @property
+    def line_index(self) -> LineIndex:
+        """An index of the lines of the code. Built on first access"""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.code)
+        return self._line_index
+
+    @property
+    def released(self) -> bool:
+        """Whether the trees of the module have been released"""
+        return self._ast is None
+
+    def release(self) -> None:
+        """
+        Releases the AST, the CST (and any metadata resolved from it) and the
+        astroid module once the code has been matched, so only the code and
+        its line index are kept, e.g. while the matches of many submissions
+        are held in a batch. The ranges of matches can still be extracted
+        with :meth:`qchecker.match.TextRange.grab_range`.
+        """
+        self._ast = None
+        self._cst = None
+        self._astroid = None
+
+    @property
+    def astroid(self):
+        """
+        An astroid module built from the already parsed AST, e.g. to be
+        linted by :class:`qchecker.general.PylintRunner` without parsing the
+        code again. Built on first access and cached.
+
+        Requires astroid, which is installed with the general_checks extra.
+        """
+        if self._astroid is None:
+            from qchecker.general._astroid import _build_astroid_module
+            self._astroid = _build_astroid_module(self)
+        return self._astroid
@@ -0,0 +1,210 @@
+"""
+Opt-in profiling of substructure matching.
+
+A :class:`ProfileStats` records, for each substructure, the time spent
+matching it, the number of AST and CST nodes it visited, the number of
+:func:`equals <qchecker.substructures._ast_substructures.equals>` and
+:func:`ast.dump` calls it made, the matches it yielded and the number of
+times its matches were served from a cache. Stats can be recorded for a
+single submission and merged across a batch::
+
+    total = ProfileStats()
+    for code in submissions:
+        stats = ProfileStats()
+        matches = stats.profile(code, SUBSTRUCTURES)
+        total.merge(stats)
+    print(total.format_table())
+
+:class:`qchecker.incremental.IncrementalChecker` and
+:func:`qchecker.batch.check_project` can also record stats.
+
+Helper counters attribute time to the helper functions substructures spend
+most of their time in (e.g. :code:`nodes_of_class`, :code:`equals` and
+:code:`simplify_expression`), reporting their calls, time and the size of the
+dump strings they produce::
+
+    enable_counters()
+    for code in submissions:
+        for substructure in SUBSTRUCTURES:
+            substructure.list_matches(code)
+    for name, stats in get_counters().items():
+        print(name, stats.calls, stats.seconds, stats.dump_bytes)
+
+Helper counters can also be enabled by setting the
+:data:`COUNTERS_ENVIRONMENT_VARIABLE` (QCHECKER_COUNTERS) to 1 before
+importing qchecker.
+
+Nodes and calls are counted by hooks that are only installed while stats are
+being recorded or helper counters are enabled, so matching is unaffected
+otherwise. Only the thread (or asyncio task) recording stats is counted in
+them, while helper counters count all threads. Recorded times include the
+overhead of counting.
+"""
+
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+
+from qchecker.match import Match
+from qchecker.parser import CodeModule
+from qchecker.substructures import Substructure
+from qchecker.substructures._instrument import *
+from qchecker.substructures._instrument import _recording
+
+__all__ = [
+    'SubstructureStats',
+    'ProfileStats',
+    'COUNTERS_ENVIRONMENT_VARIABLE',
+    'HelperStats',
+    'enable_counters',
+    'disable_counters',
+    'counters_enabled',
+    'reset_counters',
+    'get_counters',
+]
+
+
+@dataclass(slots=True)
+class SubstructureStats:
+    """
+    Statistics of matching a single substructure.
+
+    Defines the following instance variables:
+    - **calls**: The number of times the substructure was matched, e.g. once
+      per submission or once per changed definition when checked
+      incrementally
+    - **seconds**: The wall time spent matching
+    - **nodes_visited**: The number of AST and CST nodes visited
+    - **equals_calls**: The number of calls to :code:`equals`
+    - **dump_calls**: The number of calls to :func:`ast.dump`
+    - **matches**: The number of matches yielded
+    - **cache_hits**: The number of times matches were served from a cache
+      instead of being matched
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    nodes_visited: int = 0
+    equals_calls: int = 0
+    dump_calls: int = 0
+    matches: int = 0
+    cache_hits: int = 0
+
+    def merge(self, other: 'SubstructureStats') -> None:
+        """Adds the statistics of other to these statistics"""
+        for f in fields(self):
+            setattr(self, f.name,
+                    getattr(self, f.name) + getattr(other, f.name))
+
+
+class ProfileStats:
+    """
+    Statistics of matching substructures, keyed by substructure name.
+
+    Defines the following instance variables:
+    - **submissions**: The number of submissions profiled
+    - **substructures**: A dict of substructure names to their
+      :class:`SubstructureStats`
+    """
+
+    def __init__(self):
+        self.submissions = 0
+        self.substructures: dict[str, SubstructureStats] = {}
+
+    def __getitem__(self, substructure: type[Substructure] | str):
+        """Returns the statistics of a substructure or substructure name"""
+        if not isinstance(substructure, str):
+            substructure = substructure.name
+        try:
+            return self.substructures[substructure]
+        except KeyError:
+            stats = self.substructures[substructure] = SubstructureStats()
+            return stats
+
+    def profile(
+            self,
+            code: CodeModule | str,
+            substructures: Iterable[type[Substructure]],
+    ) -> list[Match]:
+        """
+        Returns the matches of all substructures in the given code, recording
+        the statistics of each substructure as one submission.
+
+        :param code: The code to be parsed
+        :param substructures: The substructures to match
+
+        :raises SyntaxError: If the given code cannot be parsed.
+        """
+        if not isinstance(code, CodeModule):
+            code = CodeModule(code)
+        self.submissions += 1
+        matches = []
+        for substructure in substructures:
+            with self.record(substructure) as stats:
+                found = list(substructure.iter_matches(code))
+            stats.matches += len(found)
+            matches += found
+        return matches
+
+    @contextmanager
+    def record(
+            self,
+            substructure: type[Substructure],
+    ) -> Iterator[SubstructureStats]:
+        """
+        Records the time spent, nodes visited and helper calls made in the
+        with block as one call of the given substructure. Yields the
+        substructure's statistics so other counts (e.g. matches) can be
+        added.
+        """
+        stats = self[substructure]
+        with _recording(stats):
+            start = time.perf_counter()
+            try:
+                yield stats
+            finally:
+                stats.seconds += time.perf_counter() - start
+                stats.calls += 1
+
+    def merge(self, other: 'ProfileStats') -> None:
+        """Adds the statistics of other to these statistics"""
+        self.submissions += other.submissions
+        for name, stats in other.substructures.items():
+            self[name].merge(stats)
+
+    def as_dict(self) -> dict:
+        """Returns the statistics as a dict that can be serialised to JSON"""
+        return {
+            'submissions': self.submissions,
+            'substructures': {
+                name: asdict(stats)
+                for name, stats in self.substructures.items()
+            },
+        }
+
+    def format_table(self, sort_by: str = 'seconds') -> str:
+        """
+        Returns the statistics of each substructure as a plain text table,
+        sorted by the given field in descending order.
+        """
+        names = [f.name for f in fields(SubstructureStats)]
+        rows = sorted(
+            self.substructures.items(),
+            key=lambda item: getattr(item[1], sort_by),
+            reverse=True,
+        )
+        width = max([len('substructure'), *(len(name) for name, _ in rows)])
+        lines = [f"{'substructure':<{width}}"
+                 + ''.join(f' {name:>13}' for name in names)]
+        for name, stats in rows:
+            values = (getattr(stats, field_name) for field_name in names)
+            lines.append(f'{name:<{width}}' + ''.join(
+                f' {value:>13.6f}' if isinstance(value, float)
+                else f' {value:>13}'
+                for value in values
+            ))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return (f'ProfileStats(submissions={self.submissions}, '
+                f'substructures={self.substructures!r})')
@@ -12,6 +12,12 @@ This module also includes two constants:
 These tuples cannot be guaranteed to be stable between versions and should not
 be relied on.
 
+:func:`any_present` checks whether any of several substructures are present,
+stopping at the first match. :func:`iter_all_matches` iterates over the
+matches of several substructures in source order, optionally stopping after a
+number of matches. :class:`CheckerPlan` precomputes the work of matching a
+fixed set of substructures so it can be reused across many modules.
+
 A subsets class attribute identifies subset substructures whose matches are
 subsets of other substructures. This attribute has been deprecated since
 version 1.1.1
@@ -22,13 +28,18 @@ from inspect import isabstract as _isabstract
 from ._base import Substructure
 from ._ast_substructures import *
 from ._cst_substructures import *
+from ._runner import *
+from ._plan import *
+# Enables helper counters if requested by the environment
+from . import _instrument
 
 # Experience shows these substructures are 'annoying' and should not be
 # lumped in with all the other substructures. These will likely be removed in
 # future versions.
 _unnecessary_substructures = [
-    # Removed because this has such a low threshold to be annoying and unhelpful
-    # for anything larger than a simple function. Has been marked as deprecated
+    # Removed because this has such a low threshold to be annoying and
+    # unhelpful for anything larger than a simple function. Has been marked
+    # as deprecated
     DuplicateExpression,
 ]
 
@@ -60,11 +60,72 @@ _COMPLIMENT_OPS = {
 }
 _COMPLIMENT_OPS |= {v: k for k, v in _COMPLIMENT_OPS.items()}
 
+# The statement types that is_nop can be True for
+_NOP_TYPES = (Expr, Pass, Assign, AnnAssign)
+
+
+@dataclass(frozen=True, slots=True)
+class _IfShape:
+    """
+    Cheap structural discriminators of an If node, used to route it only to
+    the substructures that can match it. Lengths of two or more are
+    collapsed so similar nodes share a shape.
+
+    Defines the following instance variables:
+    - **body_len**: The length of the body, 1 or 2 for two or more
+    - **orelse_len**: The length of orelse, 0, 1, or 2 for two or more
+    - **lengths**: The sign of the difference of the body and orelse lengths
+    - **body_first**, **body_last**: The types of the first and last
+      statements of the body
+    - **orelse_first**, **orelse_last**: The types of the first and last
+      statements of orelse, or None if there is no orelse
+    """
+    body_len: int
+    orelse_len: int
+    lengths: int
+    body_first: type[stmt]
+    body_last: type[stmt]
+    orelse_first: type[stmt] | None
+    orelse_last: type[stmt] | None
+
+    @classmethod
+    def of(cls, node: If) -> '_IfShape':
+        body, orelse = node.body, node.orelse
+        return cls(
+            min(len(body), 2),
+            min(len(orelse), 2),
+            (len(body) > len(orelse)) - (len(body) < len(orelse)),
+            type(body[0]),
+            type(body[-1]),
+            type(orelse[0]) if orelse else None,
+            type(orelse[-1]) if orelse else None,
+        )
+
+
+# Functions classifying nodes of each type into hashable shapes that are
+# passed to ASTSubstructure._accepts_shape
+_NODE_SHAPES = {
+    If: _IfShape.of,
+}
+
 
 class ASTSubstructure(Substructure, abc.ABC):
     # TODO - Deprecated, remove in 2.0.0
     subsets: list['ASTSubstructure'] = []
 
+    _module_scoped = False
+
+    # The types of nodes whose descendants are not passed to _match_node
+    _excluding: tuple[type[AST], ...] = ()
+
+    @classmethod
+    @property
+    @abc.abstractmethod
+    def _node_types(cls) -> tuple[type[AST], ...]:
+        """
+        The types of nodes passed to _match_node
+        """
+
     @classmethod
     def iter_matches(cls, code: CodeModule | str) -> Iterator[Match]:
         # All problems in computer science
@@ -79,9 +140,42 @@ class ASTSubstructure(Substructure, abc.ABC):
         yield from cls._iter_matches(module)
 
     @classmethod
-    @abc.abstractmethod
     def _iter_matches(cls, module: Module) -> Iterator[Match]:
         """Iterates over matches found in the AST"""
+        for node in nodes_of_class(
+                module, cls._node_types, excluding=cls._excluding,
+        ):
+            for from_node, to_node in cls._match_node(node, module):
+                yield cls._make_match(from_node, to_node)
+
+    @classmethod
+    @abc.abstractmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        """
+        Iterates over the (from_node, to_node) spans of matches found at the
+        given node of one of the _node_types. module is the module, or list of
+        nodes, being matched.
+        """
+
+    @classmethod
+    def _accepts_shape(cls, shape) -> bool:
+        """
+        Returns False if _match_node cannot match any node with the given
+        shape, as classified by _NODE_SHAPES. Lets nodes be routed only to the
+        substructures that can match them.
+        """
+        return True
+
+    @classmethod
+    def _iter_partial_matches(
+            cls,
+            code: CodeModule,
+            ast_nodes: list[AST],
+            cst_nodes: list[Any],
+    ) -> Iterator[Match]:
+        if cls._module_scoped:
+            raise ValueError(f'{cls.__name__} can only match whole modules')
+        yield from cls._iter_matches(ast_nodes)
 
     @classmethod
     @deprecated(
@@ -114,12 +208,17 @@ class UnnecessaryElif(ASTSubstructure):
     name = "Unnecessary Elif"
     technical_description = "If(cond)[..] Elif(!cond)[..]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(test=t1, orelse=[If(test=t2)]) if compliments(t1, t2):
-                    yield cls._make_match(node)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return shape.orelse_len == 1 and shape.orelse_first is If
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(test=t1, orelse=[If(test=t2)]) if compliments(t1, t2):
+                yield node, node
 
 
 class IfElseReturnBool(ASTSubstructure):
@@ -127,31 +226,38 @@ class IfElseReturnBool(ASTSubstructure):
     name = "If/Else Return Bool"
     technical_description = "If(..)[Return bool] Else[Return !bool]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(
-                    body=[Return(Constant(c1))],
-                    orelse=[Return(Constant(c2))],
-                ) if compliment_bools(c1, c2):
-                    yield cls._make_match(node)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return (shape.body_len == shape.orelse_len == 1
+                and shape.body_first is shape.orelse_first is Return)
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(
+                body=[Return(Constant(c1))],
+                orelse=[Return(Constant(c2))],
+            ) if compliment_bools(c1, c2):
+                yield node, node
 
 
 class IfReturnBool(ASTSubstructure):
     name = "If Return Bool"
     technical_description = "If(..)[Return bool], Return !bool"
 
+    _node_types = (FunctionDef,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, FunctionDef):
-            match node.body:
-                case [
-                    *_,
-                    If(body=[Return(Constant(v1))]) as start,
-                    Return(Constant(v2)) as end
-                ] if compliment_bools(v1, v2):
-                    yield cls._make_match(start, end)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node.body:
+            case [
+                *_,
+                If(body=[Return(Constant(v1))]) as start,
+                Return(Constant(v2)) as end
+            ] if compliment_bools(v1, v2):
+                yield start, end
 
 
 class IfElseAssignBoolReturn(ASTSubstructure):
@@ -159,17 +265,18 @@ class IfElseAssignBoolReturn(ASTSubstructure):
     name = "If/Else Assign Bool Return"
     technical_description = "If(..)[name=bool] Else[name=!bool], Return name"
 
+    _node_types = (FunctionDef,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, FunctionDef):
-            match node.body:
-                case [
-                    *_,
-                    If(body=[Assign([Name(n1)], Constant(v1))],
-                       orelse=[Assign([Name(n2)], Constant(v2))]) as start,
-                    Return(Name(n3)) as end,
-                ] if (n1 == n2 == n3 and compliment_bools(v1, v2)):
-                    yield cls._make_match(start, end)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node.body:
+            case [
+                *_,
+                If(body=[Assign([Name(n1)], Constant(v1))],
+                   orelse=[Assign([Name(n2)], Constant(v2))]) as start,
+                Return(Name(n3)) as end,
+            ] if (n1 == n2 == n3 and compliment_bools(v1, v2)):
+                yield start, end
 
 
 class IfElseAssignReturn(ASTSubstructure):
@@ -179,25 +286,26 @@ class IfElseAssignReturn(ASTSubstructure):
     # TODO - Deprecated, remove in 2.0.0
     subsets = [IfElseAssignBoolReturn]
 
+    _node_types = (FunctionDef,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, FunctionDef):
-            match node.body:
-                case [
-                    *_,
-                    If(
-                        body=[Assign([Name(n1)])
-                              | AnnAssign(Name(n1))
-                              | AugAssign(Name(n1))],
-                        orelse=[Assign([Name(n2)])
-                                | AnnAssign(Name(n2))
-                                | AugAssign(Name(n2))],
-                    ) as start,
-                    Return(Name(id=n3)) as end,
-                ] if (n1 == n2 == n3):
-                    match = cls._make_match(start, end)
-                    if not cls._match_collides_with_subset(module, match):
-                        yield match
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node.body:
+            case [
+                *_,
+                If(
+                    body=[Assign([Name(n1)])
+                          | AnnAssign(Name(n1))
+                          | AugAssign(Name(n1))],
+                    orelse=[Assign([Name(n2)])
+                            | AnnAssign(Name(n2))
+                            | AugAssign(Name(n2))],
+                ) as start,
+                Return(Name(id=n3)) as end,
+            ] if (n1 == n2 == n3):
+                match = cls._make_match(start, end)
+                if not cls._match_collides_with_subset(module, match):
+                    yield start, end
 
 
 class IfElseAssignBool(ASTSubstructure):
@@ -206,53 +314,74 @@ class IfElseAssignBool(ASTSubstructure):
     # TODO - Deprecated, remove in 2.0.0
     subsets = [IfElseAssignBoolReturn]
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(
-                    body=[Assign([Name(n1)], Constant(v1))],
-                    orelse=[Assign([Name(n2)], Constant(v2))],
-                ) if (n1 == n2 and compliment_bools(v1, v2)):
-                    match = cls._make_match(node)
-                    if not cls._match_collides_with_subset(module, match):
-                        yield match
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return (shape.body_len == shape.orelse_len == 1
+                and shape.body_first is shape.orelse_first is Assign)
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(
+                body=[Assign([Name(n1)], Constant(v1))],
+                orelse=[Assign([Name(n2)], Constant(v2))],
+            ) if (n1 == n2 and compliment_bools(v1, v2)):
+                match = cls._make_match(node)
+                if not cls._match_collides_with_subset(module, match):
+                    yield node, node
 
 
 class EmptyIfBody(ASTSubstructure):
     name = "Empty If Body"
     technical_description = "If(..)[Pass|Constant|name=name]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(body=[body]) if is_nop(body):
-                    yield cls._make_match(node, body)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return shape.body_len == 1 and shape.body_first in _NOP_TYPES
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(body=[body]) if is_nop(body):
+                yield node, body
 
 
 class EmptyElseBody(ASTSubstructure):
     name = "Empty Else Body"
     technical_description = "If(..)[..] Else[Pass|Constant|name=name]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(orelse=[body]) if is_nop(body):
-                    yield cls._make_match(node, body)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return shape.orelse_len == 1 and shape.orelse_first in _NOP_TYPES
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(orelse=[body]) if is_nop(body):
+                yield node, body
 
 
 class NestedIf(ASTSubstructure):
     name = "Nested If"
     technical_description = "If(..)[If(..)[..]]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(body=[If(orelse=[]) as inner]):
-                    yield cls._make_match(node, inner)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return shape.body_len == 1 and shape.body_first is If
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(body=[If(orelse=[]) as inner]):
+                yield node, inner
 
 
 class UnnecessaryElse(ASTSubstructure):
@@ -260,28 +389,41 @@ class UnnecessaryElse(ASTSubstructure):
     name = "Unnecessary Else"
     technical_description = "If(..)[*.., stmts] Else[stmts]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(body=b1, orelse=b2) if (
-                        match_ends(b1, b2) == len(b2)
-                        and len(b2) >= 1
-                        and not equals(b1, b2)
-                ):
-                    yield cls._make_match(node)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return (shape.orelse_len >= 1 and shape.lengths >= 0
+                and shape.body_last is shape.orelse_last)
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(body=b1, orelse=b2) if (
+                    match_ends(b1, b2) == len(b2)
+                    and len(b2) >= 1
+                    and not equals(b1, b2)
+            ):
+                yield node, node
 
 
 class DuplicateIfElseBody(ASTSubstructure):
     name = "Duplicate If/Else Body"
     technical_description = "If(..)[body] Else[body]"
 
+    _node_types = (If,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, If):
-            match node:
-                case If(body=b1, orelse=b2) if equals(b1, b2):
-                    yield cls._make_match(node)
+    def _accepts_shape(cls, shape: _IfShape) -> bool:
+        return (shape.lengths == 0
+                and shape.body_first is shape.orelse_first
+                and shape.body_last is shape.orelse_last)
+
+    @classmethod
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case If(body=b1, orelse=b2) if equals(b1, b2):
+                yield node, node
 
 
 class AugmentableAssignment(ASTSubstructure):
@@ -293,21 +435,22 @@ class AugmentableAssignment(ASTSubstructure):
     name = "Augmentable Assignment"
     technical_description = "name = name Op() .. | .. [+*] name"
 
+    _node_types = (Assign,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, Assign):
-            match node:
-                case Assign(
-                    targets=[Name(n1)],
-                    value=BinOp(Name(n2))
-                ) if n1 == n2:
-                    yield cls._make_match(node)
-                # ToDo – depending on type may not be commutative
-                case Assign(
-                    targets=[Name(n1)],
-                    value=BinOp(op=Add() | Mult(), right=Name(n2))
-                ) if n1 == n2:
-                    yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case Assign(
+                targets=[Name(n1)],
+                value=BinOp(Name(n2))
+            ) if n1 == n2:
+                yield node, node
+            # ToDo – depending on type may not be commutative
+            case Assign(
+                targets=[Name(n1)],
+                value=BinOp(op=Add() | Mult(), right=Name(n2))
+            ) if n1 == n2:
+                yield node, node
 
 
 @deprecated(
@@ -324,6 +467,8 @@ class DuplicateExpression(ASTSubstructure):
         "Module contains two expressions with more than 8 names, literals, "
         "or operators. Operators have twice the weight of other tokens."
     )
+    _module_scoped = True
+    _node_types = (Module,)
 
     @classmethod
     @deprecated(
@@ -332,15 +477,15 @@ class DuplicateExpression(ASTSubstructure):
         "a simple function. Will be removed in future versions.",
         version="0.0.0a4",
     )
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
         # ToDo - Probably better if this just checks for a match in
         #  function definitions or is otherwise limited to local scopes
-        expressions = nodes_of_class(module, expr)
+        expressions = nodes_of_class(node, expr)
         expressions = [n for n in expressions if weight(n) >= 8]
         for ex1, ex2 in combinations(expressions, 2):
             if equals(ex1, ex2):
-                yield cls._make_match(ex1)
-                yield cls._make_match(ex2)
+                yield ex1, ex1
+                yield ex2, ex2
 
 
 class MissedAbsoluteValue(ASTSubstructure):
@@ -351,76 +496,82 @@ class MissedAbsoluteValue(ASTSubstructure):
 
     _inequalities = (Gt, Lt), (Lt, Gt), (GtE, LtE), (LtE, GtE), (NotEq, NotEq)
 
+    _node_types = (BoolOp,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, BoolOp):
-            match node:
-                case BoolOp(
-                    op=op,
-                    values=[Compare(Name(n1), [op1], [v1]),
-                            Compare(Name(n2), [op2], [v2])]
-                ) if (n1 == n2 and negated_unary(v1, v2)):
-                    if (
-                            isinstance(op, Or)
-                            and isinstance(op1, Eq)
-                            and isinstance(op2, Eq)
-                    ):
-                        yield cls._make_match(node)
-                    if (
-                            isinstance(op, And)
-                            and (type(op1), type(op2)) in cls._inequalities
-                    ):
-                        yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case BoolOp(
+                op=op,
+                values=[Compare(Name(n1), [op1], [v1]),
+                        Compare(Name(n2), [op2], [v2])]
+            ) if (n1 == n2 and negated_unary(v1, v2)):
+                if (
+                        isinstance(op, Or)
+                        and isinstance(op1, Eq)
+                        and isinstance(op2, Eq)
+                ):
+                    yield node, node
+                if (
+                        isinstance(op, And)
+                        and (type(op1), type(op2)) in cls._inequalities
+                ):
+                    yield node, node
 
 
 class RepeatedAddition(ASTSubstructure):
     name = 'Repeated Addition'
     technical_description = 'val( + val)+'
 
+    _node_types = (BinOp,)
+    _excluding = (BinOp,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, BinOp, excluding=BinOp):
-            expression = simplify_expression(node)
-            if contains_duplicate_add(expression):
-                yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        expression = simplify_expression(node)
+        if contains_duplicate_add(expression):
+            yield node, node
 
 
 class RepeatedMultiplication(ASTSubstructure):
     name = 'Repeated Multiplication'
     technical_description = 'val( * val){2,}'
 
+    _node_types = (BinOp,)
+    _excluding = (BinOp,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, BinOp, excluding=BinOp):
-            expression = simplify_expression(node)
-            if contains_duplicate_mult(expression):
-                yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        expression = simplify_expression(node)
+        if contains_duplicate_mult(expression):
+            yield node, node
 
 
 class RedundantArithmetic(ASTSubstructure):
     name = 'Redundant Arithmetic'
     technical_description = '1 * x | x + 0 | x - 0 | x / 1 | +x'
 
+    _node_types = (BinOp, UnaryOp)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, BinOp):
-            match (node.left, node.op, node.right):
-                case ((Constant(0), Add(), _)
-                      | (_, Add(), Constant(0))
-                      | (_, Sub(), Constant(0))
-                      | (Constant(1), Mult(), _)
-                      | (_, Mult(), Constant(1))
-                      | (_, Pow(), Constant(1))
-                      | (_, Div(), Constant(1))):
-                    yield cls._make_match(node)
-                case (Name(n1), Div(), Name(n2)) if n1 == n2:
-                    yield cls._make_match(node)
-        for node in nodes_of_class(module, UnaryOp):
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case BinOp(left, op, right):
+                match (left, op, right):
+                    case ((Constant(0), Add(), _)
+                          | (_, Add(), Constant(0))
+                          | (_, Sub(), Constant(0))
+                          | (Constant(1), Mult(), _)
+                          | (_, Mult(), Constant(1))
+                          | (_, Pow(), Constant(1))
+                          | (_, Div(), Constant(1))):
+                        yield node, node
+                    case (Name(n1), Div(), Name(n2)) if n1 == n2:
+                        yield node, node
             # ToDo - check if there are weird edge cases that make
             #  this unnecessary
-            match node:
-                case UnaryOp(op=UAdd()):
-                    yield cls._make_match(node)
+            case UnaryOp(op=UAdd()):
+                yield node, node
 
 
 class RedundantNot(ASTSubstructure):
@@ -428,12 +579,13 @@ class RedundantNot(ASTSubstructure):
     name = 'Redundant Not'
     technical_description = 'not Compare'
 
+    _node_types = (UnaryOp,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, UnaryOp):
-            match node:
-                case UnaryOp(Not(), Compare(ops=[_], comparators=[_])):
-                    yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case UnaryOp(Not(), Compare(ops=[_], comparators=[_])):
+                yield node, node
 
 
 class RedundantComparison(ASTSubstructure):
@@ -442,14 +594,15 @@ class RedundantComparison(ASTSubstructure):
     name = 'Redundant Comparison'
     technical_description = 'expr == bool'
 
+    _node_types = (Compare,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, Compare):
-            match node:
-                case (Compare(left=Constant(val), ops=[Eq(), *_])
-                      | Compare(ops=[*_, Eq()], comparators=[*_, Constant(val)])
-                ) if isinstance(val, bool):
-                    yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case (Compare(left=Constant(val), ops=[Eq(), *_])
+                  | Compare(ops=[*_, Eq()], comparators=[*_, Constant(val)])
+            ) if isinstance(val, bool):
+                yield node, node
 
 
 class MergeableEqual(ASTSubstructure):
@@ -457,34 +610,36 @@ class MergeableEqual(ASTSubstructure):
     name = 'Mergeable Equal'
     technical_description = 'name == value or name == other_value'
 
+    _node_types = (BoolOp,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
         # ToDo - Consider chains of more than two
         # ToDo - consider value == name as well
-        for node in nodes_of_class(module, BoolOp):
-            match node:
-                case BoolOp(
-                    op=Or(),
-                    values=[
-                        Compare(Name(n1), [Eq()], [_]),
-                        Compare(Name(n2), [Eq()], [_])
-                    ]
-                ) if (n1 == n2):
-                    yield cls._make_match(node)
+        match node:
+            case BoolOp(
+                op=Or(),
+                values=[
+                    Compare(Name(n1), [Eq()], [_]),
+                    Compare(Name(n2), [Eq()], [_])
+                ]
+            ) if (n1 == n2):
+                yield node, node
 
 
 class RedundantFor(ASTSubstructure):
     name = 'Redundant For'
     technical_description = 'for _ in range(1|0):'
 
+    _node_types = (For,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, For):
-            match node:
-                case For(
-                    iter=Call(func=Name(id='range'), args=[Constant(v)]) as end
-                ) if v in (0, 1):
-                    yield cls._make_match(node, end)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case For(
+                iter=Call(func=Name(id='range'), args=[Constant(v)]) as end
+            ) if v in (0, 1):
+                yield node, end
 
 
 class NoOp(ASTSubstructure):
@@ -493,23 +648,27 @@ class NoOp(ASTSubstructure):
     # TODO - Deprecated, remove in 2.0.0
     subsets = [EmptyIfBody, EmptyElseBody]
 
+    _node_types = (Assign, AnnAssign, AugAssign)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, (Assign, AnnAssign)):
-            if is_nop(node):
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case Assign() | AnnAssign() if is_nop(node):
                 match = cls._make_match(node, node)
                 if not cls._match_collides_with_subset(module, match):
-                    yield match
-        for node in nodes_of_class(module, AugAssign):
-            match (node.op, node.value):
-                case ((Add(), Constant(0))
-                      | (Sub(), Constant(0))
-                      | (Mult(), Constant(1))
-                      | (Div(), Constant(1))
-                      | (Pow(), Constant(1))):
-                    match = cls._make_match(node, node)
-                    if not cls._match_collides_with_subset(module, match):
-                        yield match
+                    yield node, node
+            case AugAssign(op=op, value=value):
+                match (op, value):
+                    case ((Add(), Constant(0))
+                          | (Sub(), Constant(0))
+                          | (Mult(), Constant(1))
+                          | (Div(), Constant(1))
+                          | (Pow(), Constant(1))):
+                        match = cls._make_match(node, node)
+                        if not cls._match_collides_with_subset(
+                                module, match,
+                        ):
+                            yield node, node
 
 
 class Tautology(ASTSubstructure):
@@ -517,26 +676,27 @@ class Tautology(ASTSubstructure):
     technical_description = 'A statement that is always True ' \
                             '(excluding the True constant)'
 
+    _node_types = (BoolOp, Compare)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, (BoolOp, Compare)):
-            match node:
-                case BoolOp(
-                    op=Or(), values=[left, right]
-                ) if compliments(left, right):
-                    yield cls._make_match(node, node)
-                case BoolOp(
-                    op=Or(), values=values
-                ) if any(
-                    isinstance(v, Constant) and v.value is True for v in values
-                ):
-                    yield cls._make_match(node, node)
-                case Compare(
-                    left=Name(id=n1) | Constant(value=n1),
-                    ops=[Eq()] | [Is()],
-                    comparators=[Name(id=n2) | Constant(value=n2)],
-                ) if n1 == n2:
-                    yield cls._make_match(node, node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case BoolOp(
+                op=Or(), values=[left, right]
+            ) if compliments(left, right):
+                yield node, node
+            case BoolOp(
+                op=Or(), values=values
+            ) if any(
+                isinstance(v, Constant) and v.value is True for v in values
+            ):
+                yield node, node
+            case Compare(
+                left=Name(id=n1) | Constant(value=n1),
+                ops=[Eq()] | [Is()],
+                comparators=[Name(id=n2) | Constant(value=n2)],
+            ) if n1 == n2:
+                yield node, node
 
 
 class Contradiction(ASTSubstructure):
@@ -544,26 +704,27 @@ class Contradiction(ASTSubstructure):
     technical_description = 'A statement that is always False ' \
                             '(excluding the False constant)'
 
+    _node_types = (BoolOp, Compare)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, (BoolOp, Compare)):
-            match node:
-                case BoolOp(
-                    op=And(), values=[left, right]
-                ) if compliments(left, right):
-                    yield cls._make_match(node, node)
-                case BoolOp(
-                    op=And(), values=values
-                ) if any(
-                    isinstance(v, Constant) and v.value is False for v in values
-                ):
-                    yield cls._make_match(node, node)
-                case Compare(
-                    left=Name(id=n1) | Constant(value=n1),
-                    ops=[NotEq()] | [IsNot()],
-                    comparators=[Name(id=n2) | Constant(value=n2)],
-                ) if n1 == n2:
-                    yield cls._make_match(node, node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case BoolOp(
+                op=And(), values=[left, right]
+            ) if compliments(left, right):
+                yield node, node
+            case BoolOp(
+                op=And(), values=values
+            ) if any(
+                isinstance(v, Constant) and v.value is False for v in values
+            ):
+                yield node, node
+            case Compare(
+                left=Name(id=n1) | Constant(value=n1),
+                ops=[NotEq()] | [IsNot()],
+                comparators=[Name(id=n2) | Constant(value=n2)],
+            ) if n1 == n2:
+                yield node, node
 
 
 class WhileAsFor(ASTSubstructure):
@@ -575,27 +736,28 @@ class WhileAsFor(ASTSubstructure):
                             "is updated in the body, and it is updated by " \
                             "a constant amount"
 
+    _node_types = (While,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, While):
-            match node:
-                case While(
-                    test=Compare() as cmp,
-                    body=body,
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case While(
+                test=Compare() as cmp,
+                body=body,
+            ):
+                test_name_ids = {n.id for n in nodes_of_class(cmp, Name)}
+                possibly_updated = (
+                        {n.id for n in nodes_of_class(body, Name)
+                         if isinstance(n.ctx, Store)}
+                        | {n.id for n in names_with_attribute_calls(body)}
+                )
+                updated_by_constant = set(names_updated_by_constant(body))
+                if (
+                        len(test_name_ids & possibly_updated) == 1
+                        and len(test_name_ids & updated_by_constant) == 1
+                        and len(possibly_updated & updated_by_constant) == 1
                 ):
-                    test_name_ids = {n.id for n in nodes_of_class(cmp, Name)}
-                    possibly_updated = (
-                            {n.id for n in nodes_of_class(body, Name)
-                             if isinstance(n.ctx, Store)}
-                            | {n.id for n in names_with_attribute_calls(body)}
-                    )
-                    updated_by_constant = set(names_updated_by_constant(body))
-                    if (
-                            len(test_name_ids & possibly_updated) == 1
-                            and len(test_name_ids & updated_by_constant) == 1
-                            and len(possibly_updated & updated_by_constant) == 1
-                    ):
-                        yield cls._make_match(node)
+                    yield node, node
 
 
 class ForWithRedundantIndexing(ASTSubstructure):
@@ -606,25 +768,26 @@ class ForWithRedundantIndexing(ASTSubstructure):
                             "seq[target] AND seq, target, and seq[target] " \
                             "are not updated in the loop body"
 
+    _node_types = (For,)
+
     @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        for node in nodes_of_class(module, For):
-            match node:
-                case For(
-                    target=Name(id=target),
-                    iter=Call(
-                        func=Name(id='range'),
-                        args=[Call(func=Name(id='len'), args=[Name(id=seq)])]
-                    ),
-                    body=body,
-                ) if all_ctx_are_load(all_names_of(body, seq, target)):
-                    subscripts = [*subscripts_of(body, seq, target)]
-                    targets = [*all_names_of(body, target)]
-
-                    all_subs_load = all_ctx_are_load(subscripts)
-                    target_only_in_subs = len(subscripts) == len(targets)
-                    if all_subs_load and target_only_in_subs:
-                        yield cls._make_match(node)
+    def _match_node(cls, node: AST, module) -> Iterator[tuple[AST, AST]]:
+        match node:
+            case For(
+                target=Name(id=target),
+                iter=Call(
+                    func=Name(id='range'),
+                    args=[Call(func=Name(id='len'), args=[Name(id=seq)])]
+                ),
+                body=body,
+            ) if all_ctx_are_load(all_names_of(body, seq, target)):
+                subscripts = [*subscripts_of(body, seq, target)]
+                targets = [*all_names_of(body, target)]
+
+                all_subs_load = all_ctx_are_load(subscripts)
+                target_only_in_subs = len(subscripts) == len(targets)
+                if all_subs_load and target_only_in_subs:
+                    yield node, node
 
 
 def nodes_of_class(
@@ -634,8 +797,9 @@ def nodes_of_class(
         excluding: type | tuple[type, ...] = tuple(),
 ) -> Iterable:
     """
-    Yields nodes in the AST walk of the given cls type. Order is not guaranteed.
-    Does not include nodes that are the children of nodes of type excluding.
+    Yields nodes in the AST walk of the given cls type. Order is not
+    guaranteed. Does not include nodes that are the children of nodes of type
+    excluding.
     """
     if isinstance(node, Iterable):
         yield from chain.from_iterable(
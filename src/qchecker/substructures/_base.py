@@ -16,6 +16,11 @@ class Substructure(abc.ABC):
     Each substructure allows you to iterate, list, count, or check for the
     existence of a particular micro-antipattern in a code string.
     """
+    # Set for substructures whose matches depend on the whole module rather
+    # than on individual statements (e.g. comparing separate functions).
+    # Substructures that cannot match single statements are always matched
+    # in full
+    _module_scoped = True
 
     @classmethod
     @property
@@ -55,6 +60,23 @@ class Substructure(abc.ABC):
         :raises SyntaxError: If the given code cannot be parsed.
         """
 
+    @classmethod
+    def _iter_partial_matches(
+            cls,
+            code: CodeModule,
+            ast_nodes: list,
+            cst_nodes: list,
+    ) -> Iterator[Match]:
+        """
+        Iterates over matches found in the given top level statements of the
+        parsed module. ast_nodes and cst_nodes must be the AST and CST
+        representations of the same statements. Substructures that are not
+        module scoped must override this.
+
+        :raises ValueError: If the substructure is module scoped
+        """
+        raise ValueError(f'{cls.__name__} can only match whole modules')
+
     @classmethod
     def count_matches(cls, code: CodeModule | str) -> int:
         """
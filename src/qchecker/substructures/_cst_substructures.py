@@ -1,6 +1,6 @@
 import abc
 import ast
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable
 
 from libcst import *
 from libcst.metadata import PositionProvider, MetadataWrapper
@@ -18,7 +18,39 @@ __all__ = [
 ]
 
 
+class _StopTraversal(Exception):
+    """Raised by a _MatchVisitor to stop visiting once enough matches exist"""
+
+
+class _MatchVisitor(CSTVisitor):
+    """
+    A visitor that collects the (from, to) positions of matches in a
+    match_positions list. If limit is set, the traversal is stopped once
+    limit matches have been found.
+    """
+    METADATA_DEPENDENCIES = (PositionProvider,)
+
+    limit: int | None = None
+
+    def __init__(self):
+        super().__init__()
+        self.match_positions = []
+
+    def add_match(self, from_pos, to_pos):
+        self.match_positions.append((from_pos, to_pos))
+        if self.limit is not None and len(self.match_positions) >= self.limit:
+            raise _StopTraversal
+
+
 class CSTSubstructure(Substructure, abc.ABC):
+    _module_scoped = False
+
+    @classmethod
+    @property
+    @abc.abstractmethod
+    def _Visitor(cls) -> type[_MatchVisitor]:
+        """Visitor class that collects the positions of matches"""
+
     @classmethod
     def iter_matches(cls, code: CodeModule | str) -> Iterable[Match]:
         # All problems in computer science
@@ -30,9 +62,49 @@ class CSTSubstructure(Substructure, abc.ABC):
         yield from cls._iter_matches(module)
 
     @classmethod
-    @abc.abstractmethod
-    def _iter_matches(cls, module: MetadataWrapper) -> Iterable[Match]:
-        """Iterates over matches found in the CST"""
+    def is_present(cls, code: CodeModule | str) -> bool:
+        if isinstance(code, CodeModule):
+            module = code.cst
+        else:
+            module = MetadataWrapper(parse_module(code))
+        return next(cls._iter_matches(module, limit=1), None) is not None
+
+    @classmethod
+    def _iter_matches(
+            cls,
+            module: MetadataWrapper,
+            nodes: Iterable[CSTNode] = None,
+            limit: int = None,
+    ) -> Iterable[Match]:
+        """
+        Iterates over matches found in the CST. If nodes are given, only those
+        nodes of the wrapped module are visited. If limit is given, the
+        traversal stops once limit matches have been found.
+        """
+        v = cls._Visitor()
+        v.limit = limit
+        try:
+            if nodes is None:
+                module.visit(v)
+            else:
+                with v.resolve(module):
+                    for node in nodes:
+                        node.visit(v)
+        except _StopTraversal:
+            pass
+        yield from (cls._make_match(from_pos, to_pos)
+                    for from_pos, to_pos in v.match_positions)
+
+    @classmethod
+    def _iter_partial_matches(
+            cls,
+            code: CodeModule,
+            ast_nodes: list[ast.AST],
+            cst_nodes: list[CSTNode],
+    ) -> Iterable[Match]:
+        if cls._module_scoped:
+            raise ValueError(f'{cls.__name__} can only match whole modules')
+        yield from cls._iter_matches(code.cst, cst_nodes)
 
     @classmethod
     def _make_match(cls, from_pos, to_pos):
@@ -52,12 +124,7 @@ class ConfusingElse(CSTSubstructure):
     name = "Confusing Else"
     technical_description = "If(..)[..] Else[If(..)[..] Else[..]]"
 
-    class _Visitor(CSTVisitor):
-        METADATA_DEPENDENCIES = (PositionProvider,)
-
-        def __init__(self):
-            super().__init__()
-            self.match_positions = []
+    class _Visitor(_MatchVisitor):
 
         def visit_If(self, node: If) -> bool | None:
             match node:
@@ -69,27 +136,16 @@ class ConfusingElse(CSTSubstructure):
                     )
                 ):
                     pos = self.get_metadata(PositionProvider, inner)
-                    self.match_positions.append((pos, pos))
+                    self.add_match(pos, pos)
             return True
 
-    @classmethod
-    def _iter_matches(cls, module: Module) -> Iterable[Match]:
-        v = cls._Visitor()
-        module.visit(v)
-        yield from (cls._make_match(from_pos, to_pos)
-                    for from_pos, to_pos in v.match_positions)
-
 
 class ElseIf(CSTSubstructure):
+    # ToDo - Adjust end lineno and col offset
     name = 'Else If'
     technical_description = 'IF(..)[] Else[If()]'
 
-    class _Visitor(CSTVisitor):
-        METADATA_DEPENDENCIES = (PositionProvider,)
-
-        def __init__(self):
-            super().__init__()
-            self.match_positions = []
+    class _Visitor(_MatchVisitor):
 
         def visit_If(self, node: If) -> bool | None:
             match node:
@@ -102,29 +158,18 @@ class ElseIf(CSTSubstructure):
                 ):
                     from_pos = self.get_metadata(PositionProvider, orelse)
                     to_pos = self.get_metadata(PositionProvider, inner)
-                    self.match_positions.append((from_pos, to_pos))
+                    self.add_match(from_pos, to_pos)
             return True
 
-    @classmethod
-    def _iter_matches(cls, module: MetadataWrapper) -> Iterable[Match]:
-        # ToDo - Adjust end lineno and col offset
-        v = cls._Visitor()
-        module.visit(v)
-        yield from (cls._make_match(from_pos, to_pos)
-                    for from_pos, to_pos in v.match_positions)
-
 
 class DuplicateIfElseStatement(CSTSubstructure):
     name = "Duplicate If/Else Statement"
     technical_description = "If(..)[.., stmt] Else[.., stmt]"
 
-    class _Visitor(CSTVisitor):
-        METADATA_DEPENDENCIES = (PositionProvider,)
-
+    class _Visitor(_MatchVisitor):
         def __init__(self):
             super().__init__()
             self.parents = []
-            self.match_positions = []
 
         def visit_If(self, node: If) -> bool | None:
             match node:
@@ -139,32 +184,22 @@ class DuplicateIfElseStatement(CSTSubstructure):
                         and not equals(b1, b2)
                 ):
                     pos = self.get_metadata(PositionProvider, node)
-                    self.match_positions.append((pos, pos))
+                    self.add_match(pos, pos)
             self.parents.append(node)
             return True
 
         def leave_If(self, node: If):
             self.parents.pop()
 
-    @classmethod
-    def _iter_matches(cls, module: MetadataWrapper) -> Iterator[Match]:
-        v = cls._Visitor()
-        module.visit(v)
-        yield from (cls._make_match(from_pos, to_pos)
-                    for from_pos, to_pos in v.match_positions)
-
 
 class SeveralDuplicateIfElseStatements(CSTSubstructure):
     name = "Several Duplicate If/Else Statements"
     technical_description = "If(..)[.., *stmts] Else[.., *stmts]"
 
-    class _Visitor(CSTVisitor):
-        METADATA_DEPENDENCIES = (PositionProvider,)
-
+    class _Visitor(_MatchVisitor):
         def __init__(self):
             super().__init__()
             self.parents = []
-            self.match_positions = []
 
         def visit_If(self, node: If) -> bool | None:
             match node:
@@ -179,22 +214,13 @@ class SeveralDuplicateIfElseStatements(CSTSubstructure):
                         and not equals(b1, b2)
                 ):
                     pos = self.get_metadata(PositionProvider, node)
-                    self.match_positions.append((pos, pos))
+                    self.add_match(pos, pos)
             self.parents.append(node)
             return True
 
         def leave_If(self, node: If):
             self.parents.pop()
 
-    @classmethod
-    def _iter_matches(cls, module: Module) -> Iterator[Match]:
-        v = cls._Visitor()
-        module.visit(v)
-        yield from (
-            cls._make_match(from_pos, to_pos)
-            for from_pos, to_pos in v.match_positions
-        )
-
 
 def _dump(nodes: CSTNode | Iterable[CSTNode]):
     # ToDo - There has to be a better way of doing this
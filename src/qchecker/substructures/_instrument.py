@@ -0,0 +1,314 @@
+"""
+Hooks instrumenting the helper functions substructures spend most of their
+time in.
+
+Hooks replace the helpers in the modules that call them and are only
+installed while a :class:`qchecker.profiling.ProfileStats` is recording or
+helper counters are enabled. Otherwise the helpers are the original
+functions and cost nothing extra.
+
+Helper counters can be enabled with :func:`enable_counters` or by setting
+the QCHECKER_COUNTERS environment variable to 1 before importing qchecker.
+"""
+
+import ast
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from types import ModuleType
+from typing import Any
+
+from libcst import CSTNode, CSTVisitor
+
+from qchecker.substructures import _ast_substructures, _cst_substructures
+from qchecker.substructures._cst_substructures import _MatchVisitor
+
+__all__ = [
+    'COUNTERS_ENVIRONMENT_VARIABLE',
+    'HelperStats',
+    'enable_counters',
+    'disable_counters',
+    'counters_enabled',
+    'reset_counters',
+    'get_counters',
+]
+
+COUNTERS_ENVIRONMENT_VARIABLE = 'QCHECKER_COUNTERS'
+
+
+@dataclass(slots=True)
+class HelperStats:
+    """
+    Counters of a helper function.
+
+    Defines the following instance variables:
+    - **calls**: The number of calls, including recursive calls
+    - **seconds**: The time spent in the helper, including the helpers it
+      calls. Recursive calls are only timed once by the outermost call, and
+      the time of generators is the time spent iterating over them
+    - **dump_bytes**: The size of the UTF-8 encoded dump strings produced by
+      dump helpers
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    dump_bytes: int = 0
+
+    def merge(self, other: 'HelperStats') -> None:
+        """Adds the counters of other to these counters"""
+        for f in fields(self):
+            setattr(self, f.name,
+                    getattr(self, f.name) + getattr(other, f.name))
+
+
+def _count_one(*args, **kwargs) -> int:
+    return 1
+
+
+def _count_ast_node(node, *args, **kwargs) -> int:
+    # nodes_of_class recurses through its hook once per node visited
+    return isinstance(node, ast.AST)
+
+
+def _count_cst_nodes(nodes, *args, **kwargs) -> int:
+    # Dumps each node with ast.dump
+    return 1 if isinstance(nodes, CSTNode) else len(nodes)
+
+
+@dataclass(frozen=True, slots=True)
+class _Hook:
+    """
+    A helper function that is instrumented.
+
+    Defines the following instance variables:
+    - **module**: The module the helper is replaced in
+    - **name**: The name of the helper in the module
+    - **key**: The name the helper's counters are reported under, or None
+      if the helper is only counted while recording profiling statistics
+    - **recorded**: The SubstructureStats field incremented by each call
+      while recording, or None
+    - **count**: Returns the amount to increment the recorded field by for
+      the arguments of a call
+    - **dumps**: Whether the helper returns dump strings
+    - **generator**: Whether the helper returns a generator
+    """
+    module: ModuleType
+    name: str
+    key: str | None
+    recorded: str | None = None
+    count: Callable[..., int] = _count_one
+    dumps: bool = False
+    generator: bool = False
+
+
+_HOOKS = (
+    _Hook(_ast_substructures, 'nodes_of_class', 'ast.nodes_of_class',
+          'nodes_visited', _count_ast_node, generator=True),
+    _Hook(_ast_substructures, 'equals', 'ast.equals', 'equals_calls'),
+    _Hook(_ast_substructures, '_dump', 'ast._dump', dumps=True),
+    _Hook(_ast_substructures, 'dump', None, 'dump_calls'),
+    _Hook(_ast_substructures, 'compliments', 'ast.compliments'),
+    _Hook(_ast_substructures, 'match_ends', 'ast.match_ends'),
+    _Hook(_ast_substructures, 'simplify_expression',
+          'ast.simplify_expression'),
+    _Hook(_cst_substructures, 'equals', 'cst.equals', 'equals_calls'),
+    _Hook(_cst_substructures, '_dump', 'cst._dump', 'dump_calls',
+          _count_cst_nodes, dumps=True),
+    _Hook(_cst_substructures, 'match_ends', 'cst.match_ends'),
+)
+
+# The SubstructureStats being recorded in the current context
+_RECORDING: ContextVar[Any] = ContextVar('_RECORDING', default=None)
+
+_LOCK = threading.Lock()
+_hook_users = 0
+_counters_enabled = False
+_originals = {}
+# The counters of each thread, summed by get_counters
+_thread_counters: list[dict[str, HelperStats]] = []
+
+
+class _ThreadCounters(threading.local):
+    def __init__(self):
+        self.stats = {}
+        # The helpers being timed by an outer call in this thread
+        self.timing = set()
+        with _LOCK:
+            _thread_counters.append(self.stats)
+
+
+_local = _ThreadCounters()
+
+
+def enable_counters() -> None:
+    """Starts counting the calls of helper functions"""
+    global _counters_enabled
+    with _LOCK:
+        if _counters_enabled:
+            return
+        _counters_enabled = True
+        _acquire_hooks()
+
+
+def disable_counters() -> None:
+    """
+    Stops counting the calls of helper functions. Counters are kept until
+    reset.
+    """
+    global _counters_enabled
+    with _LOCK:
+        if not _counters_enabled:
+            return
+        _counters_enabled = False
+        _release_hooks()
+
+
+def counters_enabled() -> bool:
+    """Returns True if the calls of helper functions are being counted"""
+    return _counters_enabled
+
+
+def reset_counters() -> None:
+    """Resets the counters of all helper functions to zero"""
+    with _LOCK:
+        for stats in _thread_counters:
+            stats.clear()
+
+
+def get_counters() -> dict[str, HelperStats]:
+    """
+    Returns the counters of each helper function that has been called,
+    summed over all threads.
+    """
+    counters = {}
+    with _LOCK:
+        thread_counters = [dict(stats) for stats in _thread_counters]
+    for stats in thread_counters:
+        for key, helper_stats in stats.items():
+            counters.setdefault(key, HelperStats()).merge(helper_stats)
+    return counters
+
+
+@contextmanager
+def _recording(stats) -> Iterator[None]:
+    """
+    Counts the nodes visited and helper calls made in the current context
+    into the given SubstructureStats.
+    """
+    token = _RECORDING.set(stats)
+    with _LOCK:
+        _acquire_hooks()
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _release_hooks()
+        _RECORDING.reset(token)
+
+
+def _acquire_hooks() -> None:
+    """Installs hooks if they are not already installed. Requires _LOCK"""
+    global _hook_users
+    _hook_users += 1
+    if _hook_users > 1:
+        return
+    for hook in _HOOKS:
+        original = getattr(hook.module, hook.name)
+        _originals[hook] = original
+        setattr(hook.module, hook.name, _make_wrapper(hook, original))
+    _MatchVisitor.on_visit = _counting_on_visit
+
+
+def _release_hooks() -> None:
+    """Removes hooks once they are no longer used. Requires _LOCK"""
+    global _hook_users
+    _hook_users -= 1
+    if _hook_users:
+        return
+    for hook, original in _originals.items():
+        setattr(hook.module, hook.name, original)
+    _originals.clear()
+    del _MatchVisitor.on_visit
+
+
+def _make_wrapper(hook: _Hook, original: Callable) -> Callable:
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        if hook.recorded is not None:
+            stats = _RECORDING.get()
+            if stats is not None:
+                setattr(stats, hook.recorded,
+                        getattr(stats, hook.recorded)
+                        + hook.count(*args, **kwargs))
+        if not _counters_enabled or hook.key is None:
+            return original(*args, **kwargs)
+        return _call_counted(hook, original, args, kwargs)
+
+    return wrapper
+
+
+def _call_counted(hook: _Hook, original: Callable, args, kwargs):
+    local = _local
+    try:
+        stats = local.stats[hook.key]
+    except KeyError:
+        stats = local.stats[hook.key] = HelperStats()
+    stats.calls += 1
+    if hook.key in local.timing:
+        # Timed by an outer call
+        return original(*args, **kwargs)
+    if hook.generator:
+        return _timed_iter(hook.key, stats, original(*args, **kwargs))
+    local.timing.add(hook.key)
+    start = time.perf_counter()
+    try:
+        result = original(*args, **kwargs)
+    finally:
+        stats.seconds += time.perf_counter() - start
+        local.timing.discard(hook.key)
+    if hook.dumps:
+        stats.dump_bytes += _dump_bytes(result)
+    return result
+
+
+def _timed_iter(key: str, stats: HelperStats, iterator: Iterator):
+    local = _local
+    while True:
+        if key in local.timing:
+            # Iterated by an outer call
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        else:
+            local.timing.add(key)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.seconds += time.perf_counter() - start
+                local.timing.discard(key)
+        yield item
+
+
+def _dump_bytes(dumps: str | list[str]) -> int:
+    if isinstance(dumps, str):
+        return len(dumps.encode())
+    return sum(len(dump.encode()) for dump in dumps)
+
+
+def _counting_on_visit(self, node):
+    stats = _RECORDING.get()
+    if stats is not None:
+        stats.nodes_visited += 1
+    return CSTVisitor.on_visit(self, node)
+
+
+if os.environ.get(COUNTERS_ENVIRONMENT_VARIABLE, '') not in ('', '0'):
+    enable_counters()
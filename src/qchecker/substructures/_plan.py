@@ -0,0 +1,270 @@
+import ast
+from collections.abc import Iterable
+from contextlib import ExitStack
+
+import libcst
+from libcst import CSTNode, CSTVisitor, MetadataWrapper
+
+from qchecker.match import Match, TextRange
+from qchecker.parser import CodeModule
+from qchecker.substructures._ast_substructures import (
+    _NODE_SHAPES,
+    ASTSubstructure,
+)
+from qchecker.substructures._base import Substructure
+from qchecker.substructures._cst_substructures import (
+    CSTSubstructure,
+    _MatchVisitor,
+)
+
+__all__ = ['CheckerPlan']
+
+
+def _get_ast_node_types():
+    q = [ast.AST]
+    while q:
+        current = q.pop()
+        yield current
+        q.extend(current.__subclasses__())
+
+
+# Every AST node type, used to build dispatch tables
+_AST_NODE_TYPES = tuple(_get_ast_node_types())
+
+
+class CheckerPlan:
+    """
+    A reusable plan for matching a fixed set of substructures against many
+    modules.
+
+    The plan is built once and precomputes the work otherwise repeated for
+    each module and substructure:
+
+    - A dispatch table from AST node types to the substructures matching
+      them, so all AST substructures are matched in a single walk of the AST
+    - A routing table from the shapes of nodes, e.g. the lengths and
+      statement types of the body and orelse of an If, to the substructures
+      that can match nodes of that shape. Each node is classified once and
+      only passed to those substructures. Routes are added as new shapes are
+      seen
+    - The CST visitor classes of CST substructures and their metadata
+      dependencies, so all CST substructures are matched in a single
+      traversal of the CST
+    - Whether the AST and CST are needed, so code strings are only parsed
+      into the trees that are used
+    - The descriptions of each substructure. Changes to descriptions made
+      after the plan is built are not reflected in its matches
+
+    A plan holds no state between checks other than its routes and can be
+    shared between threads or sent to worker processes.
+    """
+
+    def __init__(self, substructures: Iterable[type[Substructure]]):
+        """
+        :param substructures: The substructures to match
+        """
+        self.substructures = tuple(substructures)
+        self._descriptions = {s: s.description for s in self.substructures}
+
+        dispatched = [
+            s for s in self.substructures
+            if issubclass(s, ASTSubstructure) and s._node_types
+        ]
+        self._dispatch = {
+            node_type: tuple(
+                s for s in dispatched if issubclass(node_type, s._node_types)
+            )
+            for node_type in _AST_NODE_TYPES
+        }
+        excluding = {s._excluding for s in dispatched if s._excluding}
+        self._classifiers = {
+            node_type: classify
+            for node_type, classify in _NODE_SHAPES.items()
+            if self._dispatch.get(node_type)
+        }
+        self._routes = {}
+        self._excluded_by = {
+            node_type: frozenset(
+                e for e in excluding if issubclass(node_type, e)
+            )
+            for node_type in _AST_NODE_TYPES
+        }
+        self._standalone = tuple(
+            s for s in self.substructures
+            if not issubclass(s, CSTSubstructure) and s not in dispatched
+        )
+        self._visitors = tuple(
+            s._Visitor for s in self.substructures
+            if issubclass(s, CSTSubstructure)
+        )
+        self.requires_ast = bool(dispatched or self._standalone)
+        self.requires_cst = bool(self._visitors)
+
+    def check(self, code: CodeModule | str) -> list[Match]:
+        """
+        Returns the matches of all substructures in the given code. Matches
+        are ordered by substructure and then in the order each substructure
+        finds them, as with :meth:`Substructure.list_matches`.
+
+        :param code:
+            The code to be parsed. Strings are only parsed into the trees
+            required by the plan's substructures.
+
+        :raises SyntaxError: If the given code cannot be parsed.
+        """
+        module, wrapper = self._parse(code)
+        matches = {s: [] for s in self.substructures}
+        if module is not None:
+            self._match_ast(module, matches)
+            for substructure in self._standalone:
+                matches[substructure] += substructure._iter_matches(module)
+        if wrapper is not None:
+            self._match_cst(wrapper, matches)
+        return [match for found in matches.values() for match in found]
+
+    def _parse(
+            self,
+            code: CodeModule | str,
+    ) -> tuple[ast.Module | None, MetadataWrapper | None]:
+        if isinstance(code, CodeModule):
+            return code.ast, code.cst
+        module = wrapper = None
+        if self.requires_ast:
+            try:
+                module = ast.parse(code)
+            except IndentationError as e:
+                raise SyntaxError from e
+        if self.requires_cst:
+            try:
+                wrapper = MetadataWrapper(libcst.parse_module(code))
+            except libcst.ParserSyntaxError as e:
+                raise SyntaxError from e
+        return module, wrapper
+
+    def _match_ast(
+            self,
+            module: ast.Module,
+            matches: dict[type[Substructure], list[Match]],
+    ) -> None:
+        # A pre-order walk, as with nodes_of_class, tracking which
+        # substructures are excluded by an ancestor of each node
+        stack = [(module, frozenset())]
+        while stack:
+            node, excluded = stack.pop()
+            node_type = type(node)
+            classify = self._classifiers.get(node_type)
+            if classify is None:
+                substructures = self._dispatch.get(node_type, ())
+            else:
+                substructures = self._route(node_type, classify(node))
+            for substructure in substructures:
+                if substructure._excluding in excluded:
+                    continue
+                matches[substructure] += (
+                    self._make_match(substructure, from_node, to_node)
+                    for from_node, to_node
+                    in substructure._match_node(node, module)
+                )
+            excluded |= self._excluded_by.get(node_type, frozenset())
+            stack.extend(
+                (child, excluded)
+                for child in reversed(list(ast.iter_child_nodes(node)))
+            )
+
+    def _route(
+            self,
+            node_type: type[ast.AST],
+            shape,
+    ) -> tuple[type[ASTSubstructure], ...]:
+        """
+        Returns the substructures that can match nodes of the given type and
+        shape
+        """
+        try:
+            return self._routes[shape]
+        except KeyError:
+            route = tuple(s for s in self._dispatch[node_type]
+                          if s._accepts_shape(shape))
+            # Routes are the same regardless of which thread adds them
+            self._routes[shape] = route
+            return route
+
+    def _match_cst(
+            self,
+            wrapper: MetadataWrapper,
+            matches: dict[type[Substructure], list[Match]],
+    ) -> None:
+        visitors = [visitor_type() for visitor_type in self._visitors]
+        with ExitStack() as stack:
+            for visitor in visitors:
+                stack.enter_context(visitor.resolve(wrapper))
+            wrapper.module.visit(_CompositeVisitor(visitors))
+        substructures = [s for s in self.substructures
+                         if issubclass(s, CSTSubstructure)]
+        for substructure, visitor in zip(substructures, visitors):
+            matches[substructure] += (
+                self._make_cst_match(substructure, from_pos, to_pos)
+                for from_pos, to_pos in visitor.match_positions
+            )
+
+    def _make_match(
+            self,
+            substructure: type[Substructure],
+            from_node: ast.AST,
+            to_node: ast.AST,
+    ) -> Match:
+        return Match(
+            substructure.name,
+            self._descriptions[substructure],
+            TextRange(
+                from_node.lineno,
+                from_node.col_offset,
+                to_node.end_lineno,
+                to_node.end_col_offset,
+            ),
+        )
+
+    def _make_cst_match(
+            self,
+            substructure: type[Substructure],
+            from_pos,
+            to_pos,
+    ) -> Match:
+        return Match(
+            substructure.name,
+            self._descriptions[substructure],
+            TextRange(
+                from_pos.start.line,
+                from_pos.start.column,
+                to_pos.end.line,
+                to_pos.end.column,
+            ),
+        )
+
+
+class _CompositeVisitor(CSTVisitor):
+    """
+    Visits a CST with several match visitors in one traversal. Match visitors
+    always visit the children of nodes.
+    """
+
+    def __init__(self, visitors: list[_MatchVisitor]):
+        super().__init__()
+        self.visitors = visitors
+
+    def on_visit(self, node: CSTNode) -> bool:
+        for visitor in self.visitors:
+            visitor.on_visit(node)
+        return True
+
+    def on_leave(self, original_node: CSTNode) -> None:
+        for visitor in self.visitors:
+            visitor.on_leave(original_node)
+
+    def on_visit_attribute(self, node: CSTNode, attribute: str) -> None:
+        for visitor in self.visitors:
+            visitor.on_visit_attribute(node, attribute)
+
+    def on_leave_attribute(self, original_node: CSTNode, attribute: str):
+        for visitor in self.visitors:
+            visitor.on_leave_attribute(original_node, attribute)
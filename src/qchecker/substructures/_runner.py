@@ -0,0 +1,165 @@
+import heapq
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from libcst import BaseStatement, SimpleStatementLine
+
+from qchecker.match import Match
+from qchecker.parser import CodeModule
+from qchecker.substructures._base import Substructure
+from qchecker.substructures._cst_substructures import CSTSubstructure
+
+__all__ = ['any_present', 'iter_all_matches']
+
+
+def any_present(
+        code: CodeModule | str,
+        substructures: Iterable[type[Substructure]],
+) -> bool:
+    """
+    Returns True if any of the given substructures are present in the given
+    code. Returns as soon as the first match is found: AST substructures are
+    checked first as they are the cheapest to match, and CST traversals are
+    stopped at their first match.
+
+    :param code:
+        The code to be parsed.
+
+        .. deprecated:: 1.1.0
+            String parameters will not be supported in future versions.
+            Wrap the code into a CodeModule instead.
+
+    :param substructures: The substructures to check for
+
+    :raises SyntaxError: If the given code cannot be parsed.
+    """
+    if not isinstance(code, CodeModule):
+        code = CodeModule(code)
+    substructures = sorted(
+        substructures, key=lambda s: issubclass(s, CSTSubstructure),
+    )
+    return any(substructure.is_present(code) for substructure in substructures)
+
+
+def iter_all_matches(
+        code: CodeModule | str,
+        substructures: Iterable[type[Substructure]],
+        *,
+        limit: int = None,
+        limit_per_substructure: int = None,
+) -> Iterator[Match]:
+    """
+    Iterates over the matches of all given substructures in source order,
+    i.e. by the position of the start of each match. Matches starting at the
+    same position are ordered by the order substructures are given in.
+
+    The module is matched one top level statement at a time, so when limits
+    are given, no more statements are matched once enough matches have been
+    found, and CST traversals of a statement stop once a substructure has
+    found its remaining matches. Substructures that match the whole module
+    (e.g. :class:`DuplicateExpression`) are always matched in full.
+
+    :param code:
+        The code to be parsed.
+
+        .. deprecated:: 1.1.0
+            String parameters will not be supported in future versions.
+            Wrap the code into a CodeModule instead.
+
+    :param substructures: The substructures to match
+    :param limit: The maximum number of matches to yield. If not given, all
+        matches are yielded
+    :param limit_per_substructure: The maximum number of matches to yield for
+        each substructure. If not given, all matches of each substructure are
+        yielded
+
+    :raises SyntaxError: If the given code cannot be parsed.
+    """
+    if not isinstance(code, CodeModule):
+        code = CodeModule(code)
+    # Matches are merged as (position, index, match) so that ties are broken
+    # by the index of their substructure in the given order
+    substructures = tuple(substructures)
+    order = {}
+    for i, substructure in enumerate(substructures):
+        order.setdefault(substructure, i)
+    streams = [
+        _iter_statement_matches(
+            code,
+            [s for s in substructures if not s._module_scoped],
+            order,
+            limit_per_substructure,
+        ),
+    ]
+    for substructure in substructures:
+        if substructure._module_scoped:
+            matches = sorted(substructure.iter_matches(code), key=_position)
+            streams.append([
+                (_position(match), order[substructure], match)
+                for match in matches[:limit_per_substructure]
+            ])
+    merged = heapq.merge(*streams, key=lambda entry: entry[:2])
+    yield from (match for _, _, match in islice(merged, limit))
+
+
+def _iter_statement_matches(
+        code: CodeModule,
+        substructures: list[type[Substructure]],
+        order: dict[type[Substructure], int],
+        limit_per_substructure: int | None,
+) -> Iterator[tuple[tuple[int, int], int, Match]]:
+    """
+    Iterates over the (position, index, match) entries of the matches of
+    substructures in source order, matching one top level statement at a
+    time. Matches are sorted within each statement as substructures do not
+    necessarily find matches in source order.
+    """
+    remaining = dict.fromkeys(substructures, limit_per_substructure)
+    for ast_nodes, cst_node in _iter_top_level_statements(code):
+        if not remaining:
+            return
+        entries = []
+        for substructure, count in list(remaining.items()):
+            if count is not None and issubclass(substructure,
+                                                CSTSubstructure):
+                # CST traversals visit nodes in source order, so can stop
+                # once the remaining matches have been found
+                found = substructure._iter_matches(
+                    code.cst, [cst_node], limit=count,
+                )
+            else:
+                found = substructure._iter_partial_matches(
+                    code, ast_nodes, [cst_node],
+                )
+            found = sorted(found, key=_position)
+            if count is not None:
+                found = found[:count]
+                remaining[substructure] = count - len(found)
+                if not remaining[substructure]:
+                    del remaining[substructure]
+            entries += (
+                (_position(match), order[substructure], match)
+                for match in found
+            )
+        yield from sorted(entries, key=lambda entry: entry[:2])
+
+
+def _iter_top_level_statements(
+        code: CodeModule,
+) -> Iterator[tuple[list, BaseStatement]]:
+    """
+    Yields the AST and CST nodes of each top level statement. A CST
+    statement line holding several small statements (e.g. :code:`a; b`)
+    corresponds to one AST statement for each small statement.
+    """
+    ast_nodes = iter(code.ast.body)
+    for cst_node in code.cst.module.body:
+        if isinstance(cst_node, SimpleStatementLine):
+            count = len(cst_node.body)
+        else:
+            count = 1
+        yield list(islice(ast_nodes, count)), cst_node
+
+
+def _position(match: Match) -> tuple[int, int]:
+    return match.text_range.from_line, match.text_range.from_offset
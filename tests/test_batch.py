@@ -0,0 +1,156 @@
+import io
+import json
+import shutil
+from textwrap import dedent
+
+import pytest
+
+from qchecker.batch import *
+from qchecker.substructures import *
+
+ONE = dedent('''
+def foo(x):
+    if x > 5:
+        return True
+    else:
+        return False
+''')
+TWO = dedent('''
+x = 1
+x = x + 1
+''')
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'student1').mkdir()
+    (tmp_path / 'student2' / 'venv').mkdir(parents=True)
+    (tmp_path / 'student1' / 'one.py').write_text(ONE)
+    (tmp_path / 'student1' / 'notes.txt').write_text(ONE)
+    (tmp_path / 'student2' / 'two.py').write_text(TWO)
+    (tmp_path / 'student2' / 'venv' / 'lib.py').write_text(ONE)
+    (tmp_path / 'student2' / 'broken.py').write_text('def (:')
+    return tmp_path
+
+
+def test_iter_source_paths(project):
+    paths = iter_source_paths(project, exclude=['*venv/*'])
+    assert [p.relative_to(project).as_posix() for p in paths] == [
+        'student1/one.py',
+        'student2/broken.py',
+        'student2/two.py',
+    ]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_check_project(project, workers):
+    paths = iter_source_paths(project, exclude=['*venv/*'])
+    results = check_project(paths, SUBSTRUCTURES, workers=workers)
+    results = {r.path: r for r in results}
+    assert len(results) == 3
+
+    broken = results[str(project / 'student2' / 'broken.py')]
+    assert broken.matches == [] and broken.error.startswith('SyntaxError')
+
+    assert aggregate_file_matches(results.values()) == {
+        IfElseReturnBool.name: 1,
+        AugmentableAssignment.name: 1,
+    }
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('profile', [False, True])
+def test_check_project_reports_errors_per_file(project, workers, profile):
+    deep = project / 'student2' / 'deep.py'
+    deep.write_text('x = ' + ' + '.join(['a'] * 2000) + '\n')
+    paths = iter_source_paths(project, exclude=['*venv/*'])
+    results = check_project(
+        paths, SUBSTRUCTURES, workers=workers, profile=profile,
+    )
+    results = {r.path: r for r in results}
+    assert len(results) == 4
+    assert results[str(deep)].error.startswith('RecursionError')
+    one = results[str(project / 'student1' / 'one.py')]
+    assert [m.id for m in one.matches] == [IfElseReturnBool.name]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_check_project_profile(project, workers):
+    paths = iter_source_paths(project, exclude=['*venv/*'])
+    results = list(check_project(
+        paths, [IfElseReturnBool], workers=workers, profile=True,
+    ))
+    stats = aggregate_file_stats(results)
+    assert stats.submissions == 2
+    assert stats[IfElseReturnBool].calls == 2
+    assert stats[IfElseReturnBool].matches == 1
+
+
+def test_read_source_with_mmap(project):
+    path = project / 'student1' / 'one.py'
+    assert read_source(path, use_mmap=True) == read_source(path) == ONE
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('fmt', ['zip', 'gztar'])
+def test_check_archive(project, tmp_path_factory, workers, fmt):
+    archive = shutil.make_archive(
+        tmp_path_factory.mktemp('archives') / 'submissions', fmt, project,
+    )
+    results = check_archive(
+        archive, SUBSTRUCTURES, exclude=['*venv/*'], workers=workers,
+    )
+    results = {r.path.removeprefix('./'): r for r in results}
+    assert sorted(results) == [
+        'student1/one.py', 'student2/broken.py', 'student2/two.py',
+    ]
+    assert results['student2/broken.py'].error.startswith('SyntaxError')
+    assert [m.id for m in results['student1/one.py'].matches] == [
+        IfElseReturnBool.name,
+    ]
+
+
+def test_iter_archive_members_from_stream(project, tmp_path):
+    archive = shutil.make_archive(tmp_path / 'submissions', 'gztar', project)
+    with open(archive, 'rb') as f:
+        stream = io.BufferedReader(io.BytesIO(f.read()))
+    members = dict(iter_archive_members(stream, include=['*two.py']))
+    assert members == {'./student2/two.py': TWO.encode()}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_run_batch_resumes_from_checkpoint(tmp_path, workers):
+    sources = [(f'submission{i}.py', (ONE if i % 2 else TWO).encode())
+               for i in range(7)]
+    sources.insert(3, ('broken.py', b'def (:'))
+
+    expected = tmp_path / 'expected.jsonl'
+    run_batch(sources, SUBSTRUCTURES, expected, tmp_path / 'expected.ckpt',
+              workers=workers, checkpoint_every=2)
+
+    def interrupted_sources():
+        yield from sources[:5]
+        raise KeyboardInterrupt
+
+    output = tmp_path / 'output.jsonl'
+    checkpoint = tmp_path / 'output.ckpt'
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(interrupted_sources(), SUBSTRUCTURES, output, checkpoint,
+                  workers=workers, checkpoint_every=2)
+    # Each checkpoint appends the sources checked since the last one
+    checkpoints = [json.loads(line)
+                   for line in checkpoint.read_text().splitlines()]
+    assert [len(c['processed']) for c in checkpoints] == [2, 2]
+    with open(output, 'ab') as f:
+        f.write(b'{"partial": ')
+    with open(checkpoint, 'a') as f:
+        f.write('{"processed": ["submission4.py"')
+
+    run_batch(sources, SUBSTRUCTURES, output, checkpoint,
+              workers=workers, checkpoint_every=2)
+    assert output.read_bytes() == expected.read_bytes()
+    # Resuming compacts the checkpoints of the interrupted run into one
+    checkpoints = [json.loads(line)
+                   for line in checkpoint.read_text().splitlines()]
+    assert [len(c['processed']) for c in checkpoints] == [4, 2, 2]
+    assert len(expected.read_bytes().splitlines()) == 8
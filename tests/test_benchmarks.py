@@ -0,0 +1,259 @@
+import ast
+import json
+import random
+import shutil
+import sys
+
+import pytest
+
+from benchmarks import (
+    baseline,
+    differential,
+    memory,
+    scaling,
+    substructures,
+)
+from benchmarks.corpus import *
+from qchecker.parser import CodeModule
+from qchecker import substructures as qchecker_substructures
+
+
+def test_generate_program_is_seeded():
+    assert generate_program(200, seed=1) == generate_program(200, seed=1)
+    assert generate_program(200, seed=1) != generate_program(200, seed=2)
+    assert generate_corpus((10, 100)) == generate_corpus((10, 100))
+
+
+@pytest.mark.parametrize('lines', [10, 100, 1000])
+def test_generate_program_size(lines):
+    code = generate_program(lines)
+    CodeModule(code)
+    assert lines <= code.count('\n') <= lines * 1.5 + 20
+
+
+def test_clean_programs_have_no_matches():
+    code = CodeModule(generate_program(500, density=0))
+    for substructure in qchecker_substructures.SUBSTRUCTURES:
+        assert substructure.list_matches(code) == []
+
+
+@pytest.mark.parametrize('name', [*PATTERNS, *TAIL_PATTERNS])
+def test_patterns_match_their_substructure(name):
+    substructure = getattr(qchecker_substructures, name)
+    code = CodeModule(generate_program(100, densities={name: 0.5}))
+    assert substructure.list_matches(code)
+
+
+def test_invalid_densities():
+    with pytest.raises(ValueError):
+        generate_program(10, densities={'NotASubstructure': 0.1})
+    with pytest.raises(ValueError):
+        generate_program(10, densities={'NoOp': 0.6, 'NestedIf': 0.6})
+
+
+def test_substructures_benchmark_runs():
+    results = substructures.run((10,), repeat=1)
+    assert results['corpus']['programs'] == 1
+    assert results['benchmarks']['match/CheckerPlan']['lines_per_s'] > 0
+    assert results['memory']
+
+
+def test_fit_exponent():
+    sizes = [10, 20, 40, 80]
+    assert scaling.fit_exponent(sizes, [n * 1e-6 for n in sizes]) \
+        == pytest.approx(1)
+    assert scaling.fit_exponent(sizes, [n ** 2 * 1e-6 for n in sizes]) \
+        == pytest.approx(2)
+    with pytest.raises(ValueError):
+        scaling.fit_exponent([10], [1e-6])
+
+
+@pytest.mark.parametrize('family', scaling.FAMILIES,
+                         ids=lambda family: family.name)
+def test_scaling_families_parse(family):
+    CodeModule(family.generate(family.sizes[0]))
+    for name in family.substructures:
+        assert hasattr(qchecker_substructures, name)
+
+
+def test_scaling_flags_super_linear_growth():
+    results = scaling.run(['elif_ladder'], sizes=(10, 20, 40, 80),
+                          repeat=1)
+    result = results['families']['elif_ladder']['substructures']
+    assert result['UnnecessaryElse']['sizes'] == [10, 20, 40, 80]
+    assert result['UnnecessaryElse']['super_linear']
+    assert 'elif_ladder/UnnecessaryElse' in results['flagged']
+    with pytest.raises(ValueError):
+        scaling.run(['not_a_family'])
+
+
+def _results(config=None, **lines_per_s):
+    return {
+        'config': {
+            'sizes': [100], 'seed': 0, 'density': 0.1, **(config or {}),
+        },
+        'benchmarks': {
+            name.replace('__', '/'): {
+                'median_s': 1 / lps, 'mad_s': noise / lps, 'lines_per_s': lps,
+            }
+            for name, (lps, noise) in lines_per_s.items()
+        },
+    }
+
+
+def test_compare_baseline():
+    before = _results(match__A=(100, 0), match__B=(100, 0.05),
+                      match__C=(100, 0), parse__D=(100, 0))
+    after = _results(match__A=(80, 0), match__B=(80, 0.05),
+                     match__C=(120, 0), parse__D=(50, 0))
+    comparisons = {c.name: c for c in baseline.compare(before, after)}
+    assert comparisons['match/A'].change == pytest.approx(-0.2)
+    assert comparisons['match/A'].regressed
+    # Noisy benchmarks need a larger change to regress
+    assert comparisons['match/B'].threshold > 0.2
+    assert not comparisons['match/B'].regressed
+    assert comparisons['match/C'].improved
+    assert comparisons['parse/D'].regressed
+    assert not comparisons['parse/D'].gated
+    assert not any(c.missing for c in comparisons.values())
+    with pytest.raises(ValueError):
+        baseline.compare(before, _results({'seed': 1}))
+
+
+def test_compare_baseline_missing_benchmarks(tmp_path, monkeypatch, capsys):
+    before = _results(match__A=(100, 0), parse__B=(100, 0))
+    after = _results(match__C=(100, 0))
+    comparisons = {c.name: c for c in baseline.compare(before, after)}
+    assert set(comparisons) == {'match/A', 'parse/B'}
+    assert comparisons['match/A'].missing and comparisons['match/A'].failed
+    assert comparisons['parse/B'].missing
+    assert not comparisons['parse/B'].failed
+
+    baseline.save_baseline(before, tmp_path / 'baseline.json')
+    (tmp_path / 'current.json').write_text(json.dumps(after))
+    monkeypatch.setattr(sys, 'argv', [
+        'baseline', 'compare', '--baseline', str(tmp_path / 'baseline.json'),
+        '--current', str(tmp_path / 'current.json'),
+    ])
+    with pytest.raises(SystemExit) as e:
+        baseline.main()
+    assert e.value.code == 1
+    assert '1 benchmarks missing: match/A' in capsys.readouterr().err
+
+
+def test_save_and_load_baseline(tmp_path):
+    results = _results(match__A=(100, 0))
+    baseline.save_baseline(results, tmp_path / '1.2.0.json')
+    baseline.save_baseline(results, tmp_path / '1.10.0.json')
+    assert baseline.latest_baseline(tmp_path) == tmp_path / '1.10.0.json'
+    baseline.save_baseline(results, tmp_path / '1.10.0+dev.json',
+                           '1.10.0+dev')
+    assert baseline.latest_baseline(tmp_path) == tmp_path / '1.10.0+dev.json'
+    assert baseline.load_baseline(tmp_path / '1.10.0+dev.json')['qchecker'] \
+        == '1.10.0+dev'
+    assert baseline.load_baseline(tmp_path / '1.2.0.json')['results'] \
+        == results
+    (tmp_path / 'other.json').write_text('{}')
+    with pytest.raises(ValueError):
+        baseline.load_baseline(tmp_path / 'other.json')
+    with pytest.raises(FileNotFoundError):
+        baseline.latest_baseline(tmp_path / 'missing')
+
+
+def test_stored_baseline_covers_substructures():
+    stored = baseline.load_baseline(baseline.latest_baseline())
+    for substructure in qchecker_substructures.SUBSTRUCTURES:
+        assert f'match/{substructure.__name__}' \
+            in stored['results']['benchmarks']
+
+
+def test_traced():
+    result, peak, retained = memory.traced(lambda: bytearray(2 ** 20))
+    assert len(result) == 2 ** 20
+    assert peak >= retained >= 2 ** 20
+    _, peak, retained = memory.traced(lambda: len(bytearray(2 ** 20)))
+    assert peak >= 2 ** 20 > retained
+
+
+def test_memory_benchmark_runs():
+    results = memory.run((100,), matches=(10,))
+    program, = results['programs'].values()
+    assert program['parse/code_module']['retained_bytes'] \
+        > program['parse/ast']['retained_bytes'] > 0
+    assert results['matches']['matches=10']['bytes_per_match'] > 0
+
+
+DIFFERENTIAL_CODE = """\
+def f(x):
+    y = 1
+    if x:
+        return True
+    else:
+        return False
+    z = 2
+    if x == x:
+        pass
+"""
+
+
+def test_differential_engines_agree():
+    inputs = [
+        *differential.corpus_inputs(4, 60, seed=3),
+        *differential.family_inputs(),
+        *differential.fuzz_inputs(4, seed=3),
+    ]
+    assert differential.run(inputs) == []
+
+
+def test_differential_submission_inputs(tmp_path):
+    (tmp_path / 'student').mkdir()
+    (tmp_path / 'student' / 'one.py').write_text(DIFFERENTIAL_CODE)
+    (tmp_path / 'student' / 'binary.py').write_bytes(b'\xff\xfe\x00')
+    (tmp_path / 'student' / 'skip.py').write_text('x = 1\n')
+    inputs = list(differential.path_inputs(tmp_path, exclude=['*skip.py']))
+    assert inputs == [(str(tmp_path / 'student' / 'one.py'),
+                       DIFFERENTIAL_CODE)]
+    archive = shutil.make_archive(tmp_path / 'submissions', 'zip',
+                                  tmp_path / 'student')
+    inputs = list(differential.archive_inputs(archive, exclude=['skip.py']))
+    assert inputs == [(f'{archive}:one.py', DIFFERENTIAL_CODE)]
+    assert differential.run(inputs) == []
+
+
+def _without_last_match(substructures):
+    return lambda code: differential.reference_matches(
+        code, substructures,
+    )[:-1]
+
+
+def _reversed(substructures):
+    return lambda code: differential.reference_matches(
+        code, substructures,
+    )[::-1]
+
+
+def test_differential_finds_and_shrinks_divergences():
+    engines = [
+        differential.Engine('dropped', _without_last_match, ordered=False),
+        differential.Engine('reversed', _reversed, ordered=True),
+        differential.Engine('unordered', _reversed, ordered=False),
+    ]
+    dropped, reordered = differential.run(
+        [('test', DIFFERENTIAL_CODE)], engines=engines,
+    )
+    assert dropped.engine == 'dropped'
+    assert dropped.missing == (('Empty If Body', 2, 4, 3, 12),)
+    assert dropped.code == 'def f(x):\n    if x == x:\n        pass\n'
+    assert reordered.engine == 'reversed'
+    assert reordered.code == dropped.code
+    assert reordered.reordered
+    assert not reordered.missing and not reordered.unexpected
+
+
+def test_differential_mutations_keep_code_valid():
+    rng = random.Random(0)
+    for _, code in differential.fuzz_inputs(20, mutations=10, seed=1):
+        ast.parse(code)
+    tree = ast.parse('x = 1')
+    assert differential.mutate(tree, rng)
+    assert ast.unparse(tree) != 'x = 1'
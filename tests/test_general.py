@@ -0,0 +1,303 @@
+import ast
+import asyncio
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from textwrap import dedent
+
+import pytest
+
+pytest.importorskip('flake8')
+pytest.importorskip('pylint')
+
+from qchecker.cache import ResultCache  # noqa: E402
+from qchecker.general import *  # noqa: E402
+from qchecker.general._process import _run_subprocess  # noqa: E402
+from qchecker.parser import CodeModule  # noqa: E402
+from qchecker.substructures import (  # noqa: E402
+    IfElseAssignBoolReturn,
+    IfElseReturnBool,
+    MergeableEqual,
+)
+
+CODES = [
+    'x=1\nimport os\n',
+    dedent('''
+    def foo( a ):
+        return a  # noqa
+    '''),
+    'import os  # noqa: F401\nx = 1;y=2\n',
+    '# flake8: noqa\nx=1\n',
+    'def foo(:\n',
+    '',
+    'x = 1\x0c\nimport os\n',
+    's = "a\u2028b"\nimport os\n',
+    'x = 1\rimport os\r\ny=2\n',
+]
+
+
+@pytest.mark.parametrize('code', CODES)
+def test_in_process_flake8_matches_subprocess(code):
+    assert (get_flake8_matches(code, in_process=True)
+            == get_flake8_matches(code))
+
+
+def test_flake8_runner_options():
+    runner = Flake8Runner(select=['F'])
+    match, = runner.get_matches(CODES[0])
+    assert match.id == 'flake8-F401'
+
+
+def test_batched_flake8_matches_each_code():
+    assert get_flake8_matches_batch(CODES, jobs=2) == [
+        get_flake8_matches(code) for code in CODES
+    ]
+
+
+def test_pylint_matches_multiple_errors():
+    matches = get_pylint_matches(CODES[0], ['W0611', 'C0103'])
+    assert [m.id for m in matches] == ['pylint-C0103', 'pylint-W0611']
+
+
+def test_pylint_does_not_swap_stdin():
+    stdin = sys.stdin
+    get_pylint_matches(CODES[0])
+    assert sys.stdin is stdin
+
+
+def test_pylint_runner_in_process_pool():
+    with ProcessPoolExecutor(2) as executor:
+        results = list(executor.map(get_pylint_matches, CODES))
+    assert results == [get_pylint_matches(code) for code in CODES]
+
+
+def test_pylint_runner_is_reusable():
+    runner = PylintRunner(['W0611'])
+    for code in CODES * 2:
+        assert runner.get_matches(code) == get_pylint_matches(code, ['W0611'])
+
+
+def test_pylint_pool_matches_in_order():
+    with PylintPool(2) as pool:
+        results = list(pool.map(CODES, ['W0611']))
+    assert results == [get_pylint_matches(code, ['W0611']) for code in CODES]
+
+
+def test_pylint_pool_recycles_after_max_tasks():
+    with PylintPool(1, max_tasks_per_worker=2) as pool:
+        pids = set()
+        for code in CODES[:5]:
+            assert pool.get_matches(code) == get_pylint_matches(code)
+            pids.add(pool.stats()[0].pid)
+        stats, = pool.stats()
+    assert stats.total_tasks == 5
+    assert stats.tasks == 1
+    assert stats.recycles == 2
+    assert len(pids) == 3
+    assert stats.throughput > 0
+
+
+def test_pylint_pool_recycles_on_memory_growth():
+    with PylintPool(1, max_rss_bytes=1) as pool:
+        list(pool.map(CODES[:3]))
+        stats, = pool.stats()
+    assert stats.recycles == 3
+    assert stats.rss_bytes > 0
+
+
+def test_closed_pylint_pool_rejects_tasks():
+    pool = PylintPool(1)
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.submit(CODES[0])
+
+
+def test_cached_general_checks(monkeypatch):
+    cache = ResultCache()
+    flake8 = get_flake8_matches(CODES[0], in_process=True, cache=cache)
+    pylint = get_pylint_matches(CODES[0], ['W0611'], cache=cache)
+    assert cache.cache_info().misses == 2
+
+    monkeypatch.setattr(
+        'qchecker.general._pylint_checks._get_runner',
+        lambda errors: pytest.fail('pylint was run'),
+    )
+    monkeypatch.setattr(
+        'qchecker.general._flake8_checks._get_default_runner',
+        lambda: pytest.fail('flake8 was run'),
+    )
+    assert get_flake8_matches(CODES[0], in_process=True, cache=cache) == flake8
+    assert get_pylint_matches(CODES[0], ['W0611'], cache=cache) == pylint
+    assert cache.cache_info().hits == 2
+
+
+def test_cache_keys_pylint_errors():
+    cache = ResultCache()
+    get_pylint_matches(CODES[0], ['W0611'], cache=cache)
+    matches = get_pylint_matches(CODES[0], ['C0103'], cache=cache)
+    assert [m.id for m in matches] == ['pylint-C0103']
+    assert cache.cache_info().misses == 2
+
+
+def test_results_cached_on_disk(tmp_path):
+    expected = get_pylint_matches(CODES[0], cache=ResultCache(
+        directory=tmp_path,
+    ))
+    cache = ResultCache(directory=tmp_path)
+    assert cache.get(ResultCache.key('unknown')) is None
+    assert get_pylint_matches(CODES[0], cache=cache) == expected
+    assert len(cache) == 1
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+OVERLAPPING_CODE = dedent('''
+def foo(x):
+    if x > 1:
+        return True
+    else:
+        return False
+
+
+def bar(x):
+    if x:
+        y = True
+    else:
+        y = False
+    print(y)
+    return x == 1 or x == 2
+
+
+def baz(x):
+    if x > 1:
+        return False
+    else:
+        return True
+
+
+def qux(x):
+    if x > 1:
+        return 1
+    elif x > 0:
+        return True
+    else:
+        return False
+
+
+def quux(x):
+    if x:
+        y = False
+    else:
+        y = True
+    return y
+
+
+def corge(x, a, b):
+    return x == len(a) or x == len(b)
+''')
+
+
+def test_combined_checker_skips_overlapping_substructures():
+    with CombinedChecker(
+            flake8=False, overlaps=[Overlap('R1714', (MergeableEqual,))],
+    ) as checker:
+        matches = checker.check(OVERLAPPING_CODE)
+    assert MergeableEqual not in checker.substructures
+    assert checker.skipped_substructures == (MergeableEqual,)
+    ids = [m.id for m in matches]
+    assert ids.count('pylint-R1714') == 1
+    assert MergeableEqual.name not in ids
+
+
+def test_combined_checker_keeps_partially_overlapping_substructures():
+    # pylint's R1703 misses elif branches and ifs returning or assigning
+    # False before True, and R1714 misses comparisons with calls
+    with CombinedChecker(flake8=False) as checker:
+        matches = checker.check(OVERLAPPING_CODE)
+    assert checker.skipped_substructures == ()
+    assert checker.disabled_messages == ('R1703', 'R1714')
+    ids = [m.id for m in matches]
+    assert 'pylint-R1703' not in ids and 'pylint-R1714' not in ids
+    assert ids.count(IfElseReturnBool.name) == 3
+    assert ids.count(IfElseAssignBoolReturn.name) == 1
+    assert ids.count(MergeableEqual.name) == 2
+
+
+def test_combined_checker_prefers_substructures():
+    with CombinedChecker(
+            flake8=False, prefer_substructures=True,
+    ) as checker:
+        matches = checker.check(OVERLAPPING_CODE)
+    assert checker.disabled_messages == ('R1703', 'R1714')
+    ids = [m.id for m in matches]
+    assert 'pylint-R1703' not in ids and 'pylint-R1714' not in ids
+    assert IfElseReturnBool.name in ids and MergeableEqual.name in ids
+
+
+def test_combined_checker_without_overlapping_pylint_errors():
+    checker = CombinedChecker(
+        [MergeableEqual], flake8=False, pylint_errors=['W0611'],
+    )
+    assert checker.substructures == (MergeableEqual,)
+    checker.close()
+
+
+def test_combined_checker_merges_results_by_position():
+    substructures = [IfElseReturnBool, MergeableEqual]
+    with CombinedChecker(
+            substructures, pylint_errors=['C0103', 'R1703'],
+    ) as checker:
+        matches = checker.check(OVERLAPPING_CODE)
+    code = CodeModule(OVERLAPPING_CODE)
+    expected = [
+        *get_pylint_matches(OVERLAPPING_CODE, ['C0103', 'R1703']),
+        *get_flake8_matches(OVERLAPPING_CODE, in_process=True),
+        *IfElseReturnBool.iter_matches(code),
+        *MergeableEqual.iter_matches(code),
+    ]
+    assert sorted(map(repr, matches)) == sorted(map(repr, expected))
+    positions = [(m.text_range.from_line, m.text_range.from_offset)
+                 for m in matches]
+    assert positions == sorted(positions)
+
+
+SLEEP_ARGS = [sys.executable, '-c', 'import time; time.sleep(30)']
+
+
+def test_async_flake8_matches_subprocess():
+    pool = AsyncFlake8Pool(2)
+    results = asyncio.run(pool.map(CODES))
+    assert results == [
+        GeneralCheckResult(get_flake8_matches(code)) for code in CODES
+    ]
+
+
+def test_async_flake8_timeout_kills_process(monkeypatch):
+    monkeypatch.setattr(
+        'qchecker.general._flake8_checks._STDIN_ARGS', SLEEP_ARGS,
+    )
+    start = time.perf_counter()
+    result = asyncio.run(get_flake8_matches_async('x = 1', timeout=0.5))
+    assert result == GeneralCheckResult([], timed_out=True)
+    assert time.perf_counter() - start < 10
+
+
+def test_subprocess_timeout_kills_process():
+    start = time.perf_counter()
+    with pytest.raises(subprocess.TimeoutExpired):
+        _run_subprocess(SLEEP_ARGS, '', timeout=0.5)
+    assert time.perf_counter() - start < 10
+
+
+@pytest.mark.parametrize('code', [*CODES[:4], OVERLAPPING_CODE])
+def test_pylint_lints_code_module_astroid(code):
+    code_module = CodeModule(code)
+    original = ast.dump(code_module.ast, include_attributes=True)
+    assert get_pylint_matches(code_module) == get_pylint_matches(code)
+    assert ast.dump(code_module.ast, include_attributes=True) == original
+
+
+def test_code_module_astroid_is_cached():
+    code_module = CodeModule(OVERLAPPING_CODE)
+    assert code_module.astroid is code_module.astroid
+    assert code_module.astroid.body[0].name == 'foo'
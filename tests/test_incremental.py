@@ -0,0 +1,126 @@
+from textwrap import dedent
+
+from qchecker.cache import MatchCache
+from qchecker.incremental import IncrementalChecker
+from qchecker.match import TextRange
+from qchecker.parser import CodeModule
+from qchecker.substructures import *
+
+CODE = dedent('''
+x = 1
+x = x + 1
+
+def is_even(n):
+    if n % 2 == 0:
+        return True
+    return False
+
+@decorator
+def foo(x):
+    if x > 5:
+        print('x is big')
+    else:
+        if x < 0:
+            print('x is small')
+        else:
+            print('x is medium')
+
+class Foo:
+    def bar(self):
+        if self.x:
+            return True
+        else:
+            return False
+''').strip()
+
+
+def _full_matches(substructures, code):
+    return [
+        match
+        for substructure in substructures
+        for match in sorted(
+            substructure.iter_matches(code),
+            key=lambda m: (m.text_range.from_line, m.text_range.from_offset),
+        )
+    ]
+
+
+def test_incremental_matches_full_check():
+    code = CodeModule(CODE)
+    checker = IncrementalChecker(ALL_SUBSTRUCTURES, MatchCache())
+    assert checker.check(code) == _full_matches(ALL_SUBSTRUCTURES, code)
+
+
+def test_incremental_only_rechecks_changed_definitions(monkeypatch):
+    checker = IncrementalChecker(SUBSTRUCTURES, MatchCache())
+    checker.check(CodeModule(CODE))
+
+    rechecked = []
+    match_definition = checker._match_definition
+
+    def spy(code, definition):
+        rechecked.append(definition.ast_node.name)
+        return match_definition(code, definition)
+
+    monkeypatch.setattr(checker, '_match_definition', spy)
+    resubmission = CODE.replace(
+        'def is_even(n):\n',
+        'def is_even(n):\n    """Is n even?"""\n    n = n\n',
+    )
+    code = CodeModule(resubmission)
+    matches = checker.check(code)
+    assert rechecked == ['is_even']
+    assert matches == _full_matches(SUBSTRUCTURES, code)
+
+
+def test_incremental_shifts_unchanged_definitions():
+    checker = IncrementalChecker(
+        [IfReturnBool, IfElseReturnBool], MatchCache(),
+    )
+    match1, match2 = checker.check(CodeModule(CODE))
+    assert match1.text_range == TextRange(5, 4, 7, 16)
+    assert match2.text_range == TextRange(21, 8, 24, 24)
+
+    match1, match2 = checker.check(CodeModule('\n\n' + CODE))
+    assert match1.text_range == TextRange(7, 4, 9, 16)
+    assert match2.text_range == TextRange(23, 8, 26, 24)
+
+
+def test_identical_definitions_share_cache_between_submissions():
+    cache = MatchCache()
+    submission1 = CodeModule(CODE)
+    submission2 = CodeModule(dedent('''
+    def main():
+        y = 0
+        y = y + 1
+        print(is_even(y))
+
+
+    def is_even(n):
+        if n % 2 == 0:
+            return True
+        return False
+    ''').strip())
+    IncrementalChecker(SUBSTRUCTURES, cache).check(submission1)
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (0, 3)
+
+    checker = IncrementalChecker(reversed(SUBSTRUCTURES), cache)
+    matches = checker.check(submission2)
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (1, 4)
+    assert sorted(matches, key=str) == sorted(
+        _full_matches(SUBSTRUCTURES, submission2), key=str,
+    )
+
+
+def test_match_cache_is_bounded():
+    cache = MatchCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
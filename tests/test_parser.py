@@ -0,0 +1,70 @@
+import pytest
+
+from qchecker.match import TextRange
+from qchecker.parser import CodeModule, LineIndex
+from qchecker.substructures import *
+
+CODE = '''\
+def f(x):
+    if x:
+        pass
+    y = 1
+'''
+
+
+@pytest.mark.parametrize('source', [
+    '', 'a', 'a\n', 'a\n\nb', 'a\r\nb\r\n', '\n\n', 'a\nb\n\n',
+    'a\rb\r', 'a\r\rb', 'a\r\n\rb\n',
+])
+def test_line_index_matches_splitlines(source):
+    index = LineIndex(source)
+    assert len(index) == len(source.splitlines())
+    assert index.lines(1, len(index)) == source.splitlines()
+    assert [index.line(n) for n in range(1, len(index) + 1)] \
+        == source.splitlines()
+
+
+def test_line_index_out_of_range():
+    index = LineIndex(CODE)
+    assert index.line(4) == '    y = 1'
+    assert index.lines(0, 2) == ['def f(x):', '    if x:']
+    assert index.lines(4, 10) == ['    y = 1']
+    with pytest.raises(IndexError):
+        index.line(5)
+    with pytest.raises(IndexError):
+        index.line(0)
+
+
+def test_release():
+    code = CodeModule(CODE)
+    match, = EmptyIfBody.list_matches(code)
+    assert not code.released
+    code.release()
+    assert code.released
+    assert match.text_range.grab_range(code) \
+        == match.text_range.grab_range(CODE) == 'if x:\n    pass'
+    assert TextRange(4, 4, 4, 9).grab_range(code) == 'y = 1'
+    with pytest.raises(ValueError):
+        code.ast
+    with pytest.raises(ValueError):
+        code.cst
+    with pytest.raises(ValueError):
+        EmptyIfBody.list_matches(code)
+    with pytest.raises(ValueError):
+        ElseIf.list_matches(code)
+
+
+def test_grab_range_with_carriage_returns():
+    code = CodeModule('a = 1\rb = c + 0\r')
+    match, = RedundantArithmetic.list_matches(code)
+    assert match.text_range.from_line == 2
+    assert match.text_range.grab_range(code) \
+        == match.text_range.grab_range(code.code) == 'c + 0'
+
+
+def test_cst_is_not_copied():
+    # The wrapper's module is the parsed module rather than a deep copy, so
+    # parsing deeply nested code does not exceed the recursion limit
+    code = CodeModule('x = ' + ' + '.join(['a'] * 900))
+    assert code.cst.module.body[0].body[0].value.right.value == 'a'
+    assert RepeatedAddition.list_matches(code)
@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+from textwrap import dedent
+
+from qchecker.cache import MatchCache
+from qchecker.incremental import IncrementalChecker
+from qchecker.parser import CodeModule
+from qchecker.profiling import *
+from qchecker.substructures import *
+from qchecker.substructures import _ast_substructures
+
+CODE = dedent('''
+def foo(x):
+    if x > 5:
+        print(x)
+    else:
+        print(x)
+
+def bar(x):
+    if x:
+        return True
+    else:
+        return False
+
+x = 1
+x = x + 1
+''')
+
+
+def test_profile_records_each_substructure():
+    nodes_of_class = _ast_substructures.nodes_of_class
+    code = CodeModule(CODE)
+    stats = ProfileStats()
+    matches = stats.profile(code, SUBSTRUCTURES)
+    assert matches == [m for s in SUBSTRUCTURES for m in s.iter_matches(code)]
+    assert stats.submissions == 1
+    assert set(stats.substructures) == {s.name for s in SUBSTRUCTURES}
+
+    duplicate_body = stats[DuplicateIfElseBody]
+    assert duplicate_body.calls == 1
+    assert duplicate_body.matches == 1
+    assert duplicate_body.equals_calls == 2
+    assert duplicate_body.dump_calls == 4
+    assert duplicate_body.nodes_visited > 20
+    assert duplicate_body.seconds > 0
+    assert stats[ConfusingElse].nodes_visited > 20
+    assert stats[SeveralDuplicateIfElseStatements].equals_calls == 0
+
+    # Hooks are removed once stats are recorded
+    assert _ast_substructures.nodes_of_class is nodes_of_class
+
+
+def test_profile_stats_merge():
+    total = ProfileStats()
+    for _ in range(3):
+        stats = ProfileStats()
+        stats.profile(CODE, [IfElseReturnBool, NestedIf])
+        total.merge(stats)
+    assert total.submissions == 3
+    assert total[IfElseReturnBool].calls == 3
+    assert total[IfElseReturnBool].matches == 3
+    assert total[NestedIf].matches == 0
+
+    data = json.loads(json.dumps(total.as_dict()))
+    assert data['substructures'][IfElseReturnBool.name]['matches'] == 3
+    table = total.format_table(sort_by='matches').splitlines()
+    assert table[1].startswith(IfElseReturnBool.name)
+
+
+def test_incremental_records_cache_hits():
+    stats = ProfileStats()
+    checker = IncrementalChecker(
+        [IfElseReturnBool, AugmentableAssignment],
+        MatchCache(),
+        stats=stats,
+    )
+    checker.check(CODE)
+    checker.check(CODE.replace('print(x)', 'print(y)'))
+    assert stats.submissions == 2
+    # bar is unchanged in the second submission
+    assert stats[IfElseReturnBool].cache_hits == 1
+    assert stats[IfElseReturnBool].matches == 2
+    assert stats[AugmentableAssignment].matches == 2
+    # foo and bar, foo again, and the statements outside definitions
+    assert stats[IfElseReturnBool].calls == 5
+
+
+def test_helper_counters():
+    equals = _ast_substructures.equals
+    code = CodeModule(CODE)
+    reset_counters()
+    enable_counters()
+    try:
+        assert counters_enabled()
+        for substructure in SUBSTRUCTURES:
+            substructure.list_matches(code)
+        RepeatedAddition.list_matches('x = a + a + a')
+    finally:
+        disable_counters()
+    counters = get_counters()
+    assert counters['ast.nodes_of_class'].calls > 100
+    assert counters['ast.nodes_of_class'].seconds > 0
+    # DuplicateIfElseBody and UnnecessaryElse, through match_ends
+    assert counters['ast.equals'].calls == 5
+    assert counters['ast.match_ends'].calls == 2
+    assert counters['ast._dump'].calls == 10
+    assert counters['ast._dump'].dump_bytes > 100
+    assert counters['ast.simplify_expression'].calls > 5
+
+    # Counters are kept but no longer counted once disabled
+    assert _ast_substructures.equals is equals
+    DuplicateIfElseBody.list_matches(code)
+    assert get_counters()['ast.equals'].calls == 5
+    reset_counters()
+    assert get_counters() == {}
+
+
+def test_helper_counters_from_environment():
+    script = (
+        'from qchecker.profiling import *\n'
+        'from qchecker.substructures import NestedIf\n'
+        'NestedIf.list_matches("if a:\\n    if b:\\n        pass")\n'
+        'print(counters_enabled(), get_counters()["ast.nodes_of_class"].calls)'
+    )
+    env = dict(os.environ, **{COUNTERS_ENVIRONMENT_VARIABLE: '1'})
+    output = subprocess.run(
+        [sys.executable, '-c', script],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.split() == ['True', '8']
@@ -1,10 +1,18 @@
+import pickle
+from ast import If, parse, walk
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
 
 import pytest
 
-from qchecker.match import TextRange
+from qchecker.incremental import IncrementalChecker
+from qchecker.match import Match, TextRange
 from qchecker.parser import CodeModule
 from qchecker.substructures import *
+from qchecker.substructures._ast_substructures import (
+    ASTSubstructure,
+    _IfShape,
+)
 
 
 def test_unnecessary_elif():
@@ -972,3 +980,262 @@ def test_for_with_redundant_indexing():
     match1, match2 = ForWithRedundantIndexing.iter_matches(code)
     assert match1.text_range == TextRange(2, 0, 3, 15)
     assert match2.text_range == TextRange(6, 4, 8, 16)
+
+
+def test_any_present():
+    code = CodeModule(dedent('''
+    def foo(x):
+        if x:
+            print(x)
+        else:
+            if not x:
+                print(x)
+            else:
+                print(x)
+    '''))
+    assert any_present(code, SUBSTRUCTURES)
+    assert any_present(code, [RedundantFor, ConfusingElse])
+    assert not any_present(code, [RedundantFor, ElseIf, RedundantNot])
+    assert not any_present(code, [])
+
+
+def test_cst_matches_stop_at_limit(monkeypatch):
+    code = CodeModule(dedent('''
+    if a:
+        pass
+    else:
+        if b:
+            pass
+        else:
+            pass
+    if c:
+        pass
+    else:
+        if d:
+            pass
+        else:
+            pass
+    '''))
+    visited = []
+    visit_if = ConfusingElse._Visitor.visit_If
+    monkeypatch.setattr(
+        ConfusingElse._Visitor, 'visit_If',
+        lambda self, node: visited.append(node) or visit_if(self, node),
+    )
+    assert ConfusingElse.is_present(code)
+    assert len(visited) == 1
+    assert len(ConfusingElse.list_matches(code)) == 2
+
+
+LIMIT_CODE = dedent('''
+x = x + 1
+if a:
+    pass
+else:
+    if b:
+        pass
+    else:
+        pass
+y = not y == 1
+z = z * 2
+''')
+
+
+def test_iter_all_matches_in_source_order():
+    code = CodeModule(LIMIT_CODE)
+    substructures = [AugmentableAssignment, RedundantNot, ConfusingElse]
+    matches = list(iter_all_matches(code, substructures))
+    assert [m.id for m in matches] == [
+        AugmentableAssignment.name,
+        ConfusingElse.name,
+        RedundantNot.name,
+        AugmentableAssignment.name,
+    ]
+    assert sorted(map(repr, matches)) == sorted(
+        repr(m) for s in substructures for m in s.iter_matches(code)
+    )
+
+
+def test_iter_all_matches_limits(monkeypatch):
+    code = CodeModule(LIMIT_CODE)
+    substructures = [AugmentableAssignment, RedundantNot, ConfusingElse]
+    first, second = iter_all_matches(code, substructures, limit=2)
+    assert (first.id, second.id) == (
+        AugmentableAssignment.name, ConfusingElse.name,
+    )
+    matches = iter_all_matches(
+        code, substructures, limit_per_substructure=1,
+    )
+    assert [m.id for m in matches] == [
+        AugmentableAssignment.name, ConfusingElse.name, RedundantNot.name,
+    ]
+
+    matched = []
+    iter_partial_matches = RedundantNot._iter_partial_matches.__func__
+    monkeypatch.setattr(
+        RedundantNot, '_iter_partial_matches',
+        classmethod(lambda cls, code, ast_nodes, cst_nodes: (
+            matched.append(ast_nodes)
+            or iter_partial_matches(cls, code, ast_nodes, cst_nodes)
+        )),
+    )
+    list(iter_all_matches(code, [RedundantNot], limit_per_substructure=1))
+    assert len(matched) == 3
+
+
+class _FirstLine(Substructure):
+    # A substructure only implementing the abstract methods of the base
+    # class, as third party substructures may
+    name = 'First Line'
+    technical_description = 'The first line'
+    description = 'The first line of the module'
+
+    @classmethod
+    def iter_matches(cls, code):
+        yield Match(cls.name, cls.description, TextRange(1, 0, 1, 1))
+
+
+def test_custom_substructures_match_whole_modules():
+    code = CodeModule(LIMIT_CODE)
+    assert _FirstLine._module_scoped
+    with pytest.raises(ValueError):
+        list(_FirstLine._iter_partial_matches(code, [], []))
+    matches = list(iter_all_matches(code, [AugmentableAssignment, _FirstLine]))
+    assert [m.id for m in matches] == [
+        _FirstLine.name, AugmentableAssignment.name,
+        AugmentableAssignment.name,
+    ]
+    checker = IncrementalChecker([_FirstLine])
+    assert checker.check(code) == list(_FirstLine.iter_matches(code))
+
+
+def test_iter_all_matches_orders_ties_by_substructure():
+    code = CodeModule('x = x + 1\n')
+    substructures = [_FirstLine, AugmentableAssignment]
+    assert [m.id for m in iter_all_matches(code, substructures)] \
+        == [_FirstLine.name, AugmentableAssignment.name]
+    assert [m.id for m in iter_all_matches(code, substructures[::-1])] \
+        == [AugmentableAssignment.name, _FirstLine.name]
+
+
+def test_iter_all_matches_limits_cst_traversals(monkeypatch):
+    code = CodeModule(dedent('''
+    if a:
+        pass
+    else:
+        if b:
+            pass
+        else:
+            if c:
+                pass
+            else:
+                pass
+    '''))
+    visited = []
+    visit_if = ConfusingElse._Visitor.visit_If
+    monkeypatch.setattr(
+        ConfusingElse._Visitor, 'visit_If',
+        lambda self, node: visited.append(node) or visit_if(self, node),
+    )
+    match, = iter_all_matches(
+        code, [ConfusingElse], limit_per_substructure=1,
+    )
+    assert len(visited) == 1
+    assert match == ConfusingElse.list_matches(code)[0]
+
+
+PLAN_CODE = LIMIT_CODE + dedent('''
+def foo(x):
+    if x > 5:
+        return True
+    else:
+        return False
+
+a = b + b + b
+c = c
+for i in range(len(xs)):
+    print(xs[i])
+''')
+
+
+def test_checker_plan_matches_substructures():
+    plan = CheckerPlan(ALL_SUBSTRUCTURES)
+    code = CodeModule(PLAN_CODE)
+    expected = [
+        m for s in ALL_SUBSTRUCTURES for m in s.iter_matches(code)
+    ]
+    assert len(expected) > 5
+    assert plan.check(code) == expected
+    assert plan.check(PLAN_CODE) == expected
+
+
+def test_checker_plan_parses_required_trees():
+    assert not CheckerPlan([ConfusingElse]).requires_ast
+    assert not CheckerPlan([RedundantNot]).requires_cst
+    with pytest.raises(SyntaxError):
+        CheckerPlan([RedundantNot]).check('if x:\npass')
+    with pytest.raises(SyntaxError):
+        CheckerPlan([ConfusingElse]).check('if x:\npass')
+
+
+def test_checker_plan_is_reusable():
+    plan = pickle.loads(pickle.dumps(CheckerPlan(SUBSTRUCTURES)))
+    expected = plan.check(PLAN_CODE)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(plan.check, [PLAN_CODE] * 8))
+    assert results == [expected] * 8
+
+
+IF_SHAPES_CODE = dedent('''
+if a:
+    return True
+else:
+    return False
+if a:
+    x = True
+else:
+    x = False
+if a:
+    pass
+elif not a:
+    pass
+if a:
+    if b:
+        c()
+if a:
+    foo()
+    bar()
+else:
+    bar()
+if a:
+    foo()
+    bar()
+else:
+    foo()
+    bar()
+if a:
+    x = x
+else:
+    1
+if a:
+    foo()
+''')
+
+
+def test_if_shapes_route_to_matching_substructures():
+    module = parse(IF_SHAPES_CODE)
+    if_substructures = [
+        s for s in SUBSTRUCTURES
+        if issubclass(s, ASTSubstructure) and If in s._node_types
+    ]
+    routed = set()
+    for node in walk(module):
+        if not isinstance(node, If):
+            continue
+        shape = _IfShape.of(node)
+        for substructure in if_substructures:
+            if substructure._accepts_shape(shape):
+                routed.add(substructure)
+            else:
+                assert not list(substructure._match_node(node, module))
+    assert routed == set(if_substructures)